@@ -1,31 +1,130 @@
-import os, logging
+import os, re, logging
 import azure.functions as func
-from azure.storage.blob import BlobServiceClient
-from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobSasPermissions
+from utils.sas import generate_blob_sas_url, get_delegation_key_provider
+from utils.storage_client import create_blob_service_client
 
-#  Setup Blob Client 
-STORAGE_ACCOUNT_NAME = os.getenv("AzureWebJobsStorage__accountName")
-credential = DefaultAzureCredential()
-blob_service_client = BlobServiceClient(
-    f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net", credential=credential
-)
+# Setup Blob Client (managed identity, or STORAGE_CONNECTION_STRING locally)
+blob_service_client = create_blob_service_client()
+# Warm the shared delegation key used for redirects
+get_delegation_key_provider()
+
+# Blobs larger than this are redirected to a SAS URL instead of being proxied
+# through the worker, unless the caller asks for a byte range.
+DOWNLOAD_REDIRECT_THRESHOLD = int(os.getenv("DOWNLOAD_REDIRECT_THRESHOLD", str(32 * 1024 * 1024)))
+# Upper bound on a single ranged response served by the worker.
+DOWNLOAD_MAX_RANGE_BYTES = int(os.getenv("DOWNLOAD_MAX_RANGE_BYTES", str(8 * 1024 * 1024)))
+DOWNLOAD_SAS_MINUTES = int(os.getenv("DOWNLOAD_SAS_MINUTES", "15"))
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(range_header, size):
+    """Parse a single 'bytes=start-end' Range header into (offset, length).
+
+    Returns None when no usable range was sent and raises ValueError when the
+    range cannot be satisfied for a blob of the given size.
+    """
+    if not range_header:
+        return None
+
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        # Multi-range or malformed headers are ignored, as allowed by RFC 9110
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        suffix = int(end)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        offset = max(size - suffix, 0)
+        return offset, size - offset
+
+    offset = int(start)
+    if offset >= size:
+        raise ValueError(f"Range start {offset} beyond blob size {size}")
+    last = min(int(end), size - 1) if end else size - 1
+    if last < offset:
+        raise ValueError(f"Range end {last} before start {offset}")
+    return offset, last - offset + 1
+
+def generate_download_url(container, blob_name):
+    """Generate a short-lived read-only SAS URL for a blob."""
+    url, _ = generate_blob_sas_url(
+        container,
+        blob_name,
+        BlobSasPermissions(read=True),
+        expiry_minutes=DOWNLOAD_SAS_MINUTES,
+        content_disposition=f"attachment; filename={os.path.basename(blob_name)}"
+    )
+    return url
+
+def redirect_response(container, blob_name):
+    return func.HttpResponse(
+        status_code=302,
+        headers={"Location": generate_download_url(container, blob_name), "Cache-Control": "no-store"}
+    )
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info("Downloading blob")
     container = req.params.get("containerName")
     blob_name = req.params.get("blobName")
+    # mode=redirect always hands out a SAS URL, mode=proxy always serves through the worker.
+    # auto redirects large blobs, which fetch() callers can only follow if the storage
+    # account allows their origin (CORS); browser navigation, as BlobList uses, always can.
+    mode = (req.params.get("mode") or "auto").lower()
 
     if not container or not blob_name:
         return func.HttpResponse("Missing containerName or blobName", status_code=400)
 
+    if mode not in ("auto", "redirect", "proxy"):
+        return func.HttpResponse(f"Unsupported mode: {mode}", status_code=400)
+
     try:
+        if mode == "redirect":
+            return redirect_response(container, blob_name)
+
         client = blob_service_client.get_blob_client(container=container, blob=blob_name)
-        downloader = client.download_blob().readall()
+        size = client.get_blob_properties().size
+
+        try:
+            byte_range = parse_range(req.headers.get("Range"), size)
+        except ValueError as e:
+            logging.warning(f"Unsatisfiable range for {container}/{blob_name}: {e}")
+            return func.HttpResponse(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{size}", "Accept-Ranges": "bytes"}
+            )
+
+        if byte_range is None and mode == "auto" and size > DOWNLOAD_REDIRECT_THRESHOLD:
+            logging.info(f"Redirecting {container}/{blob_name} ({size} bytes) to SAS URL")
+            return redirect_response(container, blob_name)
+
         headers = {
             "Content-Disposition": f"attachment; filename={blob_name}",
-            "Content-Type": "application/octet-stream"
+            "Content-Type": "application/octet-stream",
+            "Accept-Ranges": "bytes"
         }
-        return func.HttpResponse(body=downloader, status_code=200, headers=headers)
+        status_code = 200
+        offset, length = 0, size
+        if byte_range is not None:
+            offset, length = byte_range
+            length = min(length, DOWNLOAD_MAX_RANGE_BYTES)
+            headers["Content-Range"] = f"bytes {offset}-{offset + length - 1}/{size}"
+            status_code = 206
+
+        # In auto mode full bodies are capped at the redirect threshold and ranges at
+        # DOWNLOAD_MAX_RANGE_BYTES, so the worker only ever holds one bounded slice.
+        body = b""
+        if length:
+            downloader = client.download_blob(offset=offset, length=length, max_concurrency=4)
+            body = b"".join(downloader.chunks())
+
+        return func.HttpResponse(body=body, status_code=status_code, headers=headers)
     except Exception as e:
         logging.exception("Error downloading blob")
         return func.HttpResponse(f"Download failed: {e}", status_code=500)
@@ -1,54 +1,111 @@
-import os
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 import azure.functions as func
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobSasPermissions
+from utils.sas import generate_blob_sas_url, get_delegation_key_provider
+from utils.storage_client import create_blob_service_client
 import logging
-# Get environment variables
-STORAGE_ACCOUNT_NAME = os.getenv("AzureWebJobsStorage__accountName")
-
-# Create BlobServiceClient using Managed Identity
-credential = DefaultAzureCredential()
-blob_service_client = BlobServiceClient(
-    f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net", credential=credential
-)
-
-delegation_key = blob_service_client.get_user_delegation_key(
-    key_start_time=datetime.datetime.utcnow(),
-    key_expiry_time=datetime.datetime.utcnow() + datetime.timedelta(hours=1)
-)
-
-def generate_sas_token(container_name, blob_name):
-    """Generate a SAS token with read & write access for a blob."""
-    sas_token = generate_blob_sas(
-        account_name=STORAGE_ACCOUNT_NAME,
-        container_name=container_name,
-        blob_name=blob_name,
-        user_delegation_key=delegation_key,  # Managed Identity handles authentication
-        permission=BlobSasPermissions(read=True, write=True),  # Read & Write
-        expiry=datetime.datetime.utcnow() + datetime.timedelta(hours=1)  # 1-hour expiry
+# Create BlobServiceClient using Managed Identity (or STORAGE_CONNECTION_STRING locally)
+blob_service_client = create_blob_service_client()
+
+# Warm the shared delegation key in the background instead of blocking import
+get_delegation_key_provider()
+
+CONTAINER_NAMES = ["bronze", "silver", "gold"]
+MAX_PAGE_SIZE = 5000
+
+def generate_sas_token(container_name, blob_name, expiry=None):
+    """Generate a SAS URL with read & write access for a blob.
+
+    Signing uses the cached user delegation key, so it is a purely local
+    operation per blob.
+    """
+    url, _ = generate_blob_sas_url(
+        container_name,
+        blob_name,
+        BlobSasPermissions(read=True, write=True),  # Read & Write
+        expiry_minutes=60,  # 1-hour expiry
+        expiry=expiry
     )
+    return url
+
+def list_container_page(container, prefix=None, page_size=None, continuation_token=None, sign=True):
+    """List one page of a container (or all of it when page_size is None)."""
+    container_client = blob_service_client.get_container_client(container)
+    blob_pages = container_client.list_blobs(
+        name_starts_with=prefix, results_per_page=page_size
+    ).by_page(continuation_token=continuation_token)
+
+    if page_size:
+        blobs = list(next(blob_pages, []))
+        next_token = blob_pages.continuation_token
+    else:
+        blobs = [blob for page in blob_pages for blob in page]
+        next_token = None
+
+    # One expiry for the whole batch keeps every URL in the page consistent
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    items = []
+    for blob in blobs:
+        item = {"name": blob.name}
+        if sign:
+            item["url"] = generate_sas_token(container, blob.name, expiry)
+        else:
+            item["size"] = blob.size
+            item["lastModified"] = blob.last_modified.isoformat() if blob.last_modified else None
+        items.append(item)
 
-    blob_client = blob_service_client.get_blob_client(container_name, blob_name)
-    return f"{blob_client.url}?{sas_token}"
+    return items, next_token
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
+    """List blobs per container.
+
+    Without query parameters the full bronze/silver/gold listing is returned as
+    before. Optional parameters:
+      containers        comma-separated subset of bronze,silver,gold
+      prefix            only blobs whose name starts with this prefix
+      pageSize          return one page per container plus continuationTokens
+      continuationToken resume a listing (requires a single container)
+      sign              'false' to skip SAS URLs; use app_downloadBlobs to sign on demand
+    """
     logging.info("Python HTTP trigger function processed a request for getBlobsByContainer.")
     try:
-        container_names = ["bronze", "silver", "gold"]
-        blobs_by_container = {}
-
-        for container in container_names:
-            container_client = blob_service_client.get_container_client(container)
-            blobs_with_sas = [
-                {
-                    "name": blob.name,
-                    "url": generate_sas_token(container, blob.name)  # Get SAS URL for each blob
-                }
-                for blob in container_client.list_blobs()
-            ]
-            blobs_by_container[container] = blobs_with_sas
+        requested = req.params.get("containers")
+        container_names = [c.strip() for c in (requested or "").split(",") if c.strip()] or CONTAINER_NAMES
+        unknown = [c for c in container_names if c not in CONTAINER_NAMES]
+        if unknown:
+            return func.HttpResponse(f"Unknown containers: {', '.join(unknown)}", status_code=400)
+
+        prefix = req.params.get("prefix") or None
+        continuation_token = req.params.get("continuationToken") or None
+        sign = (req.params.get("sign") or "true").lower() != "false"
+
+        page_size = req.params.get("pageSize")
+        if page_size is not None:
+            try:
+                page_size = int(page_size)
+            except ValueError:
+                return func.HttpResponse("pageSize must be an integer", status_code=400)
+            if page_size <= 0 or page_size > MAX_PAGE_SIZE:
+                return func.HttpResponse(f"pageSize must be between 1 and {MAX_PAGE_SIZE}", status_code=400)
+
+        if continuation_token and (len(container_names) != 1 or not page_size):
+            return func.HttpResponse("continuationToken requires a single container and pageSize", status_code=400)
+
+        # The containers are independent, so list them concurrently
+        with ThreadPoolExecutor(max_workers=len(container_names)) as executor:
+            futures = {
+                container: executor.submit(list_container_page, container, prefix, page_size, continuation_token, sign)
+                for container in container_names
+            }
+            results = {container: future.result() for container, future in futures.items()}
+
+        blobs_by_container = {container: items for container, (items, _) in results.items()}
+        if page_size:
+            blobs_by_container["continuationTokens"] = {
+                container: token for container, (_, token) in results.items()
+            }
 
         return func.HttpResponse(json.dumps(blobs_by_container), mimetype="application/json")
 
@@ -0,0 +1,54 @@
+import os, json, logging, datetime
+import azure.functions as func
+from azure.storage.blob import BlobSasPermissions
+from utils.sas import generate_blob_sas_url, get_delegation_key_provider
+
+# Warm the shared delegation key in the background
+get_delegation_key_provider()
+
+UPLOAD_CONTAINERS = [c.strip() for c in os.getenv("UPLOAD_CONTAINERS", "bronze,silver").split(",") if c.strip()]
+UPLOAD_SAS_MINUTES = int(os.getenv("UPLOAD_SAS_MINUTES", "30"))
+# Hints returned to the client for Put Block / Put Block List uploads
+UPLOAD_BLOCK_SIZE = int(os.getenv("UPLOAD_BLOCK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "4"))
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Issue a write-only SAS so the browser can upload block blobs straight to storage."""
+    logging.info("Issuing upload SAS...")
+
+    try:
+        data = req.get_json()
+    except ValueError:
+        return func.HttpResponse("Invalid JSON", status_code=400)
+
+    container_name = data.get("containerName")
+    blob_name = data.get("blobName")
+    if not container_name or not blob_name:
+        return func.HttpResponse("Missing containerName or blobName", status_code=400)
+
+    if container_name not in UPLOAD_CONTAINERS:
+        return func.HttpResponse(f"Uploads to '{container_name}' are not allowed", status_code=403)
+
+    try:
+        url, expiry = generate_blob_sas_url(
+            container_name,
+            blob_name,
+            BlobSasPermissions(create=True, write=True),  # Write-only
+            expiry_minutes=UPLOAD_SAS_MINUTES
+        )
+
+        return func.HttpResponse(
+            json.dumps({
+                "url": url,
+                "containerName": container_name,
+                "blobName": blob_name,
+                "expiresOn": expiry.replace(tzinfo=datetime.timezone.utc).isoformat(),
+                "blockSize": UPLOAD_BLOCK_SIZE,
+                "maxConcurrency": UPLOAD_MAX_CONCURRENCY
+            }),
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logging.exception("Failed to issue upload SAS")
+        return func.HttpResponse(f"Failed to issue upload SAS: {str(e)}", status_code=500)
@@ -0,0 +1,29 @@
+import json, logging
+import azure.functions as func
+from utils.gold_index import load_index, query_runs
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Look up validation runs in the gold index without listing the gold container.
+
+    Optional parameters:
+      filing  case-insensitive part of the filing key
+      status  only runs with at least one verdict in this status (e.g. FLAGGED_FOR_REVIEW)
+      latest  'false' to return every indexed run instead of the latest per filing
+    """
+    logging.info("Querying gold index...")
+
+    filing = req.params.get("filing") or None
+    status = req.params.get("status") or None
+    latest = (req.params.get("latest") or "true").lower() != "false"
+
+    try:
+        index = load_index(filing)
+        runs = query_runs(index, filing=filing, status=status, latest=latest)
+        return func.HttpResponse(
+            json.dumps({"runs": runs, "updatedAt": index.get("updatedAt")}),
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logging.exception("Failed to query gold index")
+        return func.HttpResponse(f"Failed to query gold index: {str(e)}", status_code=500)
@@ -0,0 +1,85 @@
+import os, json, base64, logging
+import azure.functions as func
+from azure.storage.blob import BlobBlock, ContentSettings
+from utils.storage_client import create_blob_service_client
+
+# Blob client setup (managed identity, or STORAGE_CONNECTION_STRING locally)
+blob_service_client = create_blob_service_client()
+
+UPLOAD_CONTAINERS = [c.strip() for c in os.getenv("UPLOAD_CONTAINERS", "bronze,silver").split(",") if c.strip()]
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(16 * 1024 * 1024)))
+# Azure caps a block blob at 50,000 committed blocks
+MAX_BLOCK_COUNT = 50000
+
+def block_id(index):
+    """Block IDs must all have the same length, so the index is zero-padded."""
+    return base64.b64encode(f"{index:08d}".encode("utf-8")).decode("utf-8")
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Server-side fallback for chunked uploads.
+
+    Each request carries one raw chunk and is staged as a block as soon as it
+    arrives: ?containerName=&blobName=&blockIndex=N. A final request with
+    ?action=commit&blockCount=N commits blocks 0..N-1 in order.
+    """
+    container_name = req.params.get("containerName")
+    blob_name = req.params.get("blobName")
+    action = (req.params.get("action") or "stage").lower()
+
+    if not container_name or not blob_name:
+        return func.HttpResponse("Missing containerName or blobName", status_code=400)
+
+    if container_name not in UPLOAD_CONTAINERS:
+        return func.HttpResponse(f"Uploads to '{container_name}' are not allowed", status_code=403)
+
+    try:
+        blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
+
+        if action == "stage":
+            try:
+                index = int(req.params.get("blockIndex"))
+            except (TypeError, ValueError):
+                return func.HttpResponse("Missing or invalid blockIndex", status_code=400)
+            if index < 0 or index >= MAX_BLOCK_COUNT:
+                return func.HttpResponse(f"blockIndex must be between 0 and {MAX_BLOCK_COUNT - 1}", status_code=400)
+
+            chunk = req.get_body()
+            if not chunk:
+                return func.HttpResponse("Empty chunk", status_code=400)
+            if len(chunk) > UPLOAD_MAX_CHUNK_BYTES:
+                return func.HttpResponse(f"Chunk exceeds {UPLOAD_MAX_CHUNK_BYTES} bytes", status_code=413)
+
+            blob_client.stage_block(block_id=block_id(index), data=chunk, length=len(chunk))
+            logging.info(f"Staged block {index} ({len(chunk)} bytes) for {container_name}/{blob_name}")
+            return func.HttpResponse(
+                json.dumps({"blockIndex": index, "size": len(chunk)}),
+                status_code=202,
+                mimetype="application/json"
+            )
+
+        if action == "commit":
+            try:
+                block_count = int(req.params.get("blockCount"))
+            except (TypeError, ValueError):
+                return func.HttpResponse("Missing or invalid blockCount", status_code=400)
+            if block_count <= 0 or block_count > MAX_BLOCK_COUNT:
+                return func.HttpResponse(f"blockCount must be between 1 and {MAX_BLOCK_COUNT}", status_code=400)
+
+            content_type = req.params.get("contentType") or "application/octet-stream"
+            blob_client.commit_block_list(
+                [BlobBlock(block_id=block_id(i)) for i in range(block_count)],
+                content_settings=ContentSettings(content_type=content_type)
+            )
+            logging.info(f"Committed {block_count} blocks for {container_name}/{blob_name}")
+
+            url = f"{blob_service_client.primary_endpoint.rstrip('/')}/{container_name}/{blob_name}"
+            return func.HttpResponse(
+                json.dumps({"message": "Upload successful", "url": url}),
+                mimetype="application/json"
+            )
+
+        return func.HttpResponse(f"Unsupported action: {action}", status_code=400)
+
+    except Exception as e:
+        logging.exception("Chunk upload failed")
+        return func.HttpResponse(f"Upload failed: {str(e)}", status_code=500)
@@ -189,12 +189,11 @@ const BlobList = forwardRef<DateRefType, BlobListProps>(({ onSelectionChange },
     const files = selectedBlobs.filter(b => b.container === container);
     for (const blob of files) {
       try {
-        const response = await fetch(`/api/app_downloadBlobs?containerName=${blob.container}&blobName=${encodeURIComponent(blob.name)}`);
-        if (!response.ok) throw new Error();
-        const blobData = await response.blob();
-        const url = window.URL.createObjectURL(blobData);
+        // Navigate to a short-lived SAS link rather than fetching the bytes: the browser
+        // follows the redirect to storage as a download, which needs no CORS on the account
+        // and keeps large files out of the function worker.
         const link = document.createElement("a");
-        link.href = url;
+        link.href = `/api/app_downloadBlobs?containerName=${blob.container}&blobName=${encodeURIComponent(blob.name)}&mode=redirect`;
         link.setAttribute("download", blob.name);
         document.body.appendChild(link);
         link.click();
@@ -2,23 +2,47 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import azure.functions as func
 import logging
 import json
-import io
+import math
 import os
-import pandas as pd
 import re
-from utils.prompts import load_prompts
-from utils.blob_functions import get_blob_content, write_to_blob, list_blobs
-from utils.azure_openai import run_prompt
-from bs4 import BeautifulSoup
+from utils.prompts import load_prompts, prompt_version
+from utils.blob_functions import get_blob_content
+from utils.azure_openai import run_prompt, OPENAI_MODEL
+from utils.workbook_parsing import parse_blob_bytes, ROW_ID_COLUMN, CONCEPT_NAME_COLUMN
+from utils.row_store import RowStore
+from utils.gold_output import GoldOutputWriter, gold_output_name
+from utils.gold_parquet import open_gold_parquet_writer
+from utils.gold_index import build_run_entry, record_run
+from utils.filings import filing_key, run_filing_key
+from utils.row_state import row_fingerprints, load_row_state, save_row_state
+from utils.process_pool import run_in_process
+from utils.telemetry import span, start_run, run_summary, propagate
+from utils.log_utils import get_logger, log_payload
+from utils.taxonomy_registry import filing_period_year, get_registry, get_taxonomy_index, taxonomy_year
 from datetime import datetime, timezone
-import Levenshtein
 from typing import Tuple
  
 # Define batch size (adjust based on LLM token limits)
 BATCH_SIZE = 10
+# Per-subsystem loggers for payload-heavy records; levels come from LOG_LEVEL_PIPELINE/_PARSE/_LLM
+pipeline_log = get_logger("pipeline")
+parse_log = get_logger("parse")
+llm_log = get_logger("llm")
+# Parse workbooks/HTML in the shared process pool instead of the download threads
+PARSE_IN_PROCESS_POOL = os.getenv("PARSE_IN_PROCESS_POOL", "true").lower() == "true"
+
+def parse_blob(blob_name, blob_bytes):
+    """Parse downloaded bytes, in the process pool unless PARSE_IN_PROCESS_POOL is off."""
+    if PARSE_IN_PROCESS_POOL:
+        return run_in_process(parse_blob_bytes, blob_name, blob_bytes)
+    return parse_blob_bytes(blob_name, blob_bytes)
 
 def process_blob(blob):
-    """Extract relevant Excel content for LLM validation."""
+    """Extract relevant Excel content for LLM validation.
+
+    The download happens on the calling thread; openpyxl and BeautifulSoup
+    parsing is handed to a process pool so several workbooks use several cores.
+    """
     blob_name = blob.get("name")
     container_name = blob.get("container", "silver")
     # result = {"blob_name": blob_name, "excel_rows": [], "error": None}
@@ -35,126 +59,17 @@ def process_blob(blob):
         return result
  
     try:
-        blob_bytes = get_blob_content(container_name, blob_name)
-        ext = os.path.splitext(blob_name)[1].lower()
- 
-        if ext in ['.xlsx', '.xls']:
-            xls = pd.ExcelFile(io.BytesIO(blob_bytes))
-            # df = pd.read_excel(xls, sheet_name='Filing Details')
- 
-            # # Extract required columns
-            # df = df[['Line Item Description', 'Concept Label', 'Comment Text']].dropna(how='all')
-            df_filing_details = pd.read_excel(xls, sheet_name='Filing Details')
- 
-            # Extract relevant columns for LLM validation
-            df = df_filing_details[['Line Item Description', 'Concept Label', 'Comment Text','Dimensions','Tag Value']].dropna(how='all')
- 
-            # Extract unique 'Period' values
-            if 'Period' in df_filing_details.columns:
-                unique_periods = df_filing_details['Period'].dropna().unique().tolist()
-                logging.info(f"[{blob_name}] Extracted Periods from Excel: {unique_periods}")
-
-            else:
-                unique_periods = []
-                logging.info(f"[{blob_name}] Extracted Periods from Excel: {unique_periods}")
- 
-            result["excel_rows"] = df.to_dict(orient='records')
-            result["unique_periods"] = unique_periods
- 
-            # taxonomy_df = pd.read_excel(xls, sheet_name='Filing Information')
-            # result["taxonomy_data"] = taxonomy_df.to_dict(orient='records')
-            if 'Filing Information' in xls.sheet_names:
-                taxonomy_df = pd.read_excel(xls, sheet_name='Filing Information')
-                if not taxonomy_df.empty:
-                    result["taxonomy_data"] = taxonomy_df.to_dict(orient='records')
-                else:
-                    logging.warning(f"'Filing Information' sheet is empty in blob {blob_name}")
-            else:
-                logging.warning(f"'Filing Information' sheet missing in blob {blob_name}")
-
-        elif ext == '.html':
-            try:
-                soup = BeautifulSoup(blob_bytes.decode('utf-8', errors='ignore'), 'html.parser')
-
-                full_text = []
-
-                # --------------------------
-                # Statement of Compliance
-                # --------------------------
-                start_tag = None
-                for p in soup.find_all("p"):
-                    if "STATEMENT OF COMPLIANCE" in p.get_text(strip=True).upper():
-                        start_tag = p
-                        break
-
-                content = []
-                if start_tag:
-                    current = start_tag
-                    while current:
-                        text = current.get_text(strip=True)
-                        if text.startswith("2.") and "ACCOUNTING POLICIES" in text.upper():
-                            break
-                        if text:
-                            content.append(text)
-                        current = current.find_next_sibling("p")
-
-                if content:
-                    full_text.append("=== STATEMENT OF COMPLIANCE ===")
-                    full_text.extend(content)
-
-                # --------------------------
-                # NOTES TO THE FINANCIAL STATEMENTS (all occurrences)
-                # --------------------------
-                notes_occurrences = []
-                for p in soup.find_all("p"):
-                    if "NOTES TO THE FINANCIAL STATEMENTS" in p.get_text(strip=True).upper():
-                        notes_occurrences.append(p)
-
-                for idx, start_tag in enumerate(notes_occurrences, start=1):
-                    notes_content = []
-                    current = start_tag
-                    while current:
-                        text = current.get_text(strip=True)
-                        if any(stop in text.upper() for stop in ["ACCOUNTING POLICIES", "DIRECTORS", "INDEPENDENT AUDITOR"]):
-                            break
-                        if text:
-                            notes_content.append(text)
-                        current = current.find_next_sibling("p")
-                    if notes_content:
-                        full_text.append(f"=== NOTES TO FS occurrence {idx} ===")
-                        full_text.extend(notes_content)
-
-                # --------------------------
-                # Factors affecting tax charge for the year
-                # --------------------------
-                tax_section = []
-                start_tag = None
-                for p in soup.find_all("p"):
-                    if "FACTORS AFFECTING TAX" in p.get_text(strip=True).upper():
-                        start_tag = p
-                        break
-
-                if start_tag:
-                    current = start_tag
-                    while current:
-                        text = current.get_text(strip=True)
-                        if any(stop in text.upper() for stop in ["NOTES TO THE", "DIRECTORS", "INDEPENDENT AUDITOR"]):
-                            break
-                        if text:
-                            tax_section.append(text)
-                        current = current.find_next_sibling("p")
-
-                if tax_section:
-                    full_text.append("=== FACTORS AFFECTING TAX ===")
-                    full_text.extend(tax_section)
-
-                # --------------------------
-                # Save everything in one field
-                # --------------------------
-                result["statement_of_compliance_text"] = "\n".join(full_text)
-
-            except Exception as e:
-                result["error"] = f"Error extracting HTML content from {blob_name}: {str(e)}"
+        with span("download", blob=blob_name) as download_span:
+            blob_bytes = get_blob_content(container_name, blob_name)
+            download_span.add("bytes", len(blob_bytes))
+        with span("parse", blob=blob_name) as parse_span:
+            parsed = parse_blob(blob_name, blob_bytes)
+            parse_span.add("rows", len(parsed.get("excel_rows") or []))
+        del blob_bytes
+
+        for level, message in parsed.pop("log", []):
+            getattr(parse_log, level)(message)
+        result.update(parsed)
                 
     except Exception as e:
         result["error"] = f"Error processing blob {blob_name}: {str(e)}"
@@ -162,69 +77,185 @@ def process_blob(blob):
     return result
  
 def batch_rows(rows, batch_size):
-    """Split rows into smaller batches."""
+    """Split rows (a list or RowStore) into smaller batches."""
     for i in range(0, len(rows), batch_size):
         yield rows[i:i + batch_size]
  
-def validate_with_llm(rows):
-    """Send batches of rows to LLM for validation."""
-    validated_rows = []
-    prompts = load_prompts()  
+def parse_batch_response(response):
+    """Turn one LLM response into a list of verdicts, or None if it should be skipped."""
+    try:
+        response = response.strip()
+ 
+        # Handle Markdown formatting from LLM like ```json ... ```
+        if response.startswith("```json"):
+            response = response.strip("`").replace("json", "", 1).strip()
+        elif response.startswith("```"):
+            response = response.strip("`").strip()
+ 
+        # Ensure it's still a string before proceeding
+        if not isinstance(response, str):
+            logging.error("LLM response is not a valid string.")
+            return [{"error": "Invalid LLM response type"}]
+ 
+        if not response.startswith("[") and not response.startswith("{"):
+            logging.error("LLM response is not valid JSON format")
+            return [{"error": "Invalid JSON format from LLM"}]
+ 
+        parsed_response = json.loads(response)
+ 
+        # Optional: skip if it's [{}] or [{}] * n
+        if isinstance(parsed_response, list) and all(isinstance(item, dict) and not item for item in parsed_response):
+            logging.warning("Skipping empty [{}] response from LLM")
+            return None
+        log_payload(llm_log, logging.INFO, "ROW BY ROW VALIDATION", parsed_response)
+        return list(parsed_response)
+ 
+    except json.JSONDecodeError as e:
+        logging.error(f"JSON parsing error: {str(e)}")
+        return [{"error": f"Invalid JSON format from LLM: {str(e)}"}]
+ 
+def iter_validated_batches(rows, prompts=None):
+    """Send batches of rows to LLM for validation, yielding (batch_index, verdicts) as each completes."""
+    prompts = prompts or load_prompts()
     system_prompt = prompts["system_prompt"]
     user_prompt_template = prompts["user_prompt"]  
  
-    for batch in batch_rows(rows, BATCH_SIZE):
+    for batch_index, batch in enumerate(batch_rows(rows, BATCH_SIZE)):
         # Use the user prompt from backend instead of constructing it manually
-        user_prompt = user_prompt_template.format(data=json.dumps(batch, indent=2))
- 
-        response = run_prompt(system_prompt, user_prompt)
-        try:
-            response = response.strip()
- 
-            # Handle Markdown formatting from LLM like ```json ... ```
-            if response.startswith("```json"):
-                response = response.strip("`").replace("json", "", 1).strip()
-            elif response.startswith("```"):
-                response = response.strip("`").strip()
- 
-            # Ensure it's still a string before proceeding
-            if not isinstance(response, str):
-                logging.error("LLM response is not a valid string.")
-                validated_rows.append({"error": "Invalid LLM response type"})
-                continue
- 
-            if not response.startswith("[") and not response.startswith("{"):
-                logging.error("LLM response is not valid JSON format")
-                validated_rows.append({"error": "Invalid JSON format from LLM"})
-                continue
- 
-            parsed_response = json.loads(response)
- 
-            # Optional: skip if it's [{}] or [{}] * n
-            if isinstance(parsed_response, list) and all(isinstance(item, dict) and not item for item in parsed_response):
-                logging.warning("Skipping empty [{}] response from LLM")
-                continue
-            logging.info(f'ROW BY ROW VALIDATION --> : {parsed_response}')
-            validated_rows.extend(parsed_response)
- 
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON parsing error: {str(e)}")
-            validated_rows.append({"error": f"Invalid JSON format from LLM: {str(e)}"})
+        records = batch.drop(ROW_ID_COLUMN).to_records() if isinstance(batch, RowStore) else batch
+        user_prompt = user_prompt_template.format(data=json.dumps(records, indent=2))
+ 
+        # The span ends before yielding so it does not time the caller's work
+        with span("llm_batch", batch_index=batch_index) as batch_span:
+            batch_span.add("rows", len(records))
+            verdicts = parse_batch_response(run_prompt(system_prompt, user_prompt))
+            batch_span.add("verdicts", len(verdicts or []))
+            batch_span.add("llm_errors", sum(1 for item in verdicts or [] if isinstance(item, dict) and "error" in item))
+        if verdicts is not None:
+            yield batch_index, verdicts
  
+def validate_with_llm(rows):
+    """Send batches of rows to LLM for validation."""
+    validated_rows = []
+    for _, batch_result in iter_validated_batches(rows):
+        validated_rows.extend(batch_result)
     return validated_rows
  
-def validate_taxonomy_with_llm(taxonomy_data):
-    prompts = load_prompts()
+def validate_filtered_rows(blob_name, rows, gold, parquet, prompts, incremental=False):
+    """Validate taxonomy-matched rows into the gold writers and remember each row's verdict.
+
+    In incremental mode rows whose ID and content hash match the filing's
+    previous run reuse that run's verdict; only added or changed rows go to the
+    LLM. Verdicts are written in row order either way. Returns the number of
+    verdicts reused.
+    """
+    def emit(items, batch_id=None):
+        gold.write_many(items)
+        if parquet:
+            parquet.write_many(blob_name, items, batch_id)
+
+    with span("validate_rows", blob=blob_name, incremental=incremental) as rows_span:
+        rows_span.add("rows", len(rows))
+        reused = _validate_rows(blob_name, rows, emit, prompts, incremental)
+        rows_span.add("cache_hits", reused)
+    return reused
+
+def _echoed(value):
+    """Normalise a row value and the LLM's echo of it ("1,000", 1000.0, null/NaN) for comparison."""
+    if value is None:
+        return ""
+    text = str(value).strip()
+    try:
+        number = float(text.replace(",", ""))
+    except ValueError:
+        return text
+    return "" if math.isnan(number) else number
+
+def verdict_matches_row(verdict, row):
+    """True if a verdict echoes the row it is filed under.
+
+    The prompt asks for the original fields back, so the Concept Label must
+    match, as must the row ID and Tag Value whenever the verdict echoes them.
+    """
+    if not isinstance(verdict, dict) or "Concept Label" not in verdict:
+        return False
+    keys = ["Concept Label"] + [key for key in (ROW_ID_COLUMN, "Tag Value") if key in verdict]
+    return all(_echoed(verdict[key]) == _echoed(row.get(key)) for key in keys)
+
+def _validate_rows(blob_name, rows, emit, prompts, incremental):
+    if not isinstance(rows, RowStore) or ROW_ID_COLUMN not in rows.columns:
+        # No row identity to diff on
+        for batch_index, batch_result in iter_validated_batches(rows, prompts):
+            emit(batch_result, batch_index)
+        return 0
+
+    filing = filing_key(blob_name)
+    version = f"{prompt_version(prompts)}/{OPENAI_MODEL}"
+    fingerprints = row_fingerprints(rows)
+    previous = load_row_state(filing, version) if incremental else {}
+
+    row_state = {}
+    reused, changed = [], []
+    for position, (row_id, content_hash) in enumerate(fingerprints):
+        prior = previous.get(row_id) if row_id else None
+        if prior and prior["hash"] == content_hash:
+            reused.append(position)
+            row_state[row_id] = prior
+        else:
+            changed.append(position)
+    if incremental:
+        logging.info(f"{filing}: reusing {len(reused)} verdicts, re-validating {len(changed)} rows")
+
+    pending = iter(reused + [len(fingerprints)])
+    next_reused = next(pending)
+
+    def emit_reused_before(position):
+        # Interleave unchanged rows so the output keeps row order
+        nonlocal next_reused
+        while next_reused < position:
+            emit([row_state[fingerprints[next_reused][0]]["verdict"]])
+            next_reused = next(pending)
+
+    for batch_index, batch_result in iter_validated_batches(rows.take(changed) if reused else rows, prompts):
+        positions = changed[batch_index * BATCH_SIZE:(batch_index + 1) * BATCH_SIZE]
+        # Only verdicts we can attribute to rows (one per row, no errors, each echoing
+        # its own row) are remembered; a reordered batch would otherwise be reused forever
+        if (
+            len(batch_result) == len(positions)
+            and not any("error" in item for item in batch_result if isinstance(item, dict))
+            and all(verdict_matches_row(verdict, rows[position]) for position, verdict in zip(positions, batch_result))
+        ):
+            for position, verdict in zip(positions, batch_result):
+                emit_reused_before(position)
+                emit([verdict], batch_index)
+                row_id, content_hash = fingerprints[position]
+                if row_id:
+                    row_state[row_id] = {"hash": content_hash, "verdict": verdict}
+        else:
+            logging.warning(f"{filing}: batch {batch_index} verdicts could not be matched to their rows; not remembered")
+            emit_reused_before(positions[0])
+            emit(batch_result, batch_index)
+
+    emit_reused_before(len(fingerprints))
+
+    try:
+        save_row_state(filing, version, row_state)
+    except Exception as e:
+        logging.error(f"Failed to save row state for {filing}: {str(e)}")
+    return len(reused)
+
+def validate_taxonomy_with_llm(taxonomy_data, prompts=None):
+    prompts = prompts or load_prompts()
     system_prompt = prompts.get("system_prompt_taxonomy", "")  # Use separate system prompt
     taxonomy_prompt = prompts["taxonomy"]
  
     try:
         # logging.info(f"TAXANOMY DATA:  {taxonomy_data}")
         user_prompt = taxonomy_prompt.format(data=json.dumps(taxonomy_data, indent=2))
-        logging.info(f'HTML --> {user_prompt}')
+        log_payload(llm_log, logging.INFO, "HTML", user_prompt)
 
         response = run_prompt(system_prompt, user_prompt).strip()
-        logging.info(f'TAXANOMY:{response}')
+        log_payload(llm_log, logging.INFO, "TAXANOMY", response)
  
         # Clean LLM formatting
         if response.startswith("```json"):
@@ -242,8 +273,8 @@ def validate_taxonomy_with_llm(taxonomy_data):
         logging.error(f"Taxonomy LLM processing error: {str(e)}")
         return [{"error": f"Taxonomy validation failed: {str(e)}"}]
  
-def validate_periods_with_llm(unique_periods, input_dates):
-    prompts = load_prompts()
+def validate_periods_with_llm(unique_periods, input_dates, prompts=None):
+    prompts = prompts or load_prompts()
     system_prompt = prompts.get("system_prompt_period_validation", "")
     user_prompt_template = prompts.get("user_prompt_period_validation", "")
  
@@ -254,7 +285,7 @@ def validate_periods_with_llm(unique_periods, input_dates):
         )
  
         response = run_prompt(system_prompt, user_prompt).strip()
-        logging.info(f'PERIOD VALIDATION LLM RESPONSE: {response}')
+        log_payload(llm_log, logging.INFO, "PERIOD VALIDATION LLM RESPONSE", response)
  
         # Clean LLM formatting
         if response.startswith("```json"):
@@ -272,34 +303,39 @@ def validate_periods_with_llm(unique_periods, input_dates):
         logging.error(f"Period validation LLM processing error: {str(e)}")
         return [{"error": f"Period validation failed: {str(e)}"}]
 
-def concept_label_filter(excel_rows, matched_taxonomy_blob_name):
-    """Filter excel rows based on concept label match with taxonomy file."""
-    try:
-        taxonomy_bytes = get_blob_content("taxanomy", matched_taxonomy_blob_name)
-        xls = pd.ExcelFile(io.BytesIO(taxonomy_bytes))
-
-        if "Presentation" not in xls.sheet_names:
-            logging.warning(f"'Presentation' sheet not found in {matched_taxonomy_blob_name}")
-            return excel_rows, []
-
-        presentation_df = pd.read_excel(xls, sheet_name="Presentation")
-        if "Label" not in presentation_df.columns:
-            logging.warning(f"'Label' column not found in Presentation sheet of {matched_taxonomy_blob_name}")
-            return excel_rows, []
-
-        labels_set = set(presentation_df["Label"].dropna().astype(str).str.strip())
+def concept_label_filter(excel_rows, matched_taxonomy_blob_name, context=None):
+    """Filter excel rows based on concept label match with taxonomy file.
 
-        matched_rows = []
-        unmatched_rows = []
-
-        for row in excel_rows:
-            concept = str(row.get("Concept Label", "")).strip()
-            # logging.info(f"Checking CONCEPT LABEL FROM SILVER '{concept}'")
-
-            if concept in labels_set:
-                matched_rows.append(row)
+    A row matches when its concept resolves in the taxonomy's presentation
+    index (any label variant, or the concept name) and its dimensions use
+    members the taxonomy presents under that axis. Returns matched rows,
+    unmatched rows and one flag reason per unmatched row.
+    """
+    if isinstance(excel_rows, RowStore):
+        excel_rows_for_llm = excel_rows.drop(CONCEPT_NAME_COLUMN)
+    else:
+        excel_rows_for_llm = excel_rows
+    try:
+        index = get_taxonomy_index(context.taxonomy_registry if context else None, matched_taxonomy_blob_name)
+        if index is None:
+            return excel_rows_for_llm, [], []
+
+        if not isinstance(excel_rows, RowStore):
+            excel_rows = RowStore.from_records(excel_rows)
+
+        # Resolve once per row and split by position, without copying rows
+        reasons = []
+        for label, name, dimensions in zip(excel_rows.column("Concept Label", ""),
+                                           excel_rows.column(CONCEPT_NAME_COLUMN),
+                                           excel_rows.column("Dimensions")):
+            if not index.resolves(str(label).strip(), name if isinstance(name, str) else None):
+                reasons.append("Concept Label not found in matched taxonomy file")
             else:
-                unmatched_rows.append(row)
+                reasons.append(index.dimension_problem(dimensions if isinstance(dimensions, str) else None))
+        excel_rows = excel_rows.drop(CONCEPT_NAME_COLUMN)
+        matched_rows = excel_rows.take([i for i, reason in enumerate(reasons) if reason is None])
+        unmatched_rows = excel_rows.take([i for i, reason in enumerate(reasons) if reason is not None])
+        unmatched_reasons = [reason for reason in reasons if reason is not None]
 
 
         logging.info(f"✅ {len(matched_rows)} rows matched from {matched_taxonomy_blob_name}")
@@ -308,11 +344,11 @@ def concept_label_filter(excel_rows, matched_taxonomy_blob_name):
         logging.warning(f"⚠️ {len(unmatched_rows)} rows did not match in Presentation sheet from {matched_taxonomy_blob_name}")
         # logging.warning(f"⚠️ {unmatched_rows} : UNMATCHED LABEL")
 
-        return matched_rows, unmatched_rows
+        return matched_rows, unmatched_rows, unmatched_reasons
 
     except Exception as e:
         logging.error(f"Failed concept_label_filter for {matched_taxonomy_blob_name}: {str(e)}")
-        return excel_rows, []
+        return excel_rows_for_llm, [], []
     
 def normalize_taxonomy_name(taxonomy_name: str) -> Tuple[str, str]:
     taxonomy_name = taxonomy_name.lower()
@@ -335,33 +371,42 @@ def normalize_taxonomy_name(taxonomy_name: str) -> Tuple[str, str]:
 
     return taxonomy_type, jurisdiction
 
-def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
-    logging.info('Python HTTP trigger function processed a request.')
+class ValidationContext:
+    """Setup shared by every filing validated in one request: the taxonomy registry and prompts."""
 
-    # 🔍 List all taxonomy files in taxonomy container
-    taxonomy_blobs = list_blobs("taxanomy")
-    taxonomy_blobs_list = list(taxonomy_blobs)  # convert iterable to list for reuse
-    logging.info("📁 Listing blobs in 'taxanomy' container:")
-    for blob in taxonomy_blobs_list:
-        logging.info(f"🗂️ {blob.name}")
- 
-    req_body = req.get_json()
-    selected_blobs = req_body.get("blobs", None)
-    input_dates = req_body.get("selectedDates", [])
+    def __init__(self, taxonomy_registry, prompts):
+        self.taxonomy_registry = taxonomy_registry
+        self.prompts = prompts
 
-    if not selected_blobs:
-        return func.HttpResponse(
-            json.dumps({"error": "No blobs provided."}),
-            status_code=400,
-            mimetype="application/json"
-        )
- 
+def load_validation_context():
+    # Cached in-process; rebuilt by pipeline_taxonomyUpdated instead of listing the container per request
+    with span("taxonomy_registry") as registry_span:
+        taxonomy_registry = get_registry()
+        registry_span.add("taxonomies", len(taxonomy_registry.taxonomies))
+
+    # Loaded once: row validation, Parquet output and row state all need the same prompt version
+    return ValidationContext(taxonomy_registry, load_prompts())
+
+def validate_filing(selected_blobs, input_dates, context, incremental=False):
+    """Validate one filing's blobs into its own gold output and index entry; returns the run summary."""
     errors = []
-    validated_data = []
     taxonomy_data_to_validate = []
+
+    # Use first blob name for output naming; verdicts are streamed into it as they complete
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S")
+    output_name = gold_output_name(selected_blobs[0]["name"], timestamp)
+    gold = GoldOutputWriter(output_name)
+
+    prompts = context.prompts
+    reused_verdicts = 0
+
+    # Optional typed copy of the row verdicts for analytics
+    parquet = open_gold_parquet_writer(
+        gold_output_name(selected_blobs[0]["name"], timestamp, "parquet"), OPENAI_MODEL, prompt_version(prompts)
+    )
  
     with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = [executor.submit(process_blob, blob) for blob in selected_blobs]
+        futures = [executor.submit(propagate(process_blob), blob) for blob in selected_blobs]
 
         blob_results = []
         all_periods = []
@@ -386,7 +431,7 @@ def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
 
         # first: validate taxonomy first
         # logging.warning(f"Taxonomy Name Extracted: {next((entry['SWL'] for entry in taxonomy_data_to_validate if entry.get('Filer Name') == 'Taxonomy Name'), None)}")
-        logging.warning(f"Taxonomy Data to Validate: {taxonomy_data_to_validate}")
+        log_payload(pipeline_log, logging.INFO, "Taxonomy Data to Validate", taxonomy_data_to_validate)
         
 # extract taxonomy name dynamically regardless of structure
         taxonomy_name = None
@@ -398,17 +443,18 @@ def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
 
         logging.info(f"📘 Taxonomy Name Extracted: {taxonomy_name}")
 
-        logging.info(f"HTML DATA ----> {taxonomy_data_to_validate}")
-
         if taxonomy_data_to_validate:
-            taxonomy_result = validate_taxonomy_with_llm(taxonomy_data_to_validate)
-            validated_data.append({"taxonomy_validation": taxonomy_result})
+            with span("taxonomy_validation"):
+                taxonomy_result = validate_taxonomy_with_llm(taxonomy_data_to_validate, prompts)
+            gold.write({"taxonomy_validation": taxonomy_result})
         else:
             logging.warning("No taxonomy data found across all blobs.")
         # second : validate the dates
         if input_dates:
-            period_validation_result = validate_periods_with_llm(all_periods, input_dates)
-            validated_data.append({"period_validation": period_validation_result})
+            with span("period_validation") as period_span:
+                period_validation_result = validate_periods_with_llm(all_periods, input_dates, prompts)
+                period_span.add("periods", len(all_periods))
+            gold.write({"period_validation": period_validation_result})
         else:
             logging.warning("No input dates provided for period validation.")
  
@@ -418,33 +464,19 @@ def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
         #     if res["excel_rows"]:
         #         validated_data.extend(validate_with_llm(res["excel_rows"]))
 
-        # Dynamically match taxonomy_name to available files in taxanomy container
+        # Look taxonomy_name up in the taxonomy registry
 
         matched_taxonomy_file = None
 
-        if taxonomy_name:
-            taxonomy_type, jurisdiction = normalize_taxonomy_name(taxonomy_name)
-            logging.info(f"🔍 Normalized taxonomy_type: {taxonomy_type}, jurisdiction: {jurisdiction}")
-
-            def is_valid_candidate(file):
-                fname = file.name.lower()
-                if jurisdiction.lower() in ["irish", "ireland"]:
-                    return "ireland-frs-2023" in fname
-                elif jurisdiction.lower() in ["uk", "frc", "united kingdom"]:
-                    return "frc-2023" in fname
-                return False
-
-            valid_candidates = [b for b in taxonomy_blobs_list if is_valid_candidate(b)]
-            best_score = 0
-
-            for blob in valid_candidates:
-                filename = blob.name.lower()
-                score = 5 if taxonomy_type in filename else 0
-                score += 5 - min(Levenshtein.distance(taxonomy_type, filename), 5)  # Fuzzy match on taxonomy_type
-
-                if score > best_score:
-                    best_score = score
-                    matched_taxonomy_file = blob.name
+        with span("taxonomy_match"):
+            if taxonomy_name:
+                taxonomy_type, jurisdiction = normalize_taxonomy_name(taxonomy_name)
+                # The taxonomy name's version year, else the filing's own reporting year
+                year = taxonomy_year(taxonomy_name) or filing_period_year(
+                    input_dates, taxonomy_data_to_validate, all_periods
+                )
+                logging.info(f"🔍 Normalized taxonomy_type: {taxonomy_type}, jurisdiction: {jurisdiction}, year: {year}")
+                matched_taxonomy_file = context.taxonomy_registry.resolve(taxonomy_type, jurisdiction, year)
 
 
         logging.warning(f"DHOOM MACHALE: {matched_taxonomy_file}")
@@ -455,19 +487,30 @@ def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
                 # matched_file = "FRC-2023-v1.0.1-FRS-101.xlsx"
                 matched_file = matched_taxonomy_file
                 if matched_file:
-                    filtered_rows, unmatched_rows = concept_label_filter(res["excel_rows"], matched_file)
+                    with span("label_filter", blob=res["blob_name"]) as filter_span:
+                        filtered_rows, unmatched_rows, unmatched_reasons = concept_label_filter(
+                            res["excel_rows"], matched_file, context
+                        )
+                        filter_span.add("rows", len(res["excel_rows"]))
+                        filter_span.add("matched_rows", len(filtered_rows))
+                        filter_span.add("unmatched_rows", len(unmatched_rows))
                     # logging.info(f"MATCHED TAXANOMY FILE -----> {matched_taxonomy_file}")
                     logging.info(f"LLM KO MATCHED CONCEPT LABELS BHEJRE --> {len(filtered_rows)}")
-                    validated_data.extend(validate_with_llm(filtered_rows))
+                    reused_verdicts += validate_filtered_rows(
+                        res["blob_name"], filtered_rows, gold, parquet, prompts, incremental
+                    )
 
                     if unmatched_rows:
                         # logging.warning(f"⚠️ {len(unmatched_rows)} unmatched Concept Labels in {res['blob_name']}")
                                         # Add unmatched concept labels with validation message
-                        for row in unmatched_rows:
-                            validated_data.append({
-                                "Concept Label": row.get("Concept Label"),
-                                "validation_result": [{ "status": "FLAGGED FOR REVIEW","reason": "Concept Label not found in matched taxonomy file"}]
-                            })
+                        for concept_label, reason in zip(unmatched_rows.column("Concept Label"), unmatched_reasons):
+                            flagged = {
+                                "Concept Label": concept_label,
+                                "validation_result": [{ "status": "FLAGGED FOR REVIEW","reason": reason}]
+                            }
+                            gold.write(flagged)
+                            if parquet:
+                                parquet.write(res["blob_name"], flagged)
 
                 else:
                     logging.warning(f"❌ No matched taxonomy file found for {res['blob_name']}. Sending all rows to LLM.")
@@ -475,43 +518,78 @@ def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
 
  
  
-    # Validate JSON
+    # Timings up to this point travel with the output
+    summary = run_summary()
+    if summary:
+        gold.write({"run_telemetry": summary})
+
+    # Commit the streamed blocks; nothing is visible in gold until this succeeds
+    with span("output_write") as write_span:
+        gold.close()
+        if parquet:
+            parquet.close()
+        write_span.add("verdicts", gold.count)
+
+    # Index the run so results can be found without listing gold; the output itself is already safe
     try:
-        json.dumps(validated_data)
-    except json.JSONDecodeError as e:
-        logging.error(f"Invalid JSON from LLM: {str(e)}")
+        with span("index_update"):
+            record_run(build_run_entry(
+                run_filing_key([b["name"] for b in selected_blobs]),
+                [b["name"] for b in selected_blobs],
+                output_name,
+                gold.status_counts,
+                taxonomy_file=matched_taxonomy_file,
+                taxonomy_name=taxonomy_name,
+                parquet_file=parquet.output_name if parquet else None,
+                errors=errors
+            ))
+    except Exception as e:
+        logging.error(f"Failed to update gold index for {output_name}: {str(e)}")
+
+    summary = run_summary()
+    if summary:
+        log_payload(pipeline_log, logging.INFO, f"Run telemetry for {output_name}", summary, sample_rate=1)
+ 
+    return {
+        "filing": run_filing_key([b["name"] for b in selected_blobs]),
+        "processedFiles": [b["name"] for b in selected_blobs],
+        "errors": errors,
+        "outputFile": output_name,
+        "parquetFile": parquet.output_name if parquet else None,
+        "reusedVerdicts": reused_verdicts,
+        "telemetry": summary,
+        # "validated_data": validated_data,
+        "status": "completed" if not errors else "completed_with_errors"
+    }
+
+def _main_logic(req: func.HttpRequest) -> func.HttpResponse:
+    logging.info('Python HTTP trigger function processed a request.')
+
+    req_body = req.get_json()
+    selected_blobs = req_body.get("blobs", None)
+    input_dates = req_body.get("selectedDates", [])
+    # Only send rows that changed since the filing's previous run to the LLM
+    incremental = bool(req_body.get("incremental", False))
+
+    if not selected_blobs:
         return func.HttpResponse(
-            json.dumps({"error": "Invalid JSON format from LLM"}),
-            status_code=500,
+            json.dumps({"error": "No blobs provided."}),
+            status_code=400,
             mimetype="application/json"
         )
- 
-    # Save to blob
-    # output_name = "validated-output.json"
-
-# Use first blob name for output naming
-    first_blob_name = selected_blobs[0]["name"]
-    base_filename = os.path.splitext(os.path.basename(first_blob_name))[0]
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S")
-    output_name = f"{base_filename}-validated-output-{timestamp}.json"
 
-    write_to_blob("gold", output_name, json.dumps(validated_data, indent=2).encode('utf-8'))
- 
+    result = validate_filing(selected_blobs, input_dates, load_validation_context(), incremental)
     return func.HttpResponse(
-        json.dumps({
-            "processedFiles": [b["name"] for b in selected_blobs],
-            "errors": errors,
-            "outputFile": output_name,
-            # "validated_data": validated_data,
-            "status": "completed" if not errors else "completed_with_errors"
-        }),
+        json.dumps(result),
         status_code=200,
         mimetype="application/json"
     )
 
+
 def main(req: func.HttpRequest) -> func.HttpResponse:
     try:
-        return _main_logic(req)
+        with start_run():
+            return _main_logic(req)
     except Exception as e:
         logging.error(f"Fatal error in main: {str(e)}")
         return func.HttpResponse(
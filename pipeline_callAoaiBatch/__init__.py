@@ -0,0 +1,113 @@
+import os
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import azure.functions as func
+from pipeline_callAoai import load_validation_context, validate_filing
+from utils.filings import group_blobs_by_filing, run_filing_key
+from utils.telemetry import start_run, run_summary, propagate
+
+# Filings validated at once; each one still downloads and parses its own blobs in parallel
+BATCH_FILING_CONCURRENCY = int(os.getenv("BATCH_FILING_CONCURRENCY", "4"))
+# Keeps a request inside the HTTP timeout; a scheduled bulk review sends several batches
+BATCH_MAX_FILINGS = int(os.getenv("BATCH_MAX_FILINGS", "100"))
+
+
+def _is_blob(blob):
+    return isinstance(blob, dict) and isinstance(blob.get("name"), str) and blob["name"].strip() != ""
+
+
+def build_filings(req_body):
+    """Turn the request into [{"blobs", "selectedDates"}], one entry per filing.
+
+    Either "filings" lists each filing's blobs and dates explicitly, or "blobs"
+    is grouped by filing key and every group uses the shared "selectedDates".
+    Raises ValueError for a malformed body, including blobs that are not
+    {"name", "container"} objects.
+    """
+    if not isinstance(req_body, dict):
+        raise ValueError("Request body must be a JSON object.")
+    if req_body.get("filings"):
+        if not isinstance(req_body["filings"], list) or not all(isinstance(f, dict) for f in req_body["filings"]):
+            raise ValueError("\"filings\" must be a list of objects.")
+        filings = [
+            {"blobs": filing.get("blobs") or [], "selectedDates": filing.get("selectedDates", req_body.get("selectedDates", []))}
+            for filing in req_body["filings"]
+        ]
+    else:
+        blobs = req_body.get("blobs") or []
+        if not isinstance(blobs, list) or not all(_is_blob(blob) for blob in blobs):
+            raise ValueError("Every blob must be an object with a non-empty \"name\".")
+        filings = [
+            {"blobs": group, "selectedDates": req_body.get("selectedDates", [])}
+            for group in group_blobs_by_filing(blobs).values()
+        ]
+    if not filings or any(not filing["blobs"] for filing in filings):
+        raise ValueError("Every filing needs at least one blob.")
+    if any(not isinstance(filing["blobs"], list) or not all(_is_blob(blob) for blob in filing["blobs"])
+           for filing in filings):
+        raise ValueError("Every blob must be an object with a non-empty \"name\".")
+    if len(filings) > BATCH_MAX_FILINGS:
+        raise ValueError(f"At most {BATCH_MAX_FILINGS} filings per batch; got {len(filings)}.")
+    return filings
+
+
+def validate_batch_filing(filing, context, incremental):
+    """Validate one filing with its own telemetry; a failure is reported for that filing only."""
+    with start_run():
+        try:
+            return validate_filing(filing["blobs"], filing["selectedDates"], context, incremental)
+        except Exception as e:
+            names = [blob.get("name") if isinstance(blob, dict) else None for blob in filing["blobs"]]
+            logging.error(f"Batch validation failed for {names}: {str(e)}")
+            return {
+                "filing": run_filing_key([name for name in names if name] or ["unknown"]),
+                "processedFiles": names,
+                "errors": [str(e)],
+                "outputFile": None,
+                "status": "failed",
+            }
+
+
+def main(req: func.HttpRequest) -> func.HttpResponse:
+    """Validate many filings in one request.
+
+    Each filing runs as pipeline_callAoai would, in parallel and into its own
+    gold output, while the taxonomy listing, prompts, taxonomy label sets and
+    OpenAI client are set up once and shared. Body: {"filings": [{"blobs",
+    "selectedDates"}]} or {"blobs", "selectedDates"} grouped by filing, plus
+    an optional "incremental".
+    """
+    logging.info("Python HTTP trigger function processed a request for callAoaiBatch.")
+    try:
+        req_body = req.get_json()
+        try:
+            filings = build_filings(req_body)
+        except ValueError as e:
+            return func.HttpResponse(json.dumps({"error": str(e)}), status_code=400, mimetype="application/json")
+        incremental = bool(req_body.get("incremental", False))
+
+        with start_run():
+            context = load_validation_context()
+            with ThreadPoolExecutor(max_workers=min(BATCH_FILING_CONCURRENCY, len(filings))) as executor:
+                results = list(executor.map(
+                    propagate(validate_batch_filing), filings, [context] * len(filings), [incremental] * len(filings)
+                ))
+            setup_telemetry = run_summary()
+
+        statuses = Counter(result["status"] for result in results)
+        logging.info(f"Batch of {len(results)} filings finished: {dict(statuses)}")
+        return func.HttpResponse(
+            json.dumps({
+                "filings": results,
+                "statusCounts": dict(statuses),
+                "telemetry": setup_telemetry,
+                "status": "completed" if set(statuses) == {"completed"} else "completed_with_errors",
+            }),
+            status_code=200,
+            mimetype="application/json"
+        )
+    except Exception as e:
+        logging.error(f"Fatal error in callAoaiBatch: {str(e)}")
+        return func.HttpResponse(json.dumps({"error": str(e)}), status_code=500, mimetype="application/json")
@@ -2,47 +2,303 @@ import azure.functions as func
 import logging
 from docx import Document
 import fitz
-from utils.blob_functions import list_blobs, get_blob_content, write_to_blob
+from utils.blob_functions import list_blobs, get_blob_content, write_to_blob, write_jsonl_to_blob, get_blob_etag, get_blob_content_key, get_json_blob, MANIFEST_CONTAINER
 from utils import get_month_date
 import io
 import os
 import json
 import base64
+from datetime import datetime, timezone
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Libraries used in the future Document Processing client code
 from azure.identity import DefaultAzureCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeResult, AnalyzeDocumentRequest
+from azure.storage.blob import BlobSasPermissions
+from utils.sas import generate_blob_sas_url
+from utils.pdf_text import extract_pdf_pages
+from utils.process_pool import run_in_process
 
 # Variables used by Document Processing client code
 endpoint =os.getenv("AIMULTISERVICES_ENDPOINT") # Add the AI Services Endpoint value from Azure Function App settings
+# Upper bound on concurrent downloads/submissions/polls against Document Intelligence
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+# "url" lets Document Intelligence fetch the blob through a read-only SAS so the
+# document never passes through the worker; "bytes" uploads it inline as before.
+DOCUMENT_SUBMISSION_MODE = os.getenv("DOCUMENT_SUBMISSION_MODE", "url").lower()
+DOCUMENT_SAS_MINUTES = int(os.getenv("DOCUMENT_SAS_MINUTES", "30"))
+# Set to "fake" to analyse documents locally with FakeDocumentAnalyzer
+DOCUMENT_ANALYZER = os.getenv("DOCUMENT_ANALYZER", "azure").lower()
+EXTRACTION_MODEL_ID = "prebuilt-read"
+# Bump whenever the silver output changes so cached extractions are redone
+EXTRACTION_CACHE_VERSION = "2"
+# Born-digital PDFs are read locally with PyMuPDF; only pages whose text layer
+# fails the quality check are sent to Document Intelligence.
+PDF_LOCAL_EXTRACTION = os.getenv("PDF_LOCAL_EXTRACTION", "true").lower() == "true"
+# "txt" writes silver/<name>.txt as before; "jsonl" writes silver/<name>.jsonl
+# with one record per page and paragraph, including role and bounding regions.
+SILVER_OUTPUT_FORMAT = os.getenv("SILVER_OUTPUT_FORMAT", "txt").lower()
+SILVER_OUTPUT_FORMATS = ("txt", "jsonl")
 
-def extract_text_from_blob(blob_name):
-    try:
-        credential = DefaultAzureCredential()                
-        client = DocumentIntelligenceClient(
-            endpoint=endpoint, credential=credential
+class FakeDocumentAnalyzer:
+    """Local stand-in for DocumentIntelligenceClient used in tests and benchmarks.
+
+    It mirrors the begin_analyze_document()/poller.result() shape: inline
+    documents are decoded as text with one paragraph per non-empty line, and URL
+    submissions return a single paragraph naming the blob.
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def begin_analyze_document(self, model_id, body, **kwargs):
+        self.requests.append((model_id, body, kwargs))
+        if body.get("urlSource"):
+            blob_path = body["urlSource"].split("?", 1)[0]
+            lines = [f"Fake analysis of {blob_path}"]
+        else:
+            text = base64.b64decode(body.get("base64Source") or b"").decode("utf-8", errors="ignore")
+            lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+        result = SimpleNamespace(
+            model_id=model_id,
+            paragraphs=[SimpleNamespace(content=line, role=None, bounding_regions=[]) for line in lines]
         )
-        
+        return SimpleNamespace(result=lambda: result)
+
+_document_client = None
+_document_client_lock = threading.Lock()
+
+def get_document_client():
+    """Return the DocumentIntelligenceClient shared by every extraction in this worker."""
+    global _document_client
+    with _document_client_lock:
+        if _document_client is None:
+            if DOCUMENT_ANALYZER == "fake":
+                _document_client = FakeDocumentAnalyzer()
+            else:
+                credential = DefaultAzureCredential()
+                _document_client = DocumentIntelligenceClient(
+                    endpoint=endpoint, credential=credential
+                )
+        return _document_client
+
+def build_analyze_request(blob_name, content=None):
+    """Build the analyze request for a bronze blob.
+
+    In "url" mode only a short-lived read-only SAS URL is sent. If signing fails
+    the document is sent inline instead, reusing content if it was already
+    downloaded.
+    """
+    if DOCUMENT_SUBMISSION_MODE == "url":
+        try:
+            url, _ = generate_blob_sas_url(
+                "bronze", blob_name, BlobSasPermissions(read=True), expiry_minutes=DOCUMENT_SAS_MINUTES
+            )
+            return AnalyzeDocumentRequest(url_source=url)
+        except Exception as e:
+            logging.warning(f"Could not sign {blob_name} for url_source, sending bytes instead: {e}")
+
+    if content is None:
         content = get_blob_content("bronze", blob_name)
-        
-        base64_content = base64.b64encode(content).decode('utf-8')    
-
-        poller = client.begin_analyze_document(
-            # AnalyzeDocumentRequest Class: https://learn.microsoft.com/en-us/python/api/azure-ai-documentintelligence/azure.ai.documentintelligence.models.analyzedocumentrequest?view=azure-python
-            "prebuilt-read", AnalyzeDocumentRequest(bytes_source=base64_content
-        ))
-        result: AnalyzeResult = poller.result()
-        
-        if result.paragraphs:    
-            paragraphs = "\n".join([paragraph.content for paragraph in result.paragraphs])            
-        
-        return paragraphs
-        
+
+    base64_content = base64.b64encode(content).decode('utf-8')
+
+    return AnalyzeDocumentRequest(bytes_source=base64_content)
+
+def begin_extraction(blob_name, pages=None, content=None):
+    """Submit a bronze blob (optionally only some pages) for analysis, returning the poller."""
+    kwargs = {"pages": pages} if pages else {}
+    return get_document_client().begin_analyze_document(
+        # AnalyzeDocumentRequest Class: https://learn.microsoft.com/en-us/python/api/azure-ai-documentintelligence/azure.ai.documentintelligence.models.analyzedocumentrequest?view=azure-python
+        EXTRACTION_MODEL_ID, build_analyze_request(blob_name, content), **kwargs
+    )
+
+def format_page_ranges(page_numbers):
+    """Turn [1, 2, 3, 7] into the "1-3,7" syntax accepted by the pages option."""
+    ranges = []
+    for number in sorted(page_numbers):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def local_page_result(page):
+    """Shape a locally extracted page like Document Intelligence output."""
+    paragraphs = []
+    for block in page["blocks"]:
+        x0, y0, x1, y1 = block["bbox"]
+        region = SimpleNamespace(page_number=page["page"], polygon=[x0, y0, x1, y0, x1, y1, x0, y1])
+        paragraphs.append(SimpleNamespace(content=block["content"], role=None, bounding_regions=[region]))
+    page_info = SimpleNamespace(page_number=page["page"], width=page["width"], height=page["height"], unit="inch", angle=0)
+    return page_info, paragraphs
+
+def extract_pdf_tiered(blob_name):
+    """Extract a PDF locally, sending only low-quality pages to Document Intelligence.
+
+    If PyMuPDF cannot read the PDF, the whole document goes to Document
+    Intelligence instead.
+    """
+    content = get_blob_content("bronze", blob_name)
+    try:
+        local_pages = run_in_process(extract_pdf_pages, content)
+    except Exception as e:
+        logging.warning(f"{blob_name}: local PDF extraction failed, sending the whole document to Document Intelligence: {e}")
+        return collect_result(begin_extraction(blob_name, content=content))
+    remote_pages = [page["page"] for page in local_pages if not page["good"]]
+
+    remote_paragraphs, remote_page_info = {}, {}
+    if remote_pages:
+        logging.info(f"{blob_name}: sending {len(remote_pages)} of {len(local_pages)} pages to Document Intelligence")
+        remote = collect_result(begin_extraction(blob_name, pages=format_page_ranges(remote_pages), content=content))
+        for paragraph in remote.paragraphs or []:
+            remote_paragraphs.setdefault(paragraph_page(paragraph), []).append(paragraph)
+        for page in getattr(remote, "pages", None) or []:
+            remote_page_info[page.page_number] = page
+    else:
+        logging.info(f"{blob_name}: all {len(local_pages)} pages extracted locally")
+
+    pages, paragraphs = [], []
+    for page in local_pages:
+        if page["good"]:
+            page_info, page_paragraphs = local_page_result(page)
+        else:
+            page_info = remote_page_info.get(page["page"]) or local_page_result(page)[0]
+            page_paragraphs = remote_paragraphs.pop(page["page"], [])
+        pages.append(page_info)
+        paragraphs.extend(page_paragraphs)
+    # Anything the service could not place on a page goes last
+    for leftover in remote_paragraphs.values():
+        paragraphs.extend(leftover)
+
+    return SimpleNamespace(model_id=EXTRACTION_MODEL_ID, pages=pages, paragraphs=paragraphs)
+
+def collect_result(poller):
+    """Wait for an analysis to finish and return the AnalyzeResult."""
+    result: AnalyzeResult = poller.result()
+    return result
+
+def result_to_text(result):
+    """Join the paragraphs of an AnalyzeResult, or None if there are none."""
+    if result and result.paragraphs:
+        return "\n".join([paragraph.content for paragraph in result.paragraphs])
+
+    return None
+
+def paragraph_page(paragraph):
+    regions = getattr(paragraph, "bounding_regions", None) or []
+    return regions[0].page_number if regions else None
+
+def iter_extraction_records(blob_name, result):
+    """Yield JSON Lines records for an AnalyzeResult, grouped by page.
+
+    Each page record is followed by the paragraphs that start on it, so readers
+    can stream the file or stop at the page they need. Paragraphs without a
+    bounding region come last with page set to None.
+    """
+    paragraphs_by_page = {}
+    for index, paragraph in enumerate(result.paragraphs or []):
+        paragraphs_by_page.setdefault(paragraph_page(paragraph), []).append((index, paragraph))
+
+    pages = {page.page_number: page for page in (getattr(result, "pages", None) or [])}
+    page_numbers = sorted(set(pages) | {n for n in paragraphs_by_page if n is not None})
+
+    for page_number in page_numbers + ([None] if None in paragraphs_by_page else []):
+        page = pages.get(page_number)
+        if page_number is not None:
+            yield {
+                "type": "page",
+                "source": blob_name,
+                "page": page_number,
+                "width": getattr(page, "width", None),
+                "height": getattr(page, "height", None),
+                "unit": getattr(page, "unit", None),
+                "angle": getattr(page, "angle", None),
+                "paragraphCount": len(paragraphs_by_page.get(page_number, []))
+            }
+
+        for index, paragraph in paragraphs_by_page.get(page_number, []):
+            yield {
+                "type": "paragraph",
+                "source": blob_name,
+                "page": page_number,
+                "index": index,
+                "role": getattr(paragraph, "role", None),
+                "content": paragraph.content,
+                "boundingRegions": [
+                    {"page": region.page_number, "polygon": list(region.polygon or [])}
+                    for region in (getattr(paragraph, "bounding_regions", None) or [])
+                ]
+            }
+
+def silver_output_name(blob_name, output_format):
+    sourcefile = os.path.splitext(os.path.basename(blob_name))[0]
+    return f"{sourcefile}.{output_format}"
+
+def write_silver_output(blob_name, result, output_format):
+    """Write an extraction to silver; returns the blob name, or None if it was empty."""
+    output_blob = silver_output_name(blob_name, output_format)
+
+    if output_format == "jsonl":
+        if not (result and result.paragraphs):
+            return None
+        write_jsonl_to_blob("silver", output_blob, iter_extraction_records(blob_name, result))
+        return output_blob
+
+    text = result_to_text(result)
+    if not text:
+        return None
+    write_to_blob(f"silver", output_blob, text)
+    return output_blob
+
+def extract_text_from_blob(blob_name):
+    try:
+        return result_to_text(collect_result(begin_extraction(blob_name)))
+
     except Exception as e:
         logging.error(f"Error processing {blob_name}: {e}")
         return None
 
+def extract_results_from_blobs(blob_names):
+    """Analyse many blobs concurrently.
+
+    Every document is submitted before any poller is waited on, so the service
+    analyses them in parallel and the batch takes roughly as long as the
+    slowest document. PDFs go through extract_pdf_tiered instead. Returns
+    {blob_name: AnalyzeResult or None}.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=EXTRACTION_MAX_WORKERS) as executor:
+        submissions, polls = {}, {}
+        for name in blob_names:
+            if PDF_LOCAL_EXTRACTION and name.lower().endswith(".pdf"):
+                # Tiered PDFs finish (or fail) in one step
+                polls[executor.submit(extract_pdf_tiered, name)] = name
+            else:
+                submissions[executor.submit(begin_extraction, name)] = name
+
+        for future in as_completed(submissions):
+            blob_name = submissions[future]
+            try:
+                polls[executor.submit(collect_result, future.result())] = blob_name
+            except Exception as e:
+                logging.error(f"Error processing {blob_name}: {e}")
+                results[blob_name] = None
+
+        for future in as_completed(polls):
+            blob_name = polls[future]
+            try:
+                results[blob_name] = future.result()
+            except Exception as e:
+                logging.error(f"Error processing {blob_name}: {e}")
+                results[blob_name] = None
+
+    return results
+
 # def extract_text_from_docx(blob_name):
 #     try:
 #         # Get the content of the blob
@@ -61,18 +317,59 @@ def extract_text_from_blob(blob_name):
 #         logging.error(f"Error processing {blob_name}: {e}")
 #         return None
 
-# def extract_text_from_pdf(blob_name):
-#     try:
-#         # Get the content of the blob
-#         content = get_blob_content("bronze", blob_name)
-#         # Load the PDF document
-#         doc = fitz.open(stream=content, filetype="pdf")
-#         # Extract text from all pages
-#         text = "\n".join(page.get_text() for page in doc)
-#         return text
-#     except Exception as e:
-#         logging.error(f"Error processing {blob_name}: {e}")
-#         return None
+def extraction_manifest_path(content_key, output_format):
+    return f"extraction/{content_key}.{output_format}.json"
+
+def find_cached_extraction(blob_name, output_format):
+    """Look up a previous extraction of identical content for a bronze blob.
+
+    The content key comes from blob properties (see get_blob_content_key), so
+    the document is only downloaded the first time a blob without a stored
+    hash or Content-MD5 is seen. Returns (content_key, manifest), where manifest
+    is None unless the earlier output was produced in the same format by the
+    current model and cache version and is still the blob that was written.
+    """
+    content_key = get_blob_content_key("bronze", blob_name)
+    manifest = get_json_blob(MANIFEST_CONTAINER, extraction_manifest_path(content_key, output_format))
+
+    if (
+        manifest
+        and manifest.get("modelId") == EXTRACTION_MODEL_ID
+        and manifest.get("cacheVersion") == EXTRACTION_CACHE_VERSION
+        and manifest.get("outputEtag")
+        and get_blob_etag(manifest["outputContainer"], manifest["outputBlob"]) == manifest["outputEtag"]
+    ):
+        return content_key, manifest
+    return content_key, None
+
+def find_cached_extractions(blob_names, output_format):
+    """Run find_cached_extraction concurrently; lookup failures count as misses."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=EXTRACTION_MAX_WORKERS) as executor:
+        futures = {executor.submit(find_cached_extraction, name, output_format): name for name in blob_names}
+        for future in as_completed(futures):
+            blob_name = futures[future]
+            try:
+                results[blob_name] = future.result()
+            except Exception as e:
+                logging.warning(f"Extraction cache lookup failed for {blob_name}: {e}")
+                results[blob_name] = (None, None)
+    return results
+
+def record_extraction(content_key, blob_name, output_container, output_blob, output_format):
+    # The output's etag pins the manifest to this exact output, not whatever later holds its name
+    manifest = {
+        "contentKey": content_key,
+        "sourceBlob": blob_name,
+        "outputContainer": output_container,
+        "outputBlob": output_blob,
+        "outputEtag": get_blob_etag(output_container, output_blob),
+        "format": output_format,
+        "modelId": EXTRACTION_MODEL_ID,
+        "cacheVersion": EXTRACTION_CACHE_VERSION,
+        "extractedAt": datetime.now(timezone.utc).isoformat()
+    }
+    write_to_blob(MANIFEST_CONTAINER, extraction_manifest_path(content_key, output_format), json.dumps(manifest, indent=2))
 
 def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a request.')
@@ -80,8 +377,18 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     req_body = req.get_json()
     # Get the list of blobs sent from the frontend (if any)
     selected_blobs = req_body.get("blobs", None)
+    # Re-run extraction even when identical content was extracted before
+    force = bool(req_body.get("force", False))
+    output_format = str(req_body.get("outputFormat") or SILVER_OUTPUT_FORMAT).lower()
+    if output_format not in SILVER_OUTPUT_FORMATS:
+        return func.HttpResponse(
+            json.dumps({"error": f"Unsupported outputFormat: {output_format}"}),
+            status_code=400,
+            mimetype="application/json"
+        )
     
     processed_files = []
+    cache_hits = []
     errors = []
     
     # Document Intelligence supported suffixes
@@ -89,47 +396,54 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
 
     # Lists blobs in the 'bronze' container
     if selected_blobs:
+        to_extract = []
         for blob in selected_blobs:
             if blob.get("container") != "bronze":
                 logging.info(f"Skipping blob not in bronze container: {blob}")
                 continue
+            blob_name = blob.get("name")
+
+            # Extract text from supported file types using Document Intelligence
+            if blob_name and blob_name.endswith(suffixes):
+                logging.info(f"Processing: {blob_name}")
+                to_extract.append(blob_name)
+            else:
+                logging.info(f"Skipping unsupported file type: {blob_name}")
+                errors.append(f"Unsupported file type: {blob_name}")
+
+        # Skip documents whose exact content has already been extracted
+        cached = {} if force else find_cached_extractions(to_extract, output_format)
+        misses = []
+        for blob_name in to_extract:
+            content_key, manifest = cached.get(blob_name, (None, None))
+            if not manifest:
+                misses.append(blob_name)
+                continue
+            try:
+                output_blob = silver_output_name(blob_name, output_format)
+                if (manifest["outputContainer"], manifest["outputBlob"]) != ("silver", output_blob):
+                    # Same content uploaded under another name: reuse the output
+                    write_to_blob("silver", output_blob, get_blob_content(manifest["outputContainer"], manifest["outputBlob"]))
+                logging.info(f"Extraction cache hit for {blob_name} ({content_key})")
+                cache_hits.append(blob_name)
+                processed_files.append(blob_name)
+            except Exception as e:
+                logging.warning(f"Could not reuse cached extraction for {blob_name}: {e}")
+                misses.append(blob_name)
+
+        results = extract_results_from_blobs(misses)
+
+        for blob_name in misses:
             try:
-                blob_name = blob.get("name")
-
-                # Extract text from supported file types using Document Intelligence
-                if blob_name.endswith(suffixes):
-                    logging.info(f"Processing: {blob_name}")
-                    text = extract_text_from_blob(blob_name)
-                    if text:
-                        sourcefile = os.path.splitext(os.path.basename(blob_name))[0]
-                        write_to_blob(f"silver", f"{sourcefile}.txt", text)
-                        processed_files.append(blob_name)
-                    else:
-                        errors.append(f"Failed to extract text from: {blob_name}")
-
-                # if blob_name.endswith(".docx"):
-                #     logging.info(f"Processing DOCX: {blob_name}")
-                #     text = extract_text_from_docx(blob_name)
-                #     if text:
-                #         sourcefile = os.path.splitext(os.path.basename(blob_name))[0]
-                #         write_to_blob(f"silver", f"{sourcefile}.txt", text)
-                #         processed_files.append(blob_name)
-                #     else:
-                #         errors.append(f"Failed to extract text from DOCX: {blob_name}")
-
-                # elif blob_name.endswith(".pdf"):
-                #     logging.info(f"Processing PDF: {blob_name}")
-                #     text = extract_text_from_pdf(blob_name)
-                #     if text:
-                #         sourcefile = os.path.splitext(os.path.basename(blob_name))[0]
-                #         write_to_blob(f"silver", f"{sourcefile}.txt", text)
-                #         processed_files.append(blob_name)
-                #     else:
-                #         errors.append(f"Failed to extract text from PDF: {blob_name}")
+                output_blob = write_silver_output(blob_name, results.get(blob_name), output_format)
+                if output_blob:
+                    processed_files.append(blob_name)
 
+                    content_key = cached.get(blob_name, (None, None))[0]
+                    if content_key:
+                        record_extraction(content_key, blob_name, "silver", output_blob, output_format)
                 else:
-                    logging.info(f"Skipping unsupported file type: {blob_name}")
-                    errors.append(f"Unsupported file type: {blob_name}")
+                    errors.append(f"Failed to extract text from: {blob_name}")
 
             except Exception as e:
                 error_message = f"Error processing {blob_name}: {e}"
@@ -144,6 +458,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     # Prepare the response payload
     response_data = {
         "processedFiles": processed_files,
+        "cacheHits": cache_hits,
         "errors": errors,
         "status": "started" if not errors else "completed_with_errors"
     }
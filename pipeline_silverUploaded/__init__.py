@@ -0,0 +1,20 @@
+import logging
+import azure.functions as func
+from utils.auto_validation import queue_filing_if_complete
+from utils.blob_events import blob_from_event
+
+SILVER_CONTAINER = "silver"
+
+
+def main(event: func.EventGridEvent):
+    """Queue a filing for validation when an upload to silver completes its workbook/HTML pair.
+
+    Triggered by the storage account's BlobCreated events rather than a polling
+    blob trigger: the blob is never downloaded, and blobs that were already in
+    the container when the subscription was created are not replayed.
+    """
+    blob_name = blob_from_event(event, SILVER_CONTAINER)
+    if not blob_name:
+        return
+    logging.info(f"Blob created: {SILVER_CONTAINER}/{blob_name}")
+    queue_filing_if_complete(SILVER_CONTAINER, blob_name)
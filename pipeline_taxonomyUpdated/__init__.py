@@ -0,0 +1,17 @@
+import logging
+import azure.functions as func
+from utils.blob_events import BLOB_CREATED, BLOB_DELETED, blob_from_event
+from utils.taxonomy_registry import TAXONOMY_CONTAINER, rebuild_registry
+
+
+def main(event: func.EventGridEvent):
+    """Rebuild the taxonomy registry when a taxonomy workbook is added, replaced or deleted.
+
+    Only the storage event is read; the rebuild lists the container and indexes
+    what changed, so the workbook is not downloaded here.
+    """
+    blob_name = blob_from_event(event, TAXONOMY_CONTAINER, (BLOB_CREATED, BLOB_DELETED))
+    if not blob_name:
+        return
+    logging.info(f"Taxonomy changed: {TAXONOMY_CONTAINER}/{blob_name}; rebuilding the registry")
+    rebuild_registry()
@@ -0,0 +1,29 @@
+import os
+import json
+import logging
+import azure.functions as func
+from pipeline_callAoai import load_validation_context, validate_filing
+from utils.auto_validation import mark_validated, should_validate
+from utils.telemetry import start_run
+
+# Re-uploads usually touch a few rows, so reuse unchanged rows' verdicts
+AUTO_VALIDATION_INCREMENTAL = os.getenv("AUTO_VALIDATION_INCREMENTAL", "true").lower() == "true"
+
+
+def main(msg: func.QueueMessage):
+    """Validate a filing queued by pipeline_silverUploaded, unless a newer upload superseded it.
+
+    No reporting dates are selected on this path, so period validation is
+    skipped; the reviewer can rerun pipeline_callAoai with dates. An exception
+    leaves the message to be retried and, after maxDequeueCount, moved to the
+    poison queue.
+    """
+    message = json.loads(msg.get_body().decode("utf-8"))
+    logging.info(f"Queued validation of {message['filing']} (dequeue count {msg.dequeue_count})")
+    if not should_validate(message):
+        return
+
+    with start_run():
+        result = validate_filing(message["blobs"], [], load_validation_context(), AUTO_VALIDATION_INCREMENTAL)
+    mark_validated(message, result)
+    logging.info(f"Automatic validation of {message['filing']} wrote {result['outputFile']} ({result['status']})")
@@ -0,0 +1,266 @@
+"""In-memory stand-ins for the Azure services pipeline_callAoai talks to.
+
+install() must run before anything under utils/ or pipeline_callAoai is
+imported: it registers a fake utils.blob_functions and utils.azure_openai in
+sys.modules so the real modules (which fetch credentials at import) are never
+loaded. Everything else, including pandas/openpyxl parsing and the gold
+writers, is the production code.
+"""
+import json
+import random
+import hashlib
+import sys
+import time
+import types
+import uuid
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from utils.telemetry import record_token_usage
+
+
+class InMemoryBlobStore:
+    """Thread-safe {container: {path: blob}} with etags, mirroring the blob_functions API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._containers = {}
+        self.reads = 0
+        self.writes = 0
+
+    def put(self, container_name, blob_path, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        blob = SimpleNamespace(
+            name=blob_path,
+            data=bytes(data),
+            size=len(data),
+            etag=f'"{uuid.uuid4().hex}"',
+            last_modified=datetime.now(timezone.utc),
+            content_type=content_type,
+        )
+        with self._lock:
+            self._containers.setdefault(container_name, {})[blob_path] = blob
+            self.writes += 1
+        return blob
+
+    def get(self, container_name, blob_path):
+        with self._lock:
+            blob = self._containers.get(container_name, {}).get(blob_path)
+            self.reads += 1
+        if blob is None:
+            raise ResourceNotFoundError(f"{container_name}/{blob_path} not found")
+        return blob
+
+    def list(self, container_name):
+        with self._lock:
+            return sorted(self._containers.get(container_name, {}).values(), key=lambda blob: blob.name)
+
+    def delete_container_contents(self, container_name):
+        with self._lock:
+            self._containers.pop(container_name, None)
+
+    def clear(self):
+        """Drop every container, e.g. between tests sharing one installed store."""
+        with self._lock:
+            self._containers.clear()
+
+    def total_bytes(self, container_name):
+        return sum(blob.size for blob in self.list(container_name))
+
+    def make_module(self, manifest_container="manifests"):
+        """Build a module object with the same public names as utils.blob_functions."""
+        store = self
+        module = types.ModuleType("utils.blob_functions")
+        module.MANIFEST_CONTAINER = manifest_container
+
+        def write_to_blob(container_name, blob_path, data):
+            store.put(container_name, blob_path, data)
+
+        def get_blob_content(container_name, blob_path):
+            return store.get(container_name, blob_path).data
+
+        def list_blobs(container_name, name_starts_with=None):
+            return iter(blob for blob in store.list(container_name) if blob.name.startswith(name_starts_with or ""))
+
+        def delete_all_blobs_in_container(container_name):
+            store.delete_container_contents(container_name)
+
+        def blob_exists(container_name, blob_path):
+            try:
+                store.get(container_name, blob_path)
+                return True
+            except ResourceNotFoundError:
+                return False
+
+        def get_blob_etag(container_name, blob_path):
+            try:
+                return store.get(container_name, blob_path).etag
+            except ResourceNotFoundError:
+                return None
+
+        def delete_blob(container_name, blob_path):
+            with store._lock:
+                if store._containers.get(container_name, {}).pop(blob_path, None) is None:
+                    raise ResourceNotFoundError(f"{container_name}/{blob_path} not found")
+
+        def get_blob_sha256(container_name, blob_path):
+            return hashlib.sha256(store.get(container_name, blob_path).data).hexdigest()
+
+        def get_blob_content_key(container_name, blob_path):
+            return hashlib.sha256(store.get(container_name, blob_path).data).hexdigest()
+
+        def get_json_blob(container_name, blob_path):
+            try:
+                return json.loads(store.get(container_name, blob_path).data)
+            except ResourceNotFoundError:
+                return None
+
+        def get_blob_with_etag(container_name, blob_path):
+            try:
+                blob = store.get(container_name, blob_path)
+            except ResourceNotFoundError:
+                return None, None
+            return blob.data, blob.etag
+
+        def write_blob_if_unchanged(container_name, blob_path, data, etag, content_type=None):
+            with store._lock:
+                current = store._containers.get(container_name, {}).get(blob_path)
+            if etag is None and current is not None:
+                raise ResourceExistsError(f"{container_name}/{blob_path} already exists")
+            if etag is not None and (current is None or current.etag != etag):
+                raise ResourceModifiedError(f"{container_name}/{blob_path} was modified")
+            store.put(container_name, blob_path, data, content_type)
+
+        class BlockBlobWriter:
+            def __init__(self, container_name, blob_path, block_size=4 * 1024 * 1024, content_type=None):
+                self.container_name = container_name
+                self.blob_path = blob_path
+                self.block_size = block_size
+                self.content_type = content_type
+                self.block_ids = []
+                self.bytes_written = 0
+                self._blocks = []
+                self._buffer = bytearray()
+
+            def write(self, data):
+                if isinstance(data, str):
+                    data = data.encode("utf-8")
+                self._buffer.extend(data)
+                self.bytes_written += len(data)
+                if len(self._buffer) >= self.block_size:
+                    self.flush()
+
+            def flush(self):
+                if self._buffer:
+                    self._blocks.append(bytes(self._buffer))
+                    self.block_ids.append(str(len(self.block_ids)))
+                    self._buffer.clear()
+
+            def close(self):
+                self.flush()
+                store.put(self.container_name, self.blob_path, b"".join(self._blocks), self.content_type)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc_value, traceback):
+                if exc_type is None:
+                    self.close()
+
+        def write_jsonl_to_blob(container_name, blob_path, records):
+            count = 0
+            with BlockBlobWriter(container_name, blob_path, content_type="application/x-ndjson") as writer:
+                for record in records:
+                    writer.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+            return count
+
+        for function in (write_to_blob, get_blob_content, list_blobs, delete_all_blobs_in_container, blob_exists,
+                         get_blob_etag, delete_blob, get_blob_sha256, get_blob_content_key, get_json_blob, get_blob_with_etag, write_blob_if_unchanged,
+                         BlockBlobWriter, write_jsonl_to_blob):
+            setattr(module, function.__name__, function)
+        return module
+
+
+class StubOpenAI:
+    """Replacement for utils.azure_openai.run_prompt with latency and failure injection.
+
+    Row-validation prompts get one verdict per input row, drawn from the
+    configured status mix; taxonomy and period prompts get a single MATCHED
+    verdict. Failures either return non-JSON text (what the pipeline handles
+    as a bad LLM response) or raise, like a transport error would.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, failure_mode="malformed",
+                 statuses=(("MATCH", 0.85), ("FLAGGED_FOR_REVIEW", 0.1), ("MISSING_DATA", 0.05)), seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.statuses = [status for status, _ in statuses]
+        self.weights = [weight for _, weight in statuses]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rows = 0
+
+    @staticmethod
+    def _prompt_rows(prompt):
+        """Find the first JSON array of objects embedded in the prompt text."""
+        decoder = json.JSONDecoder()
+        start = prompt.find("[")
+        while start != -1:
+            try:
+                value, _ = decoder.raw_decode(prompt, start)
+                if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                    return value
+            except ValueError:
+                pass
+            start = prompt.find("[", start + 1)
+        return []
+
+    def run_prompt(self, system_prompt, user_prompt):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            if self.failure_mode == "raise":
+                raise RuntimeError("Stub OpenAI failure")
+            return "The service is temporarily unavailable."
+
+        rows = [row for row in self._prompt_rows(user_prompt) if "Concept Label" in row]
+        if not rows:
+            response = json.dumps([{"status": "MATCHED", "reason": "Stub verdict"}])
+        else:
+            with self._lock:
+                self.rows += len(rows)
+                statuses = self._random.choices(self.statuses, self.weights, k=len(rows))
+            response = json.dumps([
+                {**row, "Validation": {"status": status, "reason": "Stub verdict"}}
+                for row, status in zip(rows, statuses)
+            ], default=str)
+        # Roughly four characters per token, as reported by the real client's usage
+        record_token_usage(SimpleNamespace(
+            prompt_tokens=(len(system_prompt) + len(user_prompt)) // 4, completion_tokens=len(response) // 4
+        ))
+        return response
+
+    def make_module(self, model="stub-model"):
+        module = types.ModuleType("utils.azure_openai")
+        module.run_prompt = self.run_prompt
+        module.OPENAI_MODEL = model
+        return module
+
+
+def install(store, llm):
+    """Register the fakes in sys.modules; must be called before importing the pipeline."""
+    sys.modules["utils.blob_functions"] = store.make_module()
+    sys.modules["utils.azure_openai"] = llm.make_module()
@@ -0,0 +1,217 @@
+"""Offline benchmark for pipeline_callAoai.
+
+Runs the real parsing, taxonomy filtering, row validation and gold writing
+code against an in-memory blob store and a stub OpenAI (see bench_fakes.py),
+using fixtures built from the workbooks and HTML in data/. For each workbook
+size it reports per-stage wall time, rows/second and peak traced memory.
+
+    python scripts/benchmark_callAoai.py --rows 250,2500,10000 --latency 0.02
+
+Run it from the repository root with the function app's requirements
+installed. Nothing talks to Azure.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, "data")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import bench_fakes
+
+DEFAULT_WORKBOOK = "ASDF - Accounts, 2023 - FRS 101(Ireland) - 1_review.xlsx"
+DEFAULT_HTML = "ASDF - Accounts, 2023 - FRS 101(Ireland) - 1.html"
+SELECTED_DATES = {
+    "end_date_current": "2023-12-31",
+    "duration_current": {"start": "2023-01-01", "end": "2023-12-31"},
+    "end_date_prior": "2022-12-31",
+    "duration_prior": {"start": "2022-01-01", "end": "2022-12-31"},
+    "opening_date_prior": "2022-01-01",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="250,2500,10000", help="comma-separated Filing Details row counts")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK, help="review workbook (name in data/ or a path) to scale")
+    parser.add_argument("--html", default=DEFAULT_HTML, help="iXBRL HTML (name in data/ or a path) paired with it")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the median time is reported")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub LLM latency per call, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--failure-mode", choices=("malformed", "raise"), default="malformed")
+    parser.add_argument("--taxonomy", help="taxonomy workbook to use instead of one derived from --workbook "
+                                           "(e.g. from scripts/generate_filing.py)")
+    parser.add_argument("--unmatched-rate", type=float, default=0.1,
+                        help="fraction of concept labels left out of the derived taxonomy")
+    parser.add_argument("--process-pool", action="store_true",
+                        help="parse in the process pool (child memory is not traced)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--log-level", default="ERROR")
+    return parser.parse_args()
+
+
+def scale_workbook(source_bytes, rows):
+    """Repeat the source Filing Details rows up to `rows`, with fresh IDs and order."""
+    sheets = pd.read_excel(io.BytesIO(source_bytes), sheet_name=None)
+    details = sheets["Filing Details"]
+    repeats = -(-rows // len(details))
+    scaled = pd.concat([details] * repeats, ignore_index=True).iloc[:rows].copy()
+    scaled["Order"] = range(1, len(scaled) + 1)
+    scaled["ID"] = range(10_000_000, 10_000_000 + len(scaled))
+    sheets["Filing Details"] = scaled
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return buffer.getvalue()
+
+
+def taxonomy_workbook(source_bytes, unmatched_rate):
+    """Build a Presentation sheet holding the source's concept labels minus a deterministic fraction."""
+    labels = sorted(pd.read_excel(io.BytesIO(source_bytes), sheet_name="Filing Details")["Concept Label"]
+                    .dropna().astype(str).str.strip().unique())
+    keep_every = round(1 / unmatched_rate) if unmatched_rate > 0 else 0
+    kept = [label for i, label in enumerate(labels) if not keep_every or i % keep_every]
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame({"Label": kept}).to_excel(writer, sheet_name="Presentation", index=False)
+    return buffer.getvalue()
+
+
+def taxonomy_name_of(source_bytes):
+    info = pd.read_excel(io.BytesIO(source_bytes), sheet_name="Filing Information")
+    for row in info.to_dict(orient="records"):
+        if row.get("Filer Name") == "Taxonomy Name":
+            return next((v for k, v in row.items() if k != "Filer Name"), None)
+    return None
+
+
+def fixture_taxonomy_blob(pipeline, source_bytes):
+    """Name the fixture taxonomy so the registry resolves it for the workbook's taxonomy name."""
+    taxonomy_name = taxonomy_name_of(source_bytes) or ""
+    taxonomy_type, _ = pipeline.normalize_taxonomy_name(taxonomy_name)
+    return f"ireland-frs-{pipeline.taxonomy_year(taxonomy_name) or 2023}-{taxonomy_type}.xlsx"
+
+
+def measure(fn, repeat):
+    """Run fn `repeat` times; return (last result, median seconds, max peak traced bytes)."""
+    times, peaks, result = [], [], None
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    return result, statistics.median(times), max(peaks)
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()))
+
+    # Settings the pipeline reads at import time
+    os.environ.setdefault("PROMPT_FILE", "prompts.yaml")
+    os.environ["PARSE_IN_PROCESS_POOL"] = "true" if args.process_pool else "false"
+
+    store = bench_fakes.InMemoryBlobStore()
+    llm = bench_fakes.StubOpenAI(args.latency, args.jitter, args.failure_rate, args.failure_mode)
+    bench_fakes.install(store, llm)
+
+    import azure.functions as func
+    import pipeline_callAoai as pipeline
+
+    with open(os.path.join(DATA_DIR, "prompts.yaml"), "rb") as f:
+        store.put("prompts", os.environ["PROMPT_FILE"], f.read())
+    with open(os.path.join(DATA_DIR, args.workbook), "rb") as f:
+        source_bytes = f.read()
+    html_name = os.path.basename(args.html)
+    with open(os.path.join(DATA_DIR, args.html), "rb") as f:
+        store.put("silver", html_name, f.read())
+
+    taxonomy_blob = fixture_taxonomy_blob(pipeline, source_bytes)
+    if args.taxonomy:
+        with open(args.taxonomy, "rb") as f:
+            store.put("taxanomy", taxonomy_blob, f.read())
+    else:
+        store.put("taxanomy", taxonomy_blob, taxonomy_workbook(source_bytes, args.unmatched_rate))
+
+    # Built once, as pipeline.main does per request, so the filter stage times the
+    # registry's precomputed index rather than a workbook parse
+    context = pipeline.load_validation_context()
+
+    tracemalloc.start()
+    results = []
+    for rows in [int(r) for r in args.rows.split(",") if r.strip()]:
+        workbook_name = f"bench-{rows}_review.xlsx"
+        store.put("silver", workbook_name, scale_workbook(source_bytes, rows))
+        blobs = [{"name": workbook_name, "container": "silver"}, {"name": html_name, "container": "silver"}]
+
+        def run_request(incremental=False):
+            body = {"blobs": blobs, "selectedDates": SELECTED_DATES, "incremental": incremental}
+            response = pipeline.main(func.HttpRequest(
+                method="POST", url="/api/pipeline_callAoai", headers={"Content-Type": "application/json"},
+                body=json.dumps(body).encode("utf-8")
+            ))
+            if response.status_code != 200:
+                raise RuntimeError(f"pipeline returned {response.status_code}: {response.get_body()[:200]}")
+            return response
+
+        parsed, parse_time, parse_peak = measure(lambda: pipeline.process_blob(blobs[0]), args.repeat)
+        _, html_time, html_peak = measure(lambda: pipeline.process_blob(blobs[1]), args.repeat)
+        (matched, _, _), filter_time, filter_peak = measure(
+            lambda: pipeline.concept_label_filter(parsed["excel_rows"], taxonomy_blob, context), args.repeat)
+        calls_before = llm.calls
+        _, validate_time, validate_peak = measure(lambda: pipeline.validate_with_llm(matched), args.repeat)
+        llm_calls = (llm.calls - calls_before) // args.repeat
+        full_response, full_time, full_peak = measure(run_request, args.repeat)
+        _, incremental_time, incremental_peak = measure(lambda: run_request(incremental=True), args.repeat)
+
+        stages = {
+            "parse_workbook": (parse_time, parse_peak, rows),
+            "parse_html": (html_time, html_peak, None),
+            "concept_label_filter": (filter_time, filter_peak, rows),
+            "validate_rows": (validate_time, validate_peak, len(matched)),
+            "end_to_end": (full_time, full_peak, rows),
+            "end_to_end_incremental": (incremental_time, incremental_peak, rows),
+        }
+        for stage, (seconds, peak, stage_rows) in stages.items():
+            results.append({
+                "rows": rows,
+                "stage": stage,
+                "seconds": round(seconds, 4),
+                "rowsPerSecond": round(stage_rows / seconds, 1) if stage_rows and seconds else None,
+                "peakMiB": round(peak / (1024 * 1024), 2),
+            })
+        results.append({"rows": rows, "stage": "llm_calls_per_validation", "count": llm_calls,
+                        "matchedRows": len(matched)})
+        results.append({"rows": rows, "stage": "end_to_end_telemetry",
+                        "telemetry": json.loads(full_response.get_body())["telemetry"]})
+
+    tracemalloc.stop()
+
+    print(f"{'rows':>7}  {'stage':<24}{'seconds':>10}{'rows/s':>12}{'peak MiB':>10}")
+    for result in results:
+        if "seconds" in result:
+            rate = f"{result['rowsPerSecond']:.1f}" if result["rowsPerSecond"] else "-"
+            print(f"{result['rows']:>7}  {result['stage']:<24}{result['seconds']:>10.3f}{rate:>12}{result['peakMiB']:>10.2f}")
+    print(f"LLM calls: {llm.calls} ({llm.failures} failed); blob reads: {store.reads}, writes: {store.writes}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
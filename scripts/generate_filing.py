@@ -0,0 +1,285 @@
+"""Generate synthetic review workbooks and iXBRL HTML of any size.
+
+Each filing is a "<name> - Accounts, <year> - <taxonomy> - 1_review.xlsx" with
+Filing Information and Filing Details sheets, the matching "... - 1.html" and
+an "..._expected.json" recording what each row was generated as:
+
+    match     Line Item Description agrees with the Concept Label
+    mismatch  Line Item Description is taken from an unrelated label
+    missing   Line Item Description and Comment Text are blank
+    unknown   Concept Label is not in the taxonomy (flagged by the label filter)
+
+Labels come from the Presentation sheet of a taxonomy workbook (--taxonomy);
+without one, the concept labels of the review workbooks in data/ are used and
+a matching "ireland-frs-<year>-<type>.xlsx" taxonomy workbook is written too,
+so the output can be uploaded to the taxanomy container as a complete fixture.
+
+    python scripts/generate_filing.py --rows 20000 --entities 4 --out /tmp/filings
+"""
+import argparse
+import glob
+import html
+import json
+import os
+import random
+from datetime import datetime
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, "data")
+
+BUS_NS = "http://xbrl.frc.org.uk/cd/2023-01-01/business"
+CORE_NS = "http://xbrl.frc.org.uk/fr/2023-01-01/core"
+# Same layout as the review workbooks exported by the tagging tool
+FILING_DETAILS_COLUMNS = [
+    "Order", "ID", "Tag Value Changed", "Confirmed", "Line Item Description", "Concept Label", "Concept Name",
+    "Concept Balance", "Is Extension Concept", "Closest Presented Concepts with Wider Meaning",
+    "Closest Concept with Wider Meaning", "Narrower Concepts", "Page Number", "Document Value", "Tag Value", "Unit",
+    "Accuracy", "Period", "Dimensions", "Suggested Dimensions", "Tuple", "Parent Tuple", "Confidence",
+    "Suggestion Rank", "Suggestion Source", "Top Suggestion", "Footnote Name", "Language", "Footnote Value",
+    "Last Updated by", "Comment Status", "Comment Text", "Footnotes", "Suggestion Source.1",
+]
+# Formatted with --year so the filing declares the taxonomy version generated alongside it
+TAXONOMY_NAMES = {
+    "frs-101": "FRS 101 (Irish Extension {year})",
+    "frs-102": "FRS 102 (Irish Extension {year})",
+    "ifrs": "Full IFRS (Irish Extension {year})",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20000, help="Filing Details rows per filing")
+    parser.add_argument("--filings", type=int, default=1, help="number of filings to generate")
+    parser.add_argument("--entities", type=int, default=1,
+                        help="reporting entities per filing; rows are spread across an entity dimension")
+    parser.add_argument("--taxonomy", help="taxonomy workbook with a Presentation sheet and Label column")
+    parser.add_argument("--taxonomy-type", choices=sorted(TAXONOMY_NAMES), default="frs-101")
+    parser.add_argument("--year", type=int, default=2023)
+    parser.add_argument("--match-rate", type=float, default=0.8)
+    parser.add_argument("--mismatch-rate", type=float, default=0.1)
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--unknown-label-rate", type=float, default=0.05)
+    parser.add_argument("--name", default="Synthetic", help="company name prefix")
+    parser.add_argument("--out", default="generated_filings", help="output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    total = args.match_rate + args.mismatch_rate + args.missing_rate + args.unknown_label_rate
+    if abs(total - 1.0) > 1e-6:
+        parser.error(f"match, mismatch, missing and unknown-label rates must sum to 1 (got {total:g})")
+    return args
+
+
+def load_labels(taxonomy_path):
+    """Return [(label, concept name)] from a taxonomy Presentation sheet, or from the data/ review workbooks."""
+    if taxonomy_path:
+        presentation = pd.read_excel(taxonomy_path, sheet_name="Presentation")
+        name_column = next((c for c in ("Name", "Concept Name", "Element Name") if c in presentation.columns), None)
+        labels = presentation["Label"].astype("string").str.strip()
+        names = presentation[name_column] if name_column else pd.Series([None] * len(presentation))
+        pairs = [(label, name) for label, name in zip(labels, names) if isinstance(label, str) and label]
+    else:
+        pairs = []
+        for path in glob.glob(os.path.join(DATA_DIR, "*.xlsx")):
+            try:
+                details = pd.read_excel(path, sheet_name="Filing Details")
+            except ValueError:
+                continue
+            pairs.extend(zip(details["Concept Label"], details["Concept Name"]))
+        pairs = [(str(label).strip(), name) for label, name in pairs if isinstance(label, str)]
+
+    unique = {}
+    for label, name in pairs:
+        unique.setdefault(label, name if isinstance(name, str) else None)
+    if len(unique) < 2:
+        raise SystemExit("Need at least two distinct labels to generate mismatches")
+    return sorted(unique.items())
+
+
+def periods_for(year):
+    return {
+        "duration_current": f"{year}-01-01 to {year}-12-31",
+        "instant_current": f"{year}-12-31",
+        "duration_prior": f"{year - 1}-01-01 to {year - 1}-12-31",
+        "instant_prior": f"{year - 1}-12-31",
+    }
+
+
+def local_name(label):
+    return "".join(word.capitalize() for word in "".join(c if c.isalnum() else " " for c in label).split())
+
+
+def generate_rows(args, labels, rng, entities):
+    """Yield (row dict, expected category, context id, is numeric) per Filing Details row."""
+    periods = list(periods_for(args.year).items())
+    categories = ["match", "mismatch", "missing", "unknown"]
+    weights = [args.match_rate, args.mismatch_rate, args.missing_rate, args.unknown_label_rate]
+    base_id = rng.randint(10_000_000, 90_000_000)
+
+    for index in range(args.rows):
+        category = rng.choices(categories, weights)[0]
+        label, concept_name = labels[rng.randrange(len(labels))]
+        concept_name = concept_name or f"{{{CORE_NS}}}{local_name(label)}"
+        description, comment = label, None
+
+        if category == "mismatch":
+            other = label
+            while other == label:
+                other = labels[rng.randrange(len(labels))][0]
+            description = other
+        elif category == "missing":
+            description = None
+        elif category == "unknown":
+            label = f"{label} (entity specific)"
+            concept_name = f"{{https://example.com/ext/{args.year}}}{local_name(label)}"
+            comment = "Extension concept created for this filing"
+
+        period_key, period = periods[rng.randrange(len(periods))]
+        entity = rng.randrange(entities)
+        dimensions = f"{{{BUS_NS}}}ReportingEntityDimension={{{BUS_NS}}}Entity{entity + 1}Member" if entities > 1 else None
+        numeric = rng.random() < 0.6
+        value = rng.randint(-5_000_000, 25_000_000) if numeric else f"{description or label} text"
+
+        row = dict.fromkeys(FILING_DETAILS_COLUMNS)
+        row.update({
+            "Order": index + 1,
+            "ID": base_id + index,
+            "Tag Value Changed": "No",
+            "Confirmed": "Yes",
+            "Line Item Description": description,
+            "Concept Label": label,
+            "Concept Name": concept_name,
+            "Concept Balance": rng.choice(["Debit", "Credit"]) if numeric else None,
+            "Is Extension Concept": "Yes" if category == "unknown" else "No",
+            "Page Number": 1 + index // 40,
+            "Document Value": f"{value:,}" if numeric else value,
+            "Tag Value": value,
+            "Unit": "EUR" if numeric else None,
+            "Accuracy": "Units" if numeric else None,
+            "Period": period,
+            "Dimensions": dimensions,
+            "Suggested Dimensions": dimensions,
+            "Confidence": f"{rng.uniform(60, 99):.1f}%",
+            "Suggestion Rank": 1,
+            "Suggestion Source": "Synthetic",
+            "Top Suggestion": label,
+            "Last Updated by": "generator@example.com",
+            "Comment Text": comment,
+        })
+        yield row, category, f"c_{period_key}_{entity + 1}", numeric
+
+
+def write_workbook(path, entity_name, filing_name, taxonomy_name, rows, registration_number):
+    filing_information = pd.DataFrame({
+        "Filer Name": ["Company Registration Number", "Filing Name", "Taxonomy Name", "Review Spreadsheet Export Time"],
+        entity_name: [registration_number, filing_name, taxonomy_name,
+                      datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+    })
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Instructions": ["Synthetic review workbook generated for scale testing"]}).to_excel(
+            writer, sheet_name="Instructions", index=False)
+        filing_information.to_excel(writer, sheet_name="Filing Information", index=False)
+        pd.DataFrame(rows, columns=FILING_DETAILS_COLUMNS).to_excel(writer, sheet_name="Filing Details", index=False)
+
+
+def write_html(path, entity_name, taxonomy_name, year, entities, facts):
+    """Write an iXBRL document with one fact per row plus the sections parse_html_bytes reads."""
+    contexts = []
+    for key, period in periods_for(year).items():
+        for entity in range(1, entities + 1):
+            if " to " in period:
+                start, end = period.split(" to ")
+                period_xml = f"<xbrli:startDate>{start}</xbrli:startDate><xbrli:endDate>{end}</xbrli:endDate>"
+            else:
+                period_xml = f"<xbrli:instant>{period}</xbrli:instant>"
+            segment = (f'<xbrli:segment><xbrldi:explicitMember dimension="bus:ReportingEntityDimension">'
+                       f'bus:Entity{entity}Member</xbrldi:explicitMember></xbrli:segment>') if entities > 1 else ""
+            contexts.append(
+                f'<xbrli:context id="c_{key}_{entity}"><xbrli:entity>'
+                f'<xbrli:identifier scheme="http://www.companieshouse.gov.uk/">{entity_name}</xbrli:identifier>'
+                f'{segment}</xbrli:entity><xbrli:period>{period_xml}</xbrli:period></xbrli:context>'
+            )
+
+    body = []
+    for fact_id, (row, context, numeric) in enumerate(facts, start=1):
+        name = html.escape(row["Concept Name"].rsplit("}", 1)[-1])
+        description = html.escape(str(row["Line Item Description"] or row["Concept Label"]))
+        if numeric:
+            sign = ' sign="-"' if row["Tag Value"] < 0 else ""
+            fact = (f'<ix:nonFraction id="f{fact_id}" name="core:{name}" contextRef="{context}" unitRef="EUR" '
+                    f'decimals="0" format="ixt:numdotdecimal"{sign}>{abs(row["Tag Value"]):,}</ix:nonFraction>')
+        else:
+            fact = (f'<ix:nonNumeric id="f{fact_id}" name="core:{name}" contextRef="{context}">'
+                    f'{html.escape(str(row["Tag Value"]))}</ix:nonNumeric>')
+        body.append(f"<p>{description}: {fact}</p>")
+
+    document = f'''<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+ xmlns:ixt="http://www.xbrl.org/inlineXBRL/transformation/2010-04-20" xmlns:xbrli="http://www.xbrl.org/2003/instance"
+ xmlns:xbrldi="http://xbrl.org/2006/xbrldi" xmlns:iso4217="http://www.xbrl.org/2003/iso4217"
+ xmlns:bus="{BUS_NS}" xmlns:core="{CORE_NS}">
+<head><title>{html.escape(entity_name)} - Accounts, {year}</title></head>
+<body>
+<div style="display:none"><ix:header><ix:hidden/><ix:resources>
+{"".join(contexts)}
+<xbrli:unit id="EUR"><xbrli:measure>iso4217:EUR</xbrli:measure></xbrli:unit>
+</ix:resources></ix:header></div>
+<p>STATEMENT OF COMPLIANCE</p>
+<p>The financial statements have been prepared in accordance with {html.escape(taxonomy_name)} and the Companies Act 2014.</p>
+<p>2. ACCOUNTING POLICIES</p>
+<p>NOTES TO THE FINANCIAL STATEMENTS</p>
+<p>The company is a private company limited by shares, incorporated in Ireland.</p>
+<p>FACTORS AFFECTING TAX CHARGE FOR THE YEAR</p>
+<p>The tax assessed for the year is based on the standard rate of corporation tax in Ireland of 12.5%.</p>
+<p>DIRECTORS' REPORT</p>
+{chr(10).join(body)}
+</body>
+</html>
+'''
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(document)
+
+
+def write_taxonomy_workbook(path, labels):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Label": [label for label, _ in labels], "Name": [name for _, name in labels]}).to_excel(
+            writer, sheet_name="Presentation", index=False)
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    labels = load_labels(args.taxonomy)
+    taxonomy_name = TAXONOMY_NAMES[args.taxonomy_type].format(year=args.year)
+    os.makedirs(args.out, exist_ok=True)
+    if not args.taxonomy:
+        taxonomy_path = os.path.join(args.out, f"ireland-frs-{args.year}-{args.taxonomy_type}.xlsx")
+        write_taxonomy_workbook(taxonomy_path, labels)
+        print(f"{taxonomy_path}: {len(labels)} labels")
+
+    for number in range(1, args.filings + 1):
+        entity_name = f"{args.name} {number} Limited" if args.filings > 1 else f"{args.name} Limited"
+        filing_name = f"{entity_name} - Accounts, {args.year} - {taxonomy_name.split(' (')[0]} (Ireland) - 1"
+
+        rows, expected, facts = [], {}, []
+        for row, category, context, numeric in generate_rows(args, labels, rng, args.entities):
+            rows.append(row)
+            expected[str(row["ID"])] = category
+            facts.append((row, context, numeric))
+
+        workbook_path = os.path.join(args.out, f"{filing_name}_review.xlsx")
+        html_path = os.path.join(args.out, f"{filing_name}.html")
+        write_workbook(workbook_path, entity_name, filing_name, taxonomy_name, rows, rng.randint(100000, 999999))
+        write_html(html_path, entity_name, taxonomy_name, args.year, args.entities, facts)
+        with open(os.path.join(args.out, f"{filing_name}_expected.json"), "w") as f:
+            json.dump({"filing": filing_name, "taxonomyName": taxonomy_name, "rows": expected}, f)
+
+        counts = {category: list(expected.values()).count(category) for category in ("match", "mismatch", "missing", "unknown")}
+        print(f"{workbook_path}: {len(rows)} rows {counts}")
+        print(f"{html_path}: {len(facts)} facts")
+
+
+if __name__ == "__main__":
+    main()
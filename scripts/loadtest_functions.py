@@ -0,0 +1,436 @@
+"""Load test for the function endpoints against a local Functions host.
+
+Serves a stub Azure OpenAI endpoint (chat completions with the same latency
+and failure injection as bench_fakes.StubOpenAI), seeds an Azurite-style
+storage emulator with the fixtures from data/, optionally starts Azurite and
+`func start`, then drives each endpoint through a series of concurrency
+levels. For every level it reports p50/p95/p99 latency, error rate,
+throughput and the peak resident memory of the worker processes.
+
+    azurite --silent --location /tmp/azurite &
+    python scripts/loadtest_functions.py --start-host \\
+        --profile callAoai:1,2,4,8 --profile getBlobsByContainer:1,8,32 --duration 30
+
+Each concurrency level is a closed loop: that many clients send requests
+back to back for --duration seconds. With --p95-slo-ms the report also
+names the highest level per endpoint that kept p95 latency and the error
+rate within bounds. Run it from the repository root; worker memory is read
+from /proc, so it is only reported on Linux.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, "data")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_fakes
+from benchmark_callAoai import (DEFAULT_HTML, DEFAULT_WORKBOOK, SELECTED_DATES, fixture_taxonomy_blob, scale_workbook,
+                                taxonomy_workbook)
+
+# Azurite's well-known development account
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;QueueEndpoint=http://127.0.0.1:10001/devstoreaccount1;"
+)
+CONTAINERS = ("bronze", "silver", "gold", "prompts", "taxanomy", "manifests")
+STUB_MODEL = "stub-model"
+PROMPT_FILE = "prompts.yaml"
+LOAD_WORKBOOK = "loadtest_review.xlsx"
+LOAD_HTML = "loadtest.html"
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Answers Azure OpenAI chat completion calls from the shared StubOpenAI."""
+
+    llm = None
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        try:
+            content = self.llm.run_prompt("", prompt)
+        except RuntimeError as e:
+            self._send(500, {"error": {"code": "InternalServerError", "message": str(e)}})
+            return
+        self._send(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", STUB_MODEL),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_openai(llm, port):
+    """Serve the stub on 127.0.0.1:port in a daemon thread; returns the server."""
+    handler = type("Handler", (StubOpenAIHandler,), {"llm": llm})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_storage(connection_string, args):
+    """Create the containers and upload prompts, the filing pair, its taxonomy and listing filler blobs."""
+    from azure.core.exceptions import ResourceExistsError
+    from azure.storage.blob import BlobServiceClient
+    # Imported here, once host_environment() is in os.environ, so storage uses the emulator
+    import pipeline_callAoai as pipeline
+
+    service = BlobServiceClient.from_connection_string(connection_string)
+    for container in CONTAINERS:
+        try:
+            service.create_container(container)
+        except ResourceExistsError:
+            pass
+
+    def upload(container, name, data):
+        service.get_blob_client(container, name).upload_blob(data, overwrite=True)
+
+    with open(os.path.join(DATA_DIR, PROMPT_FILE), "rb") as f:
+        upload("prompts", PROMPT_FILE, f.read())
+    with open(os.path.join(DATA_DIR, args.workbook), "rb") as f:
+        source_bytes = f.read()
+    upload("silver", LOAD_WORKBOOK, scale_workbook(source_bytes, args.rows))
+    with open(os.path.join(DATA_DIR, args.html), "rb") as f:
+        upload("silver", LOAD_HTML, f.read())
+
+    if args.taxonomy:
+        with open(args.taxonomy, "rb") as f:
+            taxonomy_bytes = f.read()
+    else:
+        taxonomy_bytes = taxonomy_workbook(source_bytes, args.unmatched_rate)
+    upload("taxanomy", fixture_taxonomy_blob(pipeline, source_bytes), taxonomy_bytes)
+
+    for i in range(args.listing_blobs):
+        upload("bronze", f"loadtest/filler-{i:06d}.txt", b"x")
+
+
+def host_environment(args, connection_string):
+    """Settings the Functions host (and this process, for seeding) runs with."""
+    env = {
+        "FUNCTIONS_WORKER_RUNTIME": "python",
+        "AzureWebJobsStorage": connection_string,
+        "STORAGE_CONNECTION_STRING": connection_string,
+        "OPENAI_API_BASE": f"http://127.0.0.1:{args.stub_port}",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_API_VERSION": "2024-06-01",
+        "OPENAI_MODEL": STUB_MODEL,
+        "PROMPT_FILE": PROMPT_FILE,
+    }
+    for setting in args.host_env:
+        key, _, value = setting.partition("=")
+        env[key] = value
+    return env
+
+
+def start_process(command, env=None, log_path=None):
+    log = open(log_path, "wb") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(command, cwd=REPO_ROOT, env={**os.environ, **(env or {})}, stdout=log,
+                            stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def descendant_pids(root_pid):
+    """PIDs of every process below root_pid, from /proc (empty where /proc is unavailable)."""
+    children = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name is parenthesised and may contain spaces; the ppid follows it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    found, pending = [], [root_pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def is_python_worker(pid):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"python" in f.read()
+    except OSError:
+        return False
+
+
+class MemorySampler:
+    """Tracks the peak summed RSS of the host's Python workers (and their process pools) while running."""
+
+    def __init__(self, host_pid, worker_pids=(), interval=0.5):
+        self.host_pid = host_pid
+        self.worker_pids = list(worker_pids)
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        pids = set(self.worker_pids)
+        for pid in self.worker_pids:
+            pids.update(descendant_pids(pid))
+        if self.host_pid:
+            pids.update(pid for pid in descendant_pids(self.host_pid) if is_python_worker(pid))
+        return sum(rss_bytes(pid) for pid in pids)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.sample())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+
+def build_targets(args):
+    """Endpoint name -> (method, path, body) for every endpoint a profile can drive."""
+    pipeline_body = json.dumps({
+        "blobs": [{"name": LOAD_WORKBOOK, "container": "silver"}, {"name": LOAD_HTML, "container": "silver"}],
+        "selectedDates": SELECTED_DATES,
+    }).encode("utf-8")
+    return {
+        "callAoai": ("POST", "/api/callAoai", pipeline_body),
+        "getBlobsByContainer": ("GET", f"/api/app_getBlobsByContainer?{args.listing_query}", None),
+    }
+
+
+def send(base_url, method, path, body, timeout):
+    """Return (status or None, seconds); transport errors and timeouts count as status None."""
+    request = urllib.request.Request(base_url + path, data=body, method=method,
+                                     headers={"Content-Type": "application/json"} if body else {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return status, time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[index], 1)
+
+
+def run_level(base_url, target, concurrency, duration, timeout, sampler):
+    """Closed loop: `concurrency` clients send back-to-back requests until `duration` elapses."""
+    method, path, body = target
+    deadline = time.monotonic() + duration
+    results, lock = [], threading.Lock()
+
+    def client():
+        while time.monotonic() < deadline:
+            outcome = send(base_url, method, path, body, timeout)
+            with lock:
+                results.append(outcome)
+
+    started = time.perf_counter()
+    with sampler, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for status, seconds in results if status is not None and status < 400)
+    errors = sum(1 for status, _ in results if status is None or status >= 400)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "errorRate": round(errors / len(results), 4) if results else None,
+        "throughputRps": round(len(results) / elapsed, 2) if elapsed else None,
+        "p50Ms": percentile(latencies, 0.50),
+        "p95Ms": percentile(latencies, 0.95),
+        "p99Ms": percentile(latencies, 0.99),
+        "peakWorkerMiB": round(sampler.peak / (1024 * 1024), 1) if sampler.peak else None,
+    }
+
+
+def parse_profile(profile):
+    name, _, levels = profile.partition(":")
+    return name, [int(level) for level in levels.split(",") if level.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", action="append", default=[],
+                        help="endpoint:concurrency,... (callAoai or getBlobsByContainer); repeatable")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed requests per endpoint first")
+    parser.add_argument("--timeout", type=float, default=230.0, help="per-request timeout, seconds")
+    parser.add_argument("--base-url", default="http://127.0.0.1:7071", help="Functions host to drive")
+    parser.add_argument("--start-host", action="store_true", help="run `func start` for the duration")
+    parser.add_argument("--start-azurite", action="store_true", help="run `azurite` for the duration")
+    parser.add_argument("--func-command", default="func", help="Azure Functions Core Tools executable")
+    parser.add_argument("--azurite-command", default="azurite", help="Azurite executable")
+    parser.add_argument("--worker-pid", type=int, action="append", default=[],
+                        help="worker PID(s) to measure when the host was started separately")
+    parser.add_argument("--host-env", action="append", default=[],
+                        help="KEY=VALUE host setting, e.g. FUNCTIONS_WORKER_PROCESS_COUNT=2; repeatable")
+    parser.add_argument("--connection-string", default=AZURITE_CONNECTION_STRING, help="storage emulator")
+    parser.add_argument("--no-seed", action="store_true", help="use the storage contents as they are")
+    parser.add_argument("--rows", type=int, default=250, help="Filing Details rows in the seeded workbook")
+    parser.add_argument("--workbook", default=DEFAULT_WORKBOOK, help="review workbook (name in data/ or a path)")
+    parser.add_argument("--html", default=DEFAULT_HTML, help="iXBRL HTML (name in data/ or a path)")
+    parser.add_argument("--taxonomy", help="taxonomy workbook instead of one derived from --workbook")
+    parser.add_argument("--unmatched-rate", type=float, default=0.1)
+    parser.add_argument("--listing-blobs", type=int, default=500, help="filler blobs seeded into bronze")
+    parser.add_argument("--listing-query", default="containers=bronze,silver,gold",
+                        help="query string for getBlobsByContainer requests")
+    parser.add_argument("--stub-port", type=int, default=8089, help="port for the stub OpenAI endpoint")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency per call, seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="extra uniform random latency, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--failure-mode", choices=("malformed", "raise"), default="malformed",
+                        help="malformed content, or an HTTP 500 the client retries")
+    parser.add_argument("--p95-slo-ms", type=float, help="report the highest level with p95 at or under this")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="error rate allowed by the SLO")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    args.profile = args.profile or ["callAoai:1,2,4", "getBlobsByContainer:1,4,16,32"]
+    return args
+
+
+def main():
+    args = parse_args()
+    targets = build_targets(args)
+    profiles = [parse_profile(profile) for profile in args.profile]
+    unknown = [name for name, _ in profiles if name not in targets]
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(unknown)} (expected {', '.join(targets)})")
+
+    env = host_environment(args, args.connection_string)
+    os.environ.update(env)
+    llm = bench_fakes.StubOpenAI(args.latency, args.jitter, args.failure_rate, args.failure_mode)
+    stub_server = start_stub_openai(llm, args.stub_port)
+    processes = []
+    try:
+        if args.start_azurite:
+            processes.append(start_process([args.azurite_command, "--silent", "--skipApiVersionCheck",
+                                            "--location", os.path.join(REPO_ROOT, "azurite")]))
+            time.sleep(3)
+        if not args.no_seed:
+            seed_storage(args.connection_string, args)
+        host = None
+        if args.start_host:
+            port = args.base_url.rsplit(":", 1)[-1].split("/")[0]
+            host = start_process([args.func_command, "start", "--port", port], env,
+                                 os.path.join(tempfile.gettempdir(), "loadtest-host.log"))
+            processes.append(host)
+        wait_until_ready(f"{args.base_url}{targets['getBlobsByContainer'][1]}", timeout=180)
+
+        sampler = MemorySampler(host.pid if host else None, args.worker_pid)
+        results = []
+        for name, levels in profiles:
+            for _ in range(args.warmup):
+                send(args.base_url, *targets[name], args.timeout)
+            for concurrency in levels:
+                calls_before = llm.calls
+                result = {"endpoint": name, "concurrency": concurrency,
+                          **run_level(args.base_url, targets[name], concurrency, args.duration, args.timeout,
+                                      sampler)}
+                result["llmCalls"] = llm.calls - calls_before
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    finally:
+        stub_server.shutdown()
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(f"{'endpoint':<22}{'conc':>5}{'reqs':>7}{'err%':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'worker MiB':>12}")
+    for r in results:
+        cells = [f"{r[key]:.0f}" if r[key] is not None else "-" for key in ("p50Ms", "p95Ms", "p99Ms")]
+        memory = f"{r['peakWorkerMiB']:.1f}" if r["peakWorkerMiB"] else "-"
+        error_rate = f"{r['errorRate'] * 100:.1f}" if r["errorRate"] is not None else "-"
+        print(f"{r['endpoint']:<22}{r['concurrency']:>5}{r['requests']:>7}{error_rate:>7}{r['throughputRps']:>8.1f}"
+              f"{cells[0]:>9}{cells[1]:>9}{cells[2]:>9}{memory:>12}")
+
+    sustainable = {}
+    if args.p95_slo_ms:
+        for name, _ in profiles:
+            within = [r["concurrency"] for r in results if r["endpoint"] == name and r["p95Ms"] is not None
+                      and r["p95Ms"] <= args.p95_slo_ms and (r["errorRate"] or 0) <= args.max_error_rate]
+            sustainable[name] = max(within) if within else None
+            print(f"{name}: highest concurrency within p95 <= {args.p95_slo_ms:.0f} ms and "
+                  f"errors <= {args.max_error_rate:.1%}: {sustainable[name] or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results, "sustainableConcurrency": sustainable}, f,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/bin/bash
+echo "Post-deploy script started."
+
+eval "$(azd env get-values | sed 's/^/export /')"
+
+# Blob events reach the functions through Event Grid; the subscriptions can only
+# be created once the functions exist, so they are (re)created after each deploy.
+FUNCTION_APP_ID=$(az functionapp show --name $FUNCTION_APP_NAME --resource-group $RESOURCE_GROUP --query id -o tsv)
+
+create_subscription() {
+  local name=$1 function=$2 container=$3
+  shift 3
+  az eventgrid system-topic event-subscription create \
+    --name "$name" \
+    --resource-group $RESOURCE_GROUP \
+    --system-topic-name $STORAGE_EVENTS_TOPIC \
+    --endpoint-type azurefunction \
+    --endpoint "$FUNCTION_APP_ID/functions/$function" \
+    --subject-begins-with "/blobServices/default/containers/$container/blobs/" \
+    --included-event-types "$@" \
+    && echo "Event subscription $name is in place." \
+    || echo "Could not create event subscription $name"
+}
+
+create_subscription silver-uploaded pipeline_silverUploaded silver Microsoft.Storage.BlobCreated
+create_subscription taxonomy-updated pipeline_taxonomyUpdated taxanomy \
+  Microsoft.Storage.BlobCreated Microsoft.Storage.BlobDeleted
@@ -0,0 +1,47 @@
+"""Shared setup: the pipeline runs against scripts/bench_fakes instead of Azure.
+
+The fakes replace utils.blob_functions and utils.azure_openai in sys.modules,
+so they are installed here, before any test module imports a function.
+Settings the functions read at import time are fixed here for the same reason.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, "data")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+
+os.environ["PROMPT_FILE"] = "prompts.yaml"
+os.environ["PARSE_IN_PROCESS_POOL"] = "false"
+os.environ["DOCUMENT_ANALYZER"] = "fake"
+os.environ["DOCUMENT_SUBMISSION_MODE"] = "url"
+# Azurite's published development account: SAS URLs are signed locally with its key
+os.environ["STORAGE_CONNECTION_STRING"] = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+import bench_fakes  # noqa: E402
+
+STORE = bench_fakes.InMemoryBlobStore()
+LLM = bench_fakes.StubOpenAI()
+bench_fakes.install(STORE, LLM)
+
+
+@pytest.fixture
+def store():
+    """The installed in-memory blob store, emptied for each test."""
+    STORE.clear()
+    return STORE
+
+
+@pytest.fixture
+def prompts(store):
+    with open(os.path.join(DATA_DIR, "prompts.yaml"), "rb") as f:
+        store.put("prompts", os.environ["PROMPT_FILE"], f.read())
+    from utils.prompts import load_prompts
+    return load_prompts()
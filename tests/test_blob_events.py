@@ -0,0 +1,41 @@
+import azure.functions as func
+
+import pipeline_silverUploaded as silver_uploaded
+import pipeline_taxonomyUpdated as taxonomy_updated
+from utils.blob_events import BLOB_CREATED, BLOB_DELETED
+
+
+def storage_event(subject, event_type=BLOB_CREATED):
+    return func.EventGridEvent(
+        id="1", data={"url": "https://account.blob.core.windows.net/x"}, topic="/storage", subject=subject,
+        event_type=event_type, event_time=None, data_version="1"
+    )
+
+
+def test_silver_upload_event_queues_the_filing_without_reading_the_blob(monkeypatch):
+    queued = []
+    monkeypatch.setattr(silver_uploaded, "queue_filing_if_complete", lambda *args: queued.append(args))
+
+    silver_uploaded.main(storage_event("/blobServices/default/containers/silver/blobs/2023/acme_review.xlsx"))
+
+    assert queued == [("silver", "2023/acme_review.xlsx")]
+
+
+def test_events_for_other_containers_or_types_are_ignored(monkeypatch):
+    queued = []
+    monkeypatch.setattr(silver_uploaded, "queue_filing_if_complete", lambda *args: queued.append(args))
+
+    silver_uploaded.main(storage_event("/blobServices/default/containers/gold/blobs/acme.json"))
+    silver_uploaded.main(storage_event("/blobServices/default/containers/silver/blobs/acme.html", BLOB_DELETED))
+
+    assert queued == []
+
+
+def test_taxonomy_deletes_rebuild_the_registry(monkeypatch):
+    rebuilds = []
+    monkeypatch.setattr(taxonomy_updated, "rebuild_registry", lambda: rebuilds.append(True))
+
+    taxonomy_updated.main(storage_event("/blobServices/default/containers/taxanomy/blobs/old.xlsx", BLOB_DELETED))
+    taxonomy_updated.main(storage_event("/blobServices/default/containers/silver/blobs/old.xlsx"))
+
+    assert rebuilds == [True]
@@ -0,0 +1,28 @@
+from urllib.parse import parse_qs, urlparse
+
+import azure.functions as func
+
+import app_downloadBlobs as download_blobs
+
+
+def test_redirect_mode_hands_out_a_read_only_attachment_link():
+    response = download_blobs.main(func.HttpRequest(
+        method="GET", url="/api/app_downloadBlobs", body=b"",
+        params={"containerName": "gold", "blobName": "reports/filing.json", "mode": "redirect"},
+    ))
+
+    assert response.status_code == 302
+    location = urlparse(response.headers["Location"])
+    query = parse_qs(location.query)
+    assert location.path.endswith("/gold/reports/filing.json")
+    assert query["sp"] == ["r"] and "sig" in query
+    assert query["rscd"] == ["attachment; filename=filing.json"]
+
+
+def test_unknown_mode_is_rejected():
+    response = download_blobs.main(func.HttpRequest(
+        method="GET", url="/api/app_downloadBlobs", body=b"",
+        params={"containerName": "gold", "blobName": "a.json", "mode": "stream"},
+    ))
+
+    assert response.status_code == 400
@@ -0,0 +1,37 @@
+from azure.core.exceptions import ResourceModifiedError
+
+from utils import gold_index
+
+
+def run(filing, **counts):
+    return gold_index.build_run_entry(filing, [f"{filing}.html"], f"{filing}.json", counts)
+
+
+def test_runs_are_indexed_per_filing_and_queried_across_filings(store):
+    gold_index.record_run(run("acme-2022", VALID=3))
+    gold_index.record_run(run("acme-2023", FLAGGED_FOR_REVIEW=1))
+    latest = gold_index.record_run(run("acme-2023", VALID=2))
+
+    assert [blob.name for blob in store.list("manifests")] == ["gold-index/acme-2022.json", "gold-index/acme-2023.json"]
+    index = gold_index.load_index("2023")
+    assert list(index["filings"]) == ["acme-2023"] and index["updatedAt"] == latest["runAt"]
+    assert gold_index.query_runs(index) == [latest]
+    assert gold_index.query_runs(gold_index.load_index(), status="FLAGGED_FOR_REVIEW", latest=False)[0]["filingKey"] == "acme-2023"
+
+
+def test_conflicting_write_backs_off_and_keeps_both_runs(store, monkeypatch):
+    write = gold_index.write_blob_if_unchanged
+    sleeps = []
+    monkeypatch.setattr(gold_index.time, "sleep", sleeps.append)
+
+    def concurrent_run_wins_once(*args, **kwargs):
+        monkeypatch.setattr(gold_index, "write_blob_if_unchanged", write)
+        gold_index.record_run(run("acme-2023", VALID=1))
+        raise ResourceModifiedError("etag changed")
+
+    monkeypatch.setattr(gold_index, "write_blob_if_unchanged", concurrent_run_wins_once)
+    gold_index.record_run(run("acme-2023", VALID=2))
+
+    runs, _ = gold_index.load_filing_runs("acme-2023")
+    assert [entry["counts"] for entry in runs] == [{"VALID": 2}, {"VALID": 1}]
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= gold_index.GOLD_INDEX_RETRY_BACKOFF
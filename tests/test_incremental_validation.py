@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import pipeline_callAoai as pipeline
+from conftest import LLM
+from utils.row_state import load_row_state
+from utils.row_store import RowStore
+
+BLOB_NAME = "ACME - Accounts, 2023 - FRS 101(Ireland) - 1_review.xlsx"
+FILING = "ACME - Accounts, 2023 - FRS 101(Ireland) - 1"
+
+
+class CollectingWriter:
+    def __init__(self):
+        self.items = []
+
+    def write_many(self, items):
+        self.items.extend(items)
+
+
+def workbook_rows(count=25, changed=()):
+    return RowStore.from_records([
+        {
+            "ID": 1000 + i,
+            "Line Item Description": f"Line {i}" + (" (restated)" if i in changed else ""),
+            "Concept Label": f"Concept {i}",
+            "Comment Text": None,
+            "Dimensions": None,
+            "Tag Value": float(i * 10),
+        }
+        for i in range(count)
+    ])
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record the Concept Labels of every row sent to the LLM."""
+    sent = []
+
+    def run_prompt(system_prompt, user_prompt):
+        sent.extend(row["Concept Label"] for row in LLM._prompt_rows(user_prompt))
+        return LLM.run_prompt(system_prompt, user_prompt)
+
+    monkeypatch.setattr(pipeline, "run_prompt", run_prompt)
+    return sent
+
+
+def validate(rows, prompts, incremental):
+    gold = CollectingWriter()
+    reused = pipeline.validate_filtered_rows(BLOB_NAME, rows, gold, None, prompts, incremental)
+    return gold.items, reused
+
+
+def row_state(prompts):
+    return load_row_state(FILING, f"{pipeline.prompt_version(prompts)}/{pipeline.OPENAI_MODEL}")
+
+
+def test_incremental_run_only_revalidates_changed_rows(store, prompts, calls):
+    first, _ = validate(workbook_rows(), prompts, incremental=False)
+    calls.clear()
+
+    second, reused = validate(workbook_rows(changed={3, 17}), prompts, incremental=True)
+
+    assert reused == 23
+    assert calls == ["Concept 3", "Concept 17"]
+    assert [verdict["Concept Label"] for verdict in second] == [f"Concept {i}" for i in range(25)]
+    assert [v for i, v in enumerate(second) if i not in (3, 17)] == [v for i, v in enumerate(first) if i not in (3, 17)]
+
+
+def test_full_run_ignores_previous_verdicts(store, prompts, calls):
+    validate(workbook_rows(), prompts, incremental=False)
+    calls.clear()
+
+    _, reused = validate(workbook_rows(), prompts, incremental=True)
+    assert reused == 25 and calls == []
+
+    _, reused = validate(workbook_rows(), prompts, incremental=False)
+    assert reused == 0 and len(calls) == 25
+
+
+def test_reordered_batch_verdicts_are_not_remembered(store, prompts, monkeypatch):
+    def reversed_prompt(system_prompt, user_prompt):
+        return json.dumps(json.loads(LLM.run_prompt(system_prompt, user_prompt))[::-1])
+
+    monkeypatch.setattr(pipeline, "run_prompt", reversed_prompt)
+    verdicts, _ = validate(workbook_rows(count=pipeline.BATCH_SIZE + 1), prompts, incremental=False)
+
+    # Still written to gold, but only the single-row batch (which cannot be reordered) is kept for reuse
+    assert len(verdicts) == pipeline.BATCH_SIZE + 1
+    assert list(row_state(prompts)) == [str(1000 + pipeline.BATCH_SIZE)]
+
+
+def test_verdict_must_echo_its_row():
+    row = workbook_rows(count=2)[1]
+
+    assert pipeline.verdict_matches_row({"Concept Label": "Concept 1", "Tag Value": "10"}, row)
+    assert not pipeline.verdict_matches_row({"Concept Label": "Concept 1", "Tag Value": 0.0}, row)
+    assert not pipeline.verdict_matches_row({"Concept Label": "Concept 0"}, row)
+    assert not pipeline.verdict_matches_row({"status": "MATCH"}, row)
@@ -0,0 +1,124 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import pipeline_callAoai as pipeline
+from utils import taxonomy_registry
+from utils.presentation_index import PresentationIndex, local_name, normalize_label
+from utils.row_store import RowStore
+
+TAXONOMY_BLOB = "ireland-frs-2023-frs-101.xlsx"
+OFFICERS_AXIS = "{http://xbrl.frc.org.uk/cd/2023-01-01/business}EntityOfficersDimension"
+
+
+def presentation_sheet():
+    """A Presentation sheet in tree order with depths, roles and a labelled axis, as exports lay it out."""
+    return pd.DataFrame({
+        "ELR": ["[001] Directors"] * 4 + ["[002] Income statement"] * 3,
+        "Level": [1, 2, 3, 3, 1, 2, 2],
+        "Standard Label": [
+            "Directors [table]", "Entity officers [axis]", "Director 1", "Director 2",
+            "Income statement [abstract]", "Turnover / revenue", "Profit (loss)",
+        ],
+        "Terse Label": [None, None, None, None, None, "Revenue", None],
+        "Preferred Label Role": ["terseLabel"] * 7,
+        "Element Name": [
+            "bus:DirectorsTable", "bus:EntityOfficersDimension", "bus:Director1", "bus:Director2",
+            "core:IncomeStatementHeading", "core:TurnoverRevenue", "core:ProfitLoss",
+        ],
+    })
+
+
+def test_index_reads_tree_axes_and_label_variants():
+    index = PresentationIndex.from_dataframe(presentation_sheet())
+
+    assert index.labels == set(presentation_sheet()["Standard Label"])
+    assert index.dimensions == {"EntityOfficersDimension": ["Director1", "Director2"]}
+    assert index.concepts["Director1"]["parents"] == ["EntityOfficersDimension"]
+    assert index.concepts["ProfitLoss"]["parents"] == ["IncomeStatementHeading"]
+    assert index.concepts["IncomeStatementHeading"]["parents"] == []
+    assert index.concepts["ProfitLoss"]["roles"] == ["[002] Income statement"]
+    assert "terselabel" not in index.label_variants  # the preferred-label-role column holds no labels
+
+
+def test_index_without_a_label_column_is_none():
+    assert PresentationIndex.from_dataframe(pd.DataFrame({"Name": ["core:Turnover"]})) is None
+
+
+def test_rows_resolve_by_any_label_variant_or_concept_name():
+    index = PresentationIndex.from_dataframe(presentation_sheet())
+
+    assert index.resolves("  REVENUE ")
+    assert index.resolves("Entity officers")
+    assert index.resolves("Relabelled in a later year", "{http://xbrl.frc.org.uk/fr/2024-01-01/core}ProfitLoss")
+    assert not index.resolves("Relabelled in a later year")
+    assert normalize_label("Entity  Officers [Axis]") == "entity officers"
+    assert local_name("{http://example.com/ns}Turnover") == local_name("core:Turnover") == "Turnover"
+
+
+def test_dimension_members_are_checked_against_the_axis():
+    index = PresentationIndex.from_dataframe(presentation_sheet())
+
+    assert index.dimension_problem(f"{OFFICERS_AXIS}={{http://example.com}}Director2") is None
+    assert "Director9" in index.dimension_problem(f"{OFFICERS_AXIS}={{http://example.com}}Director9")
+    # Axes the taxonomy does not present with members are left to the LLM
+    assert index.dimension_problem("{http://example.com}OtherAxis={http://example.com}Anything") is None
+
+
+def test_index_round_trips_through_json():
+    index = PresentationIndex.from_dataframe(presentation_sheet())
+
+    restored = PresentationIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+
+    assert restored.to_dict() == index.to_dict()
+
+
+@pytest.fixture
+def taxonomy(store):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        presentation_sheet().to_excel(writer, sheet_name="Presentation", index=False)
+    store.put("taxanomy", TAXONOMY_BLOB, buffer.getvalue())
+    return taxonomy_registry.rebuild_registry()
+
+
+def test_registry_rebuild_stores_the_index(store, taxonomy):
+    entry = taxonomy.entry(TAXONOMY_BLOB)
+    stored = json.loads(store.get("manifests", entry["indexPath"]).data)
+
+    assert entry["indexVersion"] == taxonomy_registry.TAXONOMY_INDEX_VERSION
+    assert stored["etag"] == entry["etag"]
+    assert taxonomy_registry.get_taxonomy_index(taxonomy, TAXONOMY_BLOB).to_dict() == stored["presentation"]
+
+
+def test_concept_label_filter_flags_unknown_concepts_and_members(taxonomy):
+    rows = RowStore.from_records([
+        {"ID": 1, "Concept Label": "Revenue", "Dimensions": None},
+        {"ID": 2, "Concept Label": "Director 1", "Concept Name": "bus:Director1",
+         "Dimensions": f"{OFFICERS_AXIS}={{http://example.com}}Director9"},
+        {"ID": 3, "Concept Label": "Not in this taxonomy", "Dimensions": None},
+        {"ID": 4, "Concept Label": "Renamed", "Concept Name": "core:ProfitLoss", "Dimensions": None},
+    ])
+
+    matched, unmatched, reasons = pipeline.concept_label_filter(
+        rows, TAXONOMY_BLOB, pipeline.ValidationContext(taxonomy, None)
+    )
+
+    assert matched.column("ID") == [1, 4]
+    assert "Concept Name" not in matched.columns
+    assert unmatched.column("ID") == [2, 3]
+    assert reasons == [
+        "Dimension member Director9 is not a member of EntityOfficersDimension in matched taxonomy file",
+        "Concept Label not found in matched taxonomy file",
+    ]
+
+
+def test_index_without_a_registry_entry_is_parsed_once(store, taxonomy):
+    store.put("taxanomy", "unregistered-frs-101.xlsx", store.get("taxanomy", TAXONOMY_BLOB).data)
+    first = taxonomy_registry.get_taxonomy_index(None, "unregistered-frs-101.xlsx")
+    reads = store.reads
+
+    assert taxonomy_registry.get_taxonomy_index(None, "unregistered-frs-101.xlsx") is first
+    assert store.reads == reads
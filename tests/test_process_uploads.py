@@ -0,0 +1,106 @@
+import json
+
+import azure.functions as func
+import fitz
+import pytest
+
+import pipeline_processUploads as process_uploads
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = process_uploads.FakeDocumentAnalyzer()
+    monkeypatch.setattr(process_uploads, "_document_client", analyzer)
+    return analyzer
+
+
+def process(*blob_names, **body):
+    response = process_uploads.main(func.HttpRequest(
+        method="POST", url="/api/pipeline_processUploads",
+        body=json.dumps({"blobs": [{"name": name, "container": "bronze"} for name in blob_names], **body}).encode("utf-8")
+    ))
+    return response.status_code, json.loads(response.get_body())
+
+
+def pdf_with_scanned_page():
+    """Page 1 is born-digital; page 2 is a full-page image with a short text header, like a scan."""
+    image = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 100, 100), False)
+    image.clear_with(200)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Directors' report for the year ended 31 December 2023")
+    page = doc.new_page()
+    page.insert_image(page.rect, stream=image.tobytes("png"))
+    page.insert_text((72, 40), "ACME LIMITED - Annual report and financial statements 2023")
+    return doc.tobytes()
+
+
+def test_url_mode_submits_a_sas_url_instead_of_the_document(store, analyzer):
+    store.put("bronze", "scan.png", b"image bytes")
+
+    status, body = process("scan.png")
+
+    assert status == 200 and body["processedFiles"] == ["scan.png"]
+    (model_id, request, _), = analyzer.requests
+    assert model_id == process_uploads.EXTRACTION_MODEL_ID
+    assert request.get("urlSource", "").split("?", 1)[0].endswith("/bronze/scan.png")
+    assert "sig=" in request["urlSource"] and not request.get("base64Source")
+    assert store.get("silver", "scan.txt").data.decode("utf-8").startswith("Fake analysis of ")
+
+
+def test_inline_submission_returns_one_paragraph_per_line(store, analyzer, monkeypatch):
+    monkeypatch.setattr(process_uploads, "DOCUMENT_SUBMISSION_MODE", "bytes")
+    store.put("bronze", "notes.png", b"First line\n\n  Second line  \n")
+
+    status, _ = process("notes.png")
+
+    assert status == 200
+    (_, request, _), = analyzer.requests
+    assert request.get("base64Source") and not request.get("urlSource")
+    assert store.get("silver", "notes.txt").data.decode("utf-8").split() == ["First", "line", "Second", "line"]
+
+
+def test_identical_content_is_served_from_the_extraction_cache(store, analyzer):
+    store.put("bronze", "first.png", b"same content")
+    store.put("bronze", "second.png", b"same content")
+
+    process("first.png")
+    status, body = process("second.png")
+
+    assert status == 200 and body["cacheHits"] == ["second.png"]
+    assert len(analyzer.requests) == 1
+    assert store.get("silver", "second.txt").data == store.get("silver", "first.txt").data
+
+
+def test_cache_misses_once_the_recorded_output_is_overwritten(store, analyzer):
+    store.put("bronze", "first.png", b"same content")
+    process("first.png")
+    store.put("silver", "first.txt", b"extracted from some other upload")
+
+    _, body = process("first.png")
+
+    assert body["cacheHits"] == []
+    assert len(analyzer.requests) == 2
+
+
+def test_pdf_sends_only_pages_without_a_usable_text_layer(store, analyzer):
+    store.put("bronze", "report.pdf", pdf_with_scanned_page())
+
+    status, _ = process("report.pdf")
+
+    assert status == 200
+    (_, _, kwargs), = analyzer.requests
+    assert kwargs == {"pages": "2"}
+    text = store.get("silver", "report.txt").data.decode("utf-8")
+    assert "Directors' report for the year ended 31 December 2023" in text
+    assert "Fake analysis of " in text
+
+
+def test_pdf_pymupdf_cannot_open_goes_to_document_intelligence_whole(store, analyzer):
+    store.put("bronze", "broken.pdf", b"not really a pdf")
+
+    status, body = process("broken.pdf")
+
+    assert status == 200 and body["processedFiles"] == ["broken.pdf"]
+    (_, _, kwargs), = analyzer.requests
+    assert kwargs == {}
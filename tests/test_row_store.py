@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+
+from conftest import DATA_DIR
+from utils.row_store import RowStore
+from utils.workbook_parsing import parse_excel_bytes
+
+REVIEW_WORKBOOK = os.path.join(DATA_DIR, "ASDF - Accounts, 2023 - FRS 101(Ireland) - 1_review.xlsx")
+
+
+def frame():
+    return pd.DataFrame({
+        "ID": [101, 102, 103, 104],
+        "Concept Label": ["Turnover", "Cost of sales", None, "Profit (loss)"],
+        "Tag Value": [1000.0, 250.0, 3.5, -20.0],
+    })
+
+
+def test_records_match_dataframe_records():
+    df = frame()
+    rows = RowStore.from_dataframe(df)
+
+    assert rows.to_records() == df.to_dict(orient="records")
+    assert len(rows) == len(df) and bool(rows)
+    assert rows[1] == df.to_dict(orient="records")[1]
+
+
+def test_take_slice_and_drop_match_dataframe_selection():
+    df = frame()
+    rows = RowStore.from_dataframe(df)
+
+    assert rows.take([3, 0]).to_records() == df.iloc[[3, 0]].to_dict(orient="records")
+    assert rows[1:3].column("ID") == df["ID"].iloc[1:3].tolist()
+    assert rows.drop("ID").columns == ["Concept Label", "Tag Value"]
+    assert rows.column("Missing", "") == ["", "", "", ""]
+
+
+def test_from_records_round_trips():
+    records = [{"ID": 1, "Concept Label": "Turnover"}, {"ID": 2, "Concept Label": "Revenue", "Dimensions": "x"}]
+
+    rows = RowStore.from_records(records)
+
+    assert rows.columns == ["ID", "Concept Label", "Dimensions"]
+    assert rows.to_records() == [{**records[0], "Dimensions": None}, records[1]]
+
+
+def test_parsed_workbook_rows_match_the_filing_details_sheet():
+    with open(REVIEW_WORKBOOK, "rb") as f:
+        parsed = parse_excel_bytes(os.path.basename(REVIEW_WORKBOOK), f.read())
+
+    details = pd.read_excel(REVIEW_WORKBOOK, sheet_name="Filing Details")
+    expected = details[["Line Item Description", "Concept Label", "Comment Text", "Dimensions", "Tag Value"]].dropna(how="all")
+    rows = parsed["excel_rows"]
+
+    assert isinstance(rows, RowStore)
+    assert len(rows) == len(expected)
+    assert pd.Series(rows.column("Concept Label")).equals(expected["Concept Label"].reset_index(drop=True))
+    assert rows.column("ID") == details.loc[expected.index, "ID"].tolist()
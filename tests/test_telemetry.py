@@ -0,0 +1,28 @@
+import httpx
+from openai import AzureOpenAI, DefaultHttpxClient
+
+from utils.telemetry import record_sdk_retry, run_summary, span, start_run
+
+COMPLETION = {
+    "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+}
+
+
+def test_sdk_retries_are_counted_on_the_active_span(monkeypatch):
+    monkeypatch.setattr("openai._base_client.BaseClient._calculate_retry_timeout", lambda *args: 0)
+    responses = iter([httpx.Response(429), httpx.Response(500), httpx.Response(200, json=COMPLETION)])
+    client = AzureOpenAI(
+        api_key="key", api_version="2024-05-01-preview", azure_endpoint="https://example.openai.azure.com",
+        http_client=DefaultHttpxClient(
+            event_hooks={"request": [record_sdk_retry]}, transport=httpx.MockTransport(lambda request: next(responses))
+        ),
+    )
+
+    with start_run():
+        with span("llm_call"):
+            client.chat.completions.create(model="m", messages=[{"role": "system", "content": "validate"}])
+        summary = run_summary()
+
+    assert summary["stages"]["llm_call"]["llm_retries"] == 2
+    assert summary["totals"]["llm_retries"] == 2 and summary["totals"]["index_retries"] == 0
@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import logging
+import posixpath
+from datetime import datetime, timezone
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
+from utils.blob_functions import (MANIFEST_CONTAINER, delete_blob, get_blob_etag, get_blob_with_etag,
+                                  write_blob_if_unchanged)
+from utils.filings import REVIEW_SUFFIX, filing_key
+from utils.storage_client import create_queue_client
+
+# Must match the queueName of pipeline_validateQueuedFiling/function.json
+VALIDATION_QUEUE_NAME = "filing-validation"
+# Queued filings stay invisible this long, so the workbook and HTML of one
+# upload (and quick re-uploads) settle into a single validation run
+VALIDATION_DEBOUNCE_SECONDS = int(os.getenv("VALIDATION_DEBOUNCE_SECONDS", "60"))
+# One marker per filing in MANIFEST_CONTAINER records what was last queued and validated
+VALIDATION_MARKER_PREFIX = "validation-queue/"
+WORKBOOK_EXTENSIONS = (".xlsx", ".xls")
+HTML_EXTENSIONS = (".html", ".htm")
+
+
+def marker_path(filing):
+    return f"{VALIDATION_MARKER_PREFIX}{filing}.json"
+
+
+def filing_pair(container_name, blob_name):
+    """Return the filing's [review workbook, HTML] blob dicts with etags, or None while either is missing."""
+    folder = posixpath.dirname(blob_name)
+    base = posixpath.join(folder, filing_key(blob_name)) if folder else filing_key(blob_name)
+    pair = []
+    for candidates in ([base + REVIEW_SUFFIX + ext for ext in WORKBOOK_EXTENSIONS],
+                       [base + ext for ext in HTML_EXTENSIONS]):
+        found = None
+        for name in candidates:
+            etag = get_blob_etag(container_name, name)
+            if etag:
+                found = {"name": name, "container": container_name, "etag": etag}
+                break
+        if not found:
+            return None
+        pair.append(found)
+    return pair
+
+
+def pair_fingerprint(pair):
+    """Identify one version of a filing's inputs: a hash of each blob's name and etag."""
+    text = "|".join(f"{blob['name']}:{blob['etag']}" for blob in sorted(pair, key=lambda blob: blob["name"]))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def load_marker(filing):
+    """Return (marker, etag), or (None, None) if the filing was never queued."""
+    content, etag = get_blob_with_etag(MANIFEST_CONTAINER, marker_path(filing))
+    return (json.loads(content), etag) if content is not None else (None, None)
+
+
+def queue_filing_if_complete(container_name, blob_name):
+    """Queue a filing for validation once its workbook and HTML are both present.
+
+    Every upload of either file lands here, often twice for the same content
+    (both halves of a pair, redelivered events). The
+    marker's fingerprint deduplicates those, and the etag-conditional marker
+    write lets exactly one concurrent trigger enqueue a given version. The
+    message is delayed by VALIDATION_DEBOUNCE_SECONDS; a newer upload in that
+    window replaces the marker and the older message is dropped when it runs.
+    Returns the queued message, or None.
+    """
+    if not blob_name.lower().endswith(WORKBOOK_EXTENSIONS + HTML_EXTENSIONS):
+        return None
+    filing = filing_key(blob_name)
+    pair = filing_pair(container_name, blob_name)
+    if not pair:
+        logging.info(f"Filing {filing} is not complete yet; waiting for its workbook and HTML")
+        return None
+
+    fingerprint = pair_fingerprint(pair)
+    marker, etag = load_marker(filing)
+    if marker and marker.get("fingerprint") == fingerprint:
+        logging.info(f"Filing {filing} version {fingerprint} is already queued or validated")
+        return None
+
+    message = {
+        "filing": filing,
+        "blobs": [{"name": blob["name"], "container": blob["container"]} for blob in pair],
+        "fingerprint": fingerprint,
+    }
+    new_marker = {**message, "etags": {blob["name"]: blob["etag"] for blob in pair},
+                  "queuedAt": datetime.now(timezone.utc).isoformat()}
+    try:
+        write_blob_if_unchanged(
+            MANIFEST_CONTAINER, marker_path(filing), json.dumps(new_marker).encode("utf-8"), etag,
+            content_type="application/json"
+        )
+    except (ResourceModifiedError, ResourceExistsError):
+        logging.info(f"Filing {filing} was queued by a concurrent trigger")
+        return None
+
+    try:
+        create_queue_client(VALIDATION_QUEUE_NAME).send_message(
+            json.dumps(message), visibility_timeout=VALIDATION_DEBOUNCE_SECONDS
+        )
+    except Exception:
+        # Without a message the marker would suppress every retry of this version
+        try:
+            delete_blob(MANIFEST_CONTAINER, marker_path(filing))
+        except ResourceNotFoundError:
+            pass
+        raise
+    logging.info(f"Queued filing {filing} version {fingerprint} in {VALIDATION_DEBOUNCE_SECONDS}s")
+    return message
+
+
+def should_validate(message):
+    """True if the message is still the filing's latest version, not yet validated, and its inputs are unchanged."""
+    filing = message["filing"]
+    marker, _ = load_marker(filing)
+    if not marker or marker.get("fingerprint") != message["fingerprint"]:
+        logging.info(f"Skipping superseded validation of {filing} version {message['fingerprint']}")
+        return False
+    if marker.get("validatedAt"):
+        logging.info(f"Filing {filing} version {message['fingerprint']} was already validated")
+        return False
+    for blob in message["blobs"]:
+        if get_blob_etag(blob["container"], blob["name"]) != marker["etags"].get(blob["name"]):
+            # The upload that changed it queues its own validation
+            logging.info(f"Skipping validation of {filing}: {blob['name']} changed since it was queued")
+            return False
+    return True
+
+
+def mark_validated(message, result):
+    """Record the run on the marker so redelivered messages are skipped; a newer version is left alone."""
+    marker, etag = load_marker(message["filing"])
+    if not marker or marker.get("fingerprint") != message["fingerprint"]:
+        return
+    marker.update({
+        "validatedAt": datetime.now(timezone.utc).isoformat(),
+        "outputFile": result.get("outputFile"),
+        "status": result.get("status"),
+    })
+    try:
+        write_blob_if_unchanged(
+            MANIFEST_CONTAINER, marker_path(message["filing"]), json.dumps(marker).encode("utf-8"), etag,
+            content_type="application/json"
+        )
+    except (ResourceModifiedError, ResourceExistsError):
+        logging.info(f"Marker for {message['filing']} changed while recording the run; leaving the newer one")
@@ -1,7 +1,9 @@
-from openai import AzureOpenAI
+from openai import AzureOpenAI, DefaultHttpxClient
 import os 
 import logging
+import threading
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+from utils.telemetry import record_sdk_retry, record_token_usage
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
@@ -33,25 +35,45 @@ OPENAI_API_EMBEDDING_MODEL = os.getenv("OPENAI_API_EMBEDDING_MODEL")
 #     return embedding
 
 
-def run_prompt(prompt,system_prompt):
-    credential = DefaultAzureCredential()
-    token_provider = get_bearer_token_provider(  
-        DefaultAzureCredential(),  
-        "https://cognitiveservices.azure.com/.default"  
-    )  
+_client = None
+_client_lock = threading.Lock()
 
-    token = credential.get_token("https://cognitiveservices.azure.com/.default").token
-    
-    openai_client = AzureOpenAI(
-        azure_ad_token=token,
-        api_version = OPENAI_API_VERSION,
-        azure_endpoint =OPENAI_API_BASE
-    )
+def get_openai_client():
+    """Return the process-wide client; its connection pool and token cache are shared by every request."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # The SDK retries 429s and 5xxs internally; the hook counts those attempts in telemetry
+            http_client = DefaultHttpxClient(event_hooks={"request": [record_sdk_retry]})
+            if OPENAI_API_KEY:
+                # Key auth is for local runs against a stub or dev endpoint; Azure uses Entra ID
+                _client = AzureOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    api_version = OPENAI_API_VERSION,
+                    azure_endpoint =OPENAI_API_BASE,
+                    http_client=http_client
+                )
+            else:
+                # The token provider refreshes the token as it nears expiry
+                token_provider = get_bearer_token_provider(
+                    DefaultAzureCredential(),
+                    "https://cognitiveservices.azure.com/.default"
+                )
+                _client = AzureOpenAI(
+                    azure_ad_token_provider=token_provider,
+                    api_version = OPENAI_API_VERSION,
+                    azure_endpoint =OPENAI_API_BASE,
+                    http_client=http_client
+                )
+        return _client
 
+def run_prompt(prompt,system_prompt):
+    openai_client = get_openai_client()
 
     response = openai_client.chat.completions.create(
         model=OPENAI_MODEL,
         messages=[{ "role": "system", "content": system_prompt}])
-    
+
+    record_token_usage(response.usage)
     return response.choices[0].message.content
 
@@ -0,0 +1,21 @@
+import logging
+
+BLOB_CREATED = "Microsoft.Storage.BlobCreated"
+BLOB_DELETED = "Microsoft.Storage.BlobDeleted"
+# Storage event subjects look like /blobServices/default/containers/<container>/blobs/<blob name>
+SUBJECT_PREFIX = "/blobServices/default/containers/"
+
+
+def blob_from_event(event, container_name, event_types=(BLOB_CREATED,)):
+    """Return the blob name a storage event refers to, or None if it is for another container or event type.
+
+    Only the event is read; the blob itself is never downloaded.
+    """
+    if event.event_type not in event_types:
+        logging.info(f"Ignoring {event.event_type} event for {event.subject}")
+        return None
+    container, _, blob_name = event.subject[len(SUBJECT_PREFIX):].partition("/blobs/")
+    if not event.subject.startswith(SUBJECT_PREFIX) or container != container_name or not blob_name:
+        logging.info(f"Ignoring event for {event.subject}; expected a blob in {container_name}")
+        return None
+    return blob_name
@@ -1,43 +1,55 @@
 import os
 import logging
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobBlock, ContentSettings
 import base64
 import json
+import hashlib
+import uuid
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError, ResourceModifiedError
+from utils.storage_client import STORAGE_CONNECTION_STRING, create_blob_service_client
 ACCOUNT_NAME = os.getenv("AzureWebJobsStorage__accountName")
 BLOB_ENDPOINT=f"https://{ACCOUNT_NAME}.blob.core.windows.net"
 
 blob_credential = DefaultAzureCredential()  # Uses managed identity or local login
 
-token = blob_credential.get_token("https://storage.azure.com/.default")
+# The token inspection only applies to managed identity / local login
+if not STORAGE_CONNECTION_STRING:
+    token = blob_credential.get_token("https://storage.azure.com/.default")
 
-# Decode the token for inspection
-jwt_token = token.token.split(".")
-header = json.loads(base64.urlsafe_b64decode(jwt_token[0] + "=="))
-payload = json.loads(base64.urlsafe_b64decode(jwt_token[1] + "=="))
+    # Decode the token for inspection
+    jwt_token = token.token.split(".")
+    header = json.loads(base64.urlsafe_b64decode(jwt_token[0] + "=="))
+    payload = json.loads(base64.urlsafe_b64decode(jwt_token[1] + "=="))
 
-logging.info("=== Token Header ===")
-logging.info(json.dumps(header, indent=4))
+    logging.info("=== Token Header ===")
+    logging.info(json.dumps(header, indent=4))
 
-logging.info("\n=== Token Payload ===")
-logging.info(json.dumps(payload, indent=4))
-# Decode the token for inspection
-jwt_token = token.token.split(".")
-header = json.loads(base64.urlsafe_b64decode(jwt_token[0] + "=="))
-payload = json.loads(base64.urlsafe_b64decode(jwt_token[1] + "=="))
+    logging.info("\n=== Token Payload ===")
+    logging.info(json.dumps(payload, indent=4))
+    # Decode the token for inspection
+    jwt_token = token.token.split(".")
+    header = json.loads(base64.urlsafe_b64decode(jwt_token[0] + "=="))
+    payload = json.loads(base64.urlsafe_b64decode(jwt_token[1] + "=="))
 
-print("=== Token Header ===")
-print(json.dumps(header, indent=4))
+    print("=== Token Header ===")
+    print(json.dumps(header, indent=4))
 
-print("\n=== Token Payload ===")
-print(json.dumps(payload, indent=4))
+    print("\n=== Token Payload ===")
+    print(json.dumps(payload, indent=4))
 
-
-
-blob_service_client = BlobServiceClient(account_url=BLOB_ENDPOINT, credential=blob_credential)
+blob_service_client = create_blob_service_client(blob_credential)
+if STORAGE_CONNECTION_STRING:
+    BLOB_ENDPOINT = blob_service_client.primary_endpoint.rstrip("/")
 
 logging.info(f"BLOB_ENDPOINT: {BLOB_ENDPOINT}")
 
+# Container for pipeline bookkeeping (caches, indexes) kept out of the UI listings
+MANIFEST_CONTAINER = os.getenv("MANIFEST_CONTAINER", "manifests")
+# Blob metadata key under which a content hash is memoised once computed
+CONTENT_HASH_METADATA_KEY = "sha256"
+
 def write_to_blob(container_name, blob_path, data):
 
     blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
@@ -50,9 +62,9 @@ def get_blob_content(container_name, blob_path):
     blob_content = blob_client.download_blob().readall()
     return blob_content
 
-def list_blobs(container_name):
+def list_blobs(container_name, name_starts_with=None):
     container_client = blob_service_client.get_container_client(container_name)
-    blob_list = container_client.list_blobs()
+    blob_list = container_client.list_blobs(name_starts_with=name_starts_with)
     return blob_list
 
 def delete_all_blobs_in_container(container_name):
@@ -60,4 +72,148 @@ def delete_all_blobs_in_container(container_name):
     blob_list = container_client.list_blobs()
     for blob in blob_list:
         blob_client = container_client.get_blob_client(blob.name)
-        blob_client.delete_blob()
\ No newline at end of file
+        blob_client.delete_blob()
+
+def blob_exists(container_name, blob_path):
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    return blob_client.exists()
+
+def get_blob_etag(container_name, blob_path):
+    """Return a blob's etag without downloading it, or None if it does not exist."""
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    try:
+        return blob_client.get_blob_properties().etag
+    except ResourceNotFoundError:
+        return None
+
+def delete_blob(container_name, blob_path):
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    blob_client.delete_blob()
+
+def get_blob_sha256(container_name, blob_path):
+    """Hash a blob chunk by chunk so memory stays bounded for large documents."""
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    digest = hashlib.sha256()
+    for chunk in blob_client.download_blob().chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def get_blob_content_key(container_name, blob_path):
+    """Identify a blob's content without downloading it where possible.
+
+    Uses the sha256 memoised in the blob's metadata, else the Content-MD5 the
+    service stored at upload ("md5-<hex>"). Only when neither exists is the
+    blob hashed, and the hash is then memoised in its metadata for next time.
+    """
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    properties = blob_client.get_blob_properties()
+    metadata = properties.metadata or {}
+    if metadata.get(CONTENT_HASH_METADATA_KEY):
+        return metadata[CONTENT_HASH_METADATA_KEY]
+    content_md5 = properties.content_settings.content_md5
+    if content_md5:
+        return f"md5-{bytes(content_md5).hex()}"
+
+    digest = hashlib.sha256()
+    downloader = blob_client.download_blob(etag=properties.etag, match_condition=MatchConditions.IfNotModified)
+    for chunk in downloader.chunks():
+        digest.update(chunk)
+    content_hash = digest.hexdigest()
+    try:
+        blob_client.set_blob_metadata(
+            {**metadata, CONTENT_HASH_METADATA_KEY: content_hash},
+            etag=properties.etag, match_condition=MatchConditions.IfNotModified
+        )
+    except ResourceModifiedError:
+        logging.info(f"{container_name}/{blob_path} changed while hashing; content hash not memoised")
+    return content_hash
+
+def get_json_blob(container_name, blob_path):
+    """Return the parsed JSON content of a blob, or None if it does not exist."""
+    try:
+        return json.loads(get_blob_content(container_name, blob_path))
+    except ResourceNotFoundError:
+        return None
+
+def get_blob_with_etag(container_name, blob_path):
+    """Return (content, etag) for a blob, or (None, None) if it does not exist."""
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    try:
+        downloader = blob_client.download_blob()
+    except ResourceNotFoundError:
+        return None, None
+    return downloader.readall(), downloader.properties.etag
+
+def write_blob_if_unchanged(container_name, blob_path, data, etag, content_type=None):
+    """Overwrite a blob only if it still has the given etag (or create it only if etag is None).
+
+    Raises ResourceModifiedError / ResourceExistsError when another writer got there first.
+    """
+    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+    content_settings = ContentSettings(content_type=content_type) if content_type else None
+    if etag is None:
+        blob_client.upload_blob(data, overwrite=False, content_settings=content_settings)
+    else:
+        blob_client.upload_blob(
+            data, overwrite=True, content_settings=content_settings,
+            etag=etag, match_condition=MatchConditions.IfNotModified
+        )
+
+class BlockBlobWriter:
+    """Write a block blob incrementally.
+
+    Bytes are buffered up to block_size and staged as uncommitted blocks; close()
+    commits the block list, so the blob only becomes visible once complete and
+    memory is bounded by one block regardless of the total size.
+    """
+
+    def __init__(self, container_name, blob_path, block_size=4 * 1024 * 1024, content_type=None):
+        self.blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_path)
+        self.block_size = block_size
+        self.content_type = content_type
+        self.block_ids = []
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        # Random prefix so a concurrent writer to the same blob cannot commit our blocks
+        self._prefix = uuid.uuid4().hex[:16]
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        block_id = base64.b64encode(f"{self._prefix}-{len(self.block_ids):08d}".encode("utf-8")).decode("utf-8")
+        self.blob_client.stage_block(block_id=block_id, data=bytes(self._buffer))
+        self.block_ids.append(block_id)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        content_settings = ContentSettings(content_type=self.content_type) if self.content_type else None
+        self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self.block_ids],
+            content_settings=content_settings
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Leave uncommitted blocks to be garbage collected if writing failed
+        if exc_type is None:
+            self.close()
+
+def write_jsonl_to_blob(container_name, blob_path, records):
+    """Stream an iterable of JSON-serialisable records to a JSON Lines blob."""
+    count = 0
+    with BlockBlobWriter(container_name, blob_path, content_type="application/x-ndjson") as writer:
+        for record in records:
+            writer.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
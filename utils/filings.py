@@ -0,0 +1,26 @@
+import os
+
+# Review workbooks are uploaded as "<filing>_review.xlsx" next to "<filing>.html"
+REVIEW_SUFFIX = "_review"
+
+
+def filing_key(blob_name):
+    """Return the filing a blob belongs to: its base name without extension or review suffix."""
+    base = os.path.splitext(os.path.basename(blob_name))[0]
+    if base.lower().endswith(REVIEW_SUFFIX):
+        base = base[:-len(REVIEW_SUFFIX)]
+    return base.strip()
+
+
+def run_filing_key(blob_names):
+    """Pick the filing key for a run, preferring the review workbook over the HTML."""
+    workbooks = [name for name in blob_names if name.lower().endswith((".xlsx", ".xls"))]
+    return filing_key((workbooks or list(blob_names))[0])
+
+
+def group_blobs_by_filing(blobs):
+    """Group blob dicts ({"name", "container"}) by filing key, keeping first-seen order."""
+    filings = {}
+    for blob in blobs:
+        filings.setdefault(filing_key(blob.get("name") or ""), []).append(blob)
+    return filings
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
+from utils.blob_functions import MANIFEST_CONTAINER, get_blob_with_etag, list_blobs, write_blob_if_unchanged
+from utils.telemetry import add_to_current_span
+
+# One index blob per filing under this prefix, so concurrent runs of different
+# filings never contend for the same blob
+GOLD_INDEX_PREFIX = os.getenv("GOLD_INDEX_PREFIX", "gold-index/")
+# Older runs per filing are dropped from the index (their outputs stay in gold)
+GOLD_INDEX_MAX_RUNS_PER_FILING = int(os.getenv("GOLD_INDEX_MAX_RUNS_PER_FILING", "20"))
+GOLD_INDEX_MAX_RETRIES = 10
+# Conflicting writers wait a random time up to this base, doubled per attempt, before re-reading
+GOLD_INDEX_RETRY_BACKOFF = 0.05
+GOLD_INDEX_READ_WORKERS = 8
+
+
+def index_path(filing):
+    return f"{GOLD_INDEX_PREFIX}{filing}.json"
+
+
+def load_filing_runs(filing):
+    """Return (runs, etag) for one filing, newest first; an empty list and None if it was never indexed."""
+    content, etag = get_blob_with_etag(MANIFEST_CONTAINER, index_path(filing))
+    if content is None:
+        return [], None
+    return json.loads(content)["runs"], etag
+
+
+def load_index(filing=None):
+    """Collect the per-filing indexes into {"filings": {key: runs}, "updatedAt": ...}.
+
+    filing narrows the read to filings whose key contains it (case-insensitive),
+    matched on the blob names so other filings are not downloaded.
+    """
+    filings = []
+    for blob in list_blobs(MANIFEST_CONTAINER, name_starts_with=GOLD_INDEX_PREFIX):
+        key = blob.name[len(GOLD_INDEX_PREFIX):-len(".json")]
+        if blob.name.endswith(".json") and (not filing or filing.lower() in key.lower()):
+            filings.append(key)
+    with ThreadPoolExecutor(max_workers=GOLD_INDEX_READ_WORKERS) as executor:
+        runs = list(executor.map(lambda key: load_filing_runs(key)[0], filings))
+    index = {"filings": {key: filing_runs for key, filing_runs in zip(filings, runs) if filing_runs}}
+    index["updatedAt"] = max((filing_runs[0]["runAt"] for filing_runs in index["filings"].values()), default=None)
+    return index
+
+
+def build_run_entry(filing, inputs, output_file, status_counts, taxonomy_file=None, taxonomy_name=None,
+                    parquet_file=None, errors=None):
+    return {
+        "filingKey": filing,
+        "runAt": datetime.now(timezone.utc).isoformat(),
+        "inputs": list(inputs),
+        "taxonomyName": taxonomy_name,
+        "taxonomyFile": taxonomy_file,
+        "outputContainer": "gold",
+        "outputFile": output_file,
+        "parquetFile": parquet_file,
+        "counts": dict(status_counts),
+        "total": sum(status_counts.values()),
+        "errors": list(errors or []),
+    }
+
+
+def record_run(entry):
+    """Add a run to its filing's index with an optimistic, etag-conditional read-modify-write.
+
+    Only runs of the same filing share a blob; when one updated it in between,
+    the writer backs off with jitter and retries, so no entry is lost without
+    needing a lease.
+    """
+    filing = entry["filingKey"]
+    for attempt in range(GOLD_INDEX_MAX_RETRIES):
+        runs, etag = load_filing_runs(filing)
+        runs.insert(0, entry)
+        del runs[GOLD_INDEX_MAX_RUNS_PER_FILING:]
+        try:
+            write_blob_if_unchanged(
+                MANIFEST_CONTAINER, index_path(filing),
+                json.dumps({"filingKey": filing, "runs": runs}).encode("utf-8"), etag,
+                content_type="application/json"
+            )
+            return entry
+        except (ResourceModifiedError, ResourceExistsError):
+            add_to_current_span("index_retries")
+            logging.info(f"Gold index for {filing} changed during update, retrying ({attempt + 1}/{GOLD_INDEX_MAX_RETRIES})")
+            time.sleep(random.uniform(0, GOLD_INDEX_RETRY_BACKOFF * 2 ** attempt))
+    raise RuntimeError(f"Could not update gold index for {filing} after {GOLD_INDEX_MAX_RETRIES} attempts")
+
+
+def query_runs(index, filing=None, status=None, latest=True):
+    """Filter indexed runs by filing key (case-insensitive substring) and by a status present in the counts.
+
+    With latest=True only each filing's most recent run is considered, so a
+    status filter answers "which filings currently have rows in this status".
+    """
+    runs = []
+    for key, filing_runs in index.get("filings", {}).items():
+        if filing and filing.lower() not in key.lower():
+            continue
+        for run in filing_runs[:1] if latest else filing_runs:
+            if not status or run.get("counts", {}).get(status):
+                runs.append(run)
+    return sorted(runs, key=lambda run: run["runAt"], reverse=True)
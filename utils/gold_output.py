@@ -0,0 +1,79 @@
+import os
+import json
+from collections import Counter
+from utils.blob_functions import BlockBlobWriter
+
+# "json" streams the usual indented JSON array; "jsonl" writes one verdict per line
+GOLD_OUTPUT_FORMAT = os.getenv("GOLD_OUTPUT_FORMAT", "json").lower()
+
+
+def verdict_status_reason(item):
+    """Pull (status, reason) out of one verdict.
+
+    The LLM is not consistent about where it puts the result, so accept the
+    flat form, the "Validation" object from the prompt example and the
+    "validation_result" list used for unmatched rows.
+    """
+    if not isinstance(item, dict):
+        return None, None
+    if "error" in item:
+        return "ERROR", str(item["error"])
+    for key in ("Validation", "validation", "validation_result"):
+        nested = item.get(key)
+        if isinstance(nested, list):
+            nested = nested[0] if nested else None
+        if isinstance(nested, dict):
+            return nested.get("status"), nested.get("reason")
+    return item.get("status"), item.get("reason")
+
+
+class GoldOutputWriter:
+    """Stream validation results into a gold blob as they are produced.
+
+    Items are serialised one at a time into staged blocks and the block list
+    is committed on close(), so peak memory is one block rather than the whole
+    output, and a failed run never leaves a partial blob behind. The "json"
+    layout matches json.dumps(items, indent=2) so existing readers are unaffected.
+    """
+
+    def __init__(self, output_name, output_format=GOLD_OUTPUT_FORMAT, container_name="gold"):
+        self.output_name = output_name
+        self.output_format = output_format
+        content_type = "application/x-ndjson" if output_format == "jsonl" else "application/json"
+        self._writer = BlockBlobWriter(container_name, output_name, content_type=content_type)
+        self.count = 0
+        # Row verdicts per status, for the gold index
+        self.status_counts = Counter()
+
+    def write(self, item):
+        if self.output_format == "jsonl":
+            self._writer.write(json.dumps(item) + "\n")
+        else:
+            body = json.dumps(item, indent=2).replace("\n", "\n  ")
+            self._writer.write(("[\n  " if self.count == 0 else ",\n  ") + body)
+        self.count += 1
+        status, _ = verdict_status_reason(item)
+        if status:
+            self.status_counts[status] += 1
+
+    def write_many(self, items):
+        for item in items:
+            self.write(item)
+
+    def close(self):
+        if self.output_format != "jsonl":
+            self._writer.write("\n]" if self.count else "[]")
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+def gold_output_name(first_blob_name, timestamp, output_format=GOLD_OUTPUT_FORMAT):
+    base_filename = os.path.splitext(os.path.basename(first_blob_name))[0]
+    extension = output_format if output_format in ("jsonl", "parquet") else "json"
+    return f"{base_filename}-validated-output-{timestamp}.{extension}"
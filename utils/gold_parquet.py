@@ -0,0 +1,94 @@
+import io
+import os
+import logging
+from utils.blob_functions import write_to_blob
+from utils.gold_output import verdict_status_reason
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed when GOLD_PARQUET_OUTPUT is on
+    pa = None
+    pq = None
+
+# Write a typed Parquet copy of the row verdicts next to the JSON gold output
+GOLD_PARQUET_OUTPUT = os.getenv("GOLD_PARQUET_OUTPUT", "false").lower() == "true"
+# Rows buffered before they are flushed as one Parquet row group
+GOLD_PARQUET_ROW_GROUP_SIZE = int(os.getenv("GOLD_PARQUET_ROW_GROUP_SIZE", "10000"))
+
+VERDICT_SCHEMA = pa.schema([
+    ("blob", pa.string()),
+    ("concept_label", pa.string()),
+    ("status", pa.string()),
+    ("reason", pa.string()),
+    ("batch_id", pa.int32()),
+    ("model", pa.string()),
+    ("prompt_version", pa.string()),
+]) if pa else None
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+class GoldParquetWriter:
+    """Collect row verdicts into a Parquet file with one typed column per field.
+
+    Rows are flushed as row groups so only GOLD_PARQUET_ROW_GROUP_SIZE rows are
+    held as Python objects at a time. The compressed file is built in memory
+    and uploaded on close(); like the JSON writer, nothing is written to gold
+    if the run fails.
+    """
+
+    def __init__(self, output_name, model, prompt_version, container_name="gold"):
+        self.output_name = output_name
+        self.container_name = container_name
+        self.model = model
+        self.prompt_version = prompt_version
+        self.count = 0
+        self._rows = {name: [] for name in VERDICT_SCHEMA.names}
+        self._buffer = io.BytesIO()
+        self._writer = pq.ParquetWriter(self._buffer, VERDICT_SCHEMA, compression="zstd")
+
+    def write(self, blob_name, item, batch_id=None):
+        status, reason = verdict_status_reason(item)
+        concept_label = item.get("Concept Label") if isinstance(item, dict) else None
+        row = {
+            "blob": blob_name,
+            "concept_label": _text(concept_label),
+            "status": _text(status),
+            "reason": _text(reason),
+            "batch_id": batch_id,
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+        }
+        for name, value in row.items():
+            self._rows[name].append(value)
+        self.count += 1
+        if len(self._rows["blob"]) >= GOLD_PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def write_many(self, blob_name, items, batch_id=None):
+        for item in items:
+            self.write(blob_name, item, batch_id)
+
+    def _flush(self):
+        if self._rows["blob"]:
+            self._writer.write_table(pa.table(self._rows, schema=VERDICT_SCHEMA))
+            self._rows = {name: [] for name in VERDICT_SCHEMA.names}
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        write_to_blob(self.container_name, self.output_name, self._buffer.getvalue())
+        logging.info(f"Wrote {self.count} verdicts to {self.container_name}/{self.output_name}")
+
+
+def open_gold_parquet_writer(output_name, model, prompt_version, container_name="gold"):
+    """Return a GoldParquetWriter when Parquet output is enabled and pyarrow is installed, else None."""
+    if not GOLD_PARQUET_OUTPUT:
+        return None
+    if pa is None:
+        logging.warning("GOLD_PARQUET_OUTPUT is enabled but pyarrow is not installed; skipping Parquet output")
+        return None
+    return GoldParquetWriter(output_name, model, prompt_version, container_name)
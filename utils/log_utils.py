@@ -0,0 +1,62 @@
+import os
+import json
+import random
+import hashlib
+import logging
+
+# Payload logs are capped to this many characters; the full length and a hash
+# are kept so a truncated record can still be matched against its source.
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "1000"))
+# Fraction of INFO/DEBUG payload records that are emitted; warnings and errors are never sampled
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+
+
+# Parent of every subsystem logger, so LOG_LEVEL_PIPELINE also sets the default for the others
+LOGGER_ROOT = "pipeline"
+
+
+def get_logger(subsystem):
+    """Return the "pipeline.<subsystem>" logger, honouring LOG_LEVEL_<SUBSYSTEM> (e.g. LOG_LEVEL_LLM=WARNING).
+
+    get_logger("pipeline") is the root logger itself. An unrecognised level is
+    logged and replaced by INFO rather than failing the import.
+    """
+    if subsystem == LOGGER_ROOT or subsystem.startswith(f"{LOGGER_ROOT}."):
+        name = subsystem
+    else:
+        name = f"{LOGGER_ROOT}.{subsystem}"
+    logger = logging.getLogger(name)
+    setting = f"LOG_LEVEL_{name.split('.')[-1].upper()}"
+    level = os.getenv(setting)
+    if level:
+        try:
+            logger.setLevel(level.strip().upper())
+        except ValueError:
+            logging.warning(f"Invalid {setting}={level!r}; using INFO")
+            logger.setLevel(logging.INFO)
+    return logger
+
+
+def summarize_payload(value, max_chars=LOG_PAYLOAD_MAX_CHARS):
+    """Render a payload as '[<length> chars sha256:<hash>] <first max_chars characters>'."""
+    text = value if isinstance(value, str) else json.dumps(value, default=str, ensure_ascii=False)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    length = len(text)
+    if length > max_chars:
+        text = text[:max_chars] + "..."
+    return f"[{length} chars sha256:{digest}] {text}"
+
+
+def log_payload(logger, level, label, value, sample_rate=None, max_chars=LOG_PAYLOAD_MAX_CHARS):
+    """Log a large payload truncated and hashed.
+
+    Nothing is serialised when the logger is disabled for the level or the
+    record is sampled out, so turning a subsystem down removes the cost of
+    rendering its payloads as well as the ingestion.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    sample_rate = LOG_PAYLOAD_SAMPLE_RATE if sample_rate is None else sample_rate
+    if level < logging.WARNING and sample_rate < 1 and random.random() >= sample_rate:
+        return
+    logger.log(level, f"{label}: {summarize_payload(value, max_chars)}")
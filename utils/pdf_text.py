@@ -0,0 +1,64 @@
+import os
+import fitz
+
+PDF_MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", "40"))
+PDF_MIN_PRINTABLE_RATIO = float(os.getenv("PDF_MIN_PRINTABLE_RATIO", "0.9"))
+# Pages at least this much covered by images are treated as scanned whatever their text;
+# a scan with an OCR'd header or a stamp still has its body only in the image
+PDF_MAX_IMAGE_COVERAGE = float(os.getenv("PDF_MAX_IMAGE_COVERAGE", "0.5"))
+# PyMuPDF coordinates are points; Document Intelligence reports PDFs in inches
+POINTS_PER_INCH = 72.0
+
+def image_coverage(page):
+    """Fraction of a page's area covered by its images (overlapping images are counted twice)."""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = sum(
+        abs(rect & page.rect)
+        for image in page.get_images(full=True)
+        for rect in page.get_image_rects(image[0])
+    )
+    return min(covered / page_area, 1.0)
+
+def is_good_text_layer(text, has_images, coverage=0.0):
+    """Decide whether a PDF page's embedded text can be trusted.
+
+    Pages mostly covered by images, and pages with little text that carry
+    images, are treated as scanned; pages with mostly unprintable or
+    replacement characters have a broken font mapping. A page with neither
+    text nor images is blank and needs no OCR.
+    """
+    if coverage >= PDF_MAX_IMAGE_COVERAGE:
+        return False
+    stripped = "".join(text.split())
+    if not stripped:
+        return not has_images
+    if len(stripped) < PDF_MIN_PAGE_CHARS and has_images:
+        return False
+    printable = sum(1 for ch in stripped if ch.isprintable() and ch != "\ufffd")
+    return printable / len(stripped) >= PDF_MIN_PRINTABLE_RATIO
+
+def extract_pdf_pages(content):
+    """Read every page's text layer with PyMuPDF.
+
+    Runs in a worker process, so it takes and returns plain picklable data:
+    one dict per page with its size, text blocks and a quality verdict.
+    """
+    pages = []
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        for page in doc:
+            blocks = [
+                {"content": block[4].strip(), "bbox": [round(v / POINTS_PER_INCH, 4) for v in block[:4]]}
+                for block in page.get_text("blocks")
+                if block[6] == 0 and block[4].strip()  # text blocks only
+            ]
+            text = "\n".join(block["content"] for block in blocks)
+            pages.append({
+                "page": page.number + 1,
+                "width": round(page.rect.width / POINTS_PER_INCH, 4),
+                "height": round(page.rect.height / POINTS_PER_INCH, 4),
+                "blocks": blocks,
+                "good": is_good_text_layer(text, bool(page.get_images()), image_coverage(page))
+            })
+    return pages
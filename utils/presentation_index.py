@@ -0,0 +1,162 @@
+import re
+
+# Presentation sheet columns are found by normalised header, since taxonomy
+# exports differ in naming ("Label" vs "Standard Label", "ELR" vs "Role", ...)
+STANDARD_LABEL_COLUMNS = ("label", "standardlabel")
+NAME_COLUMNS = ("name", "conceptname", "elementname", "element", "concept", "qname")
+PARENT_COLUMNS = ("parent", "parentname", "parentelement", "parentconcept")
+DEPTH_COLUMNS = ("depth", "level", "indent", "indentation")
+ROLE_COLUMNS = ("role", "elr", "extendedlinkrole", "linkrole", "network", "definition")
+# Any other header containing "label" (terse, verbose, total, period start, ...) is a label variant,
+# except columns that describe the label rather than hold one
+NON_LABEL_COLUMNS = ("labelrole", "preferredlabel", "preferredlabelrole", "labellanguage")
+
+ROLE_SUFFIX = re.compile(r"\s*\[(axis|member|domain|abstract|table|line items|dimension|default)\]$", re.IGNORECASE)
+AXIS_SUFFIXES = ("dimension", "axis")
+# "{ns}Axis={ns}Member" or "prefix:Axis=prefix:Member" pairs, comma separated in Filing Details
+DIMENSION_PAIR = re.compile(r"(?:\{[^}]*\}|[\w-]+:)?([\w.-]+)=((?:\{[^}]*\}|[\w-]+:)?)([^\s,;|]+)")
+
+
+def _header(column):
+    return re.sub(r"[^a-z]", "", str(column).lower())
+
+
+def normalize_label(label):
+    """Case-folded label with collapsed whitespace and any trailing "[Axis]"-style role marker removed."""
+    return ROLE_SUFFIX.sub("", " ".join(str(label).split())).casefold()
+
+
+def local_name(qname):
+    """Local part of "{namespace}Name" or "prefix:Name", so concept names match across taxonomy years."""
+    return re.split(r"[}:]", str(qname).strip())[-1]
+
+
+class PresentationIndex:
+    """Lookup structure built once from a taxonomy's Presentation sheet.
+
+    Holds every label variant of every concept, the parent/child tree per
+    role, and each axis's members, so Filing Details rows can be resolved
+    and their dimensions checked without the LLM.
+    """
+
+    def __init__(self, labels, label_variants, concepts, dimensions):
+        self.labels = labels                  # standard labels, as before
+        self.label_variants = label_variants  # normalised label -> concept local names ([] without a name column)
+        self.concepts = concepts              # local name -> {"label", "parents", "roles"}
+        self.dimensions = dimensions          # axis local name -> member local names
+
+    @classmethod
+    def from_dataframe(cls, presentation_df):
+        """Build from a Presentation sheet; returns None without a label column."""
+        headers = {_header(column): column for column in presentation_df.columns}
+
+        def find(candidates):
+            return next((headers[c] for c in candidates if c in headers), None)
+
+        label_column = find(STANDARD_LABEL_COLUMNS)
+        if label_column is None:
+            return None
+        name_column, parent_column = find(NAME_COLUMNS), find(PARENT_COLUMNS)
+        depth_column, role_column = find(DEPTH_COLUMNS), find(ROLE_COLUMNS)
+        variant_columns = [
+            column for header, column in headers.items()
+            if "label" in header and column != label_column and header not in NON_LABEL_COLUMNS
+        ]
+
+        labels, label_variants, concepts, children = set(), {}, {}, {}
+        stack, previous_role = [], None
+        for row in presentation_df.to_dict(orient="records"):
+            label = _text(row.get(label_column))
+            name = local_name(_text(row.get(name_column))) if _text(row.get(name_column)) else None
+            node = name or label
+            if not node:
+                continue
+            if label:
+                labels.add(label)
+            for variant in [label] + [_text(row.get(column)) for column in variant_columns]:
+                if variant:
+                    names = label_variants.setdefault(normalize_label(variant), [])
+                    if name and name not in names:
+                        names.append(name)
+
+            role = _text(row.get(role_column)) if role_column else None
+            parent = _text(row.get(parent_column)) if parent_column else None
+            parent = local_name(parent) if parent and name_column else parent
+            if not parent and depth_column is not None:
+                # Rows are in tree order: the parent is the nearest earlier row one level up
+                if role != previous_role:
+                    stack = []
+                depth = _depth(row.get(depth_column))
+                if depth is not None:
+                    while stack and stack[-1][0] >= depth:
+                        stack.pop()
+                    parent = stack[-1][1] if stack else None
+                    stack.append((depth, node))
+            previous_role = role
+
+            concept = concepts.setdefault(node, {"label": label, "parents": [], "roles": []})
+            if parent and parent not in concept["parents"]:
+                concept["parents"].append(parent)
+                children.setdefault(parent, set()).add(node)
+            if role and role not in concept["roles"]:
+                concept["roles"].append(role)
+
+        dimensions = {
+            node: sorted(_descendants(node, children))
+            for node in concepts
+            if node.lower().endswith(AXIS_SUFFIXES) or (concepts[node]["label"] or "").lower().endswith("[axis]")
+        }
+        return cls(labels, label_variants, concepts, dimensions)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(set(data.get("labels") or []), data.get("labelVariants") or {}, data.get("concepts") or {},
+                   data.get("dimensions") or {})
+
+    def to_dict(self):
+        return {"labels": sorted(self.labels), "labelVariants": self.label_variants, "concepts": self.concepts,
+                "dimensions": self.dimensions}
+
+    def resolves(self, concept_label, concept_name=None):
+        """True if the row's concept is in the taxonomy under any label variant, or by concept name."""
+        if concept_label and normalize_label(concept_label) in self.label_variants:
+            return True
+        return bool(concept_name) and local_name(concept_name) in self.concepts
+
+    def dimension_problem(self, dimensions_text):
+        """Reason the row's dimensions are invalid for this taxonomy, or None.
+
+        Only axes the taxonomy presents with explicit members are checked;
+        unknown and typed axes are left to the LLM.
+        """
+        if not dimensions_text or not self.dimensions:
+            return None
+        for axis, _, member in DIMENSION_PAIR.findall(str(dimensions_text)):
+            members = self.dimensions.get(axis)
+            if members and member not in members:
+                return f"Dimension member {member} is not a member of {axis} in matched taxonomy file"
+        return None
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _depth(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _descendants(node, children):
+    found, pending = set(), [node]
+    while pending:
+        for child in children.get(pending.pop(), ()):
+            if child not in found:
+                found.add(child)
+                pending.append(child)
+    return found
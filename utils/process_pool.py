@@ -0,0 +1,40 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Shared by every function in the worker that offloads CPU-bound parsing
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Return the worker-wide process pool.
+
+    Processes are spawned rather than forked: the Functions worker holds gRPC
+    threads that are not fork-safe. Work submitted here must therefore live in
+    modules that are cheap to import and have no side effects, e.g.
+    utils.workbook_parsing and utils.pdf_text.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def run_in_process(fn, *args):
+    """Run fn(*args) in the process pool, falling back to this process if the pool broke."""
+    global _pool
+    try:
+        return get_process_pool().submit(fn, *args).result()
+    except BrokenProcessPool as e:
+        logging.warning(f"Process pool unavailable, running {fn.__name__} in-process: {e}")
+        with _pool_lock:
+            _pool = None
+        return fn(*args)
@@ -1,5 +1,6 @@
 import os
 import json
+import hashlib
 from utils.blob_functions import get_blob_content
 import yaml
 
@@ -37,4 +38,9 @@ def load_prompts():
         if key not in prompts:
             raise KeyError(f"Missing required prompt key: {key}")
 
-    return prompts
\ No newline at end of file
+    return prompts
+
+def prompt_version(prompts):
+    """Identify the prompts in use: the prompt file name plus a short hash of its content."""
+    digest = hashlib.sha256(json.dumps(prompts, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return f"{os.getenv('PROMPT_FILE')}@{digest}"
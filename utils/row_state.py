@@ -0,0 +1,61 @@
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from utils.blob_functions import MANIFEST_CONTAINER, get_json_blob, write_to_blob
+from utils.workbook_parsing import ROW_ID_COLUMN
+
+# Per-filing row fingerprints and verdicts from the previous run, for incremental re-validation
+ROW_STATE_PREFIX = "row-state/"
+
+
+def row_state_path(filing):
+    return f"{ROW_STATE_PREFIX}{filing}.json"
+
+
+def _row_id(value):
+    """Normalise a workbook ID cell (often read as a float) to a string, or None if blank."""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def row_fingerprints(rows):
+    """Return (row_id, content_hash) per row of a RowStore.
+
+    The hash covers exactly the columns sent to the LLM, so a row counts as
+    changed only if its prompt input changed. Rows without an ID get None and
+    are always re-validated.
+    """
+    ids = rows.column(ROW_ID_COLUMN)
+    records = rows.drop(ROW_ID_COLUMN).to_records()
+    fingerprints = []
+    for row_id, record in zip(ids, records):
+        payload = json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+        fingerprints.append((_row_id(row_id), hashlib.sha256(payload).hexdigest()))
+    return fingerprints
+
+
+def load_row_state(filing, validator_version):
+    """Return {row_id: {"hash", "verdict"}} from the filing's last run.
+
+    State written with a different prompt or model is discarded, since its
+    verdicts would not match what the current validator produces.
+    """
+    state = get_json_blob(MANIFEST_CONTAINER, row_state_path(filing))
+    if not state:
+        return {}
+    if state.get("validatorVersion") != validator_version:
+        logging.info(f"Prompt or model changed since last run of {filing}; re-validating every row")
+        return {}
+    return state.get("rows", {})
+
+
+def save_row_state(filing, validator_version, rows):
+    write_to_blob(MANIFEST_CONTAINER, row_state_path(filing), json.dumps({
+        "validatorVersion": validator_version,
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+    }).encode("utf-8"))
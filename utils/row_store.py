@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class RowStore:
+    """Compact column-oriented table of workbook rows.
+
+    Each column is held once as a NumPy array instead of repeating every column
+    name as a key in every row dict. Filtering and batching produce new stores
+    that share nothing but index arrays; rows are only turned into dicts by
+    to_records() at the prompt/output boundary.
+    """
+
+    __slots__ = ("columns", "_data", "_length")
+
+    def __init__(self, columns, data):
+        self.columns = list(columns)
+        self._data = {name: data[name] for name in self.columns}
+        self._length = len(self._data[self.columns[0]]) if self.columns else 0
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(df.columns, {name: df[name].to_numpy() for name in df.columns})
+
+    @classmethod
+    def from_records(cls, records, columns=None):
+        records = list(records)
+        if columns is None:
+            columns = list(dict.fromkeys(key for record in records for key in record))
+        data = {}
+        for name in columns:
+            column = np.empty(len(records), dtype=object)
+            column[:] = [record.get(name) for record in records]
+            data[name] = column
+        return cls(columns, data)
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __getitem__(self, key):
+        """Slices return a new RowStore; integers return one row as a dict."""
+        if isinstance(key, slice):
+            return RowStore(self.columns, {name: self._data[name][key] for name in self.columns})
+        return {name: self._value(name, key) for name in self.columns}
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    def _value(self, name, index):
+        value = self._data[name][index]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def column(self, name, default=None):
+        """Return a column as a list of Python values (default-filled if missing)."""
+        if name not in self._data:
+            return [default] * self._length
+        return self._data[name].tolist()
+
+    def drop(self, *names):
+        """Return a view of the store without the given columns (no data is copied)."""
+        return RowStore([name for name in self.columns if name not in names], self._data)
+
+    def take(self, indices):
+        """Return a new store with the rows at the given positions."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return RowStore(self.columns, {name: self._data[name][indices] for name in self.columns})
+
+    def to_records(self):
+        """Materialise rows as dicts, the same shape as DataFrame.to_dict(orient='records')."""
+        columns = [self._data[name].tolist() for name in self.columns]
+        return [dict(zip(self.columns, values)) for values in zip(*columns)]
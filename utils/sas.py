@@ -0,0 +1,189 @@
+import os
+import logging
+import threading
+import datetime
+from urllib.parse import quote
+from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobServiceClient, generate_blob_sas
+from utils.storage_client import STORAGE_CONNECTION_STRING
+
+STORAGE_ACCOUNT_NAME = os.getenv("AzureWebJobsStorage__accountName")
+ACCOUNT_URL = f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net"
+
+# User delegation keys are valid for at most 7 days; we keep them short-lived
+# and refresh well before they expire. The margin must cover the longest SAS we
+# hand out (1 hour for listings) so tokens are never clamped to a dying key.
+DELEGATION_KEY_LIFETIME = datetime.timedelta(minutes=int(os.getenv("DELEGATION_KEY_LIFETIME_MINUTES", "240")))
+DELEGATION_KEY_REFRESH_MARGIN = datetime.timedelta(minutes=int(os.getenv("DELEGATION_KEY_REFRESH_MARGIN_MINUTES", "75")))
+# Backdate the key start to tolerate clock skew between the worker and storage
+CLOCK_SKEW = datetime.timedelta(minutes=5)
+# After a failed refresh, wait this long (doubling per failure, up to the max) before trying again
+DELEGATION_KEY_RETRY_BACKOFF = datetime.timedelta(seconds=int(os.getenv("DELEGATION_KEY_RETRY_BACKOFF_SECONDS", "15")))
+DELEGATION_KEY_MAX_RETRY_BACKOFF = datetime.timedelta(minutes=5)
+
+
+class DelegationKeyProvider:
+    """Caches a user delegation key and refreshes it in the background.
+
+    get_key() only blocks when there is no usable key at all (first call on a
+    cold worker, or after a failed refresh let the key expire). Otherwise it
+    returns the cached key and, once inside the refresh margin, kicks off a
+    single background refresh so signing stays a local CPU operation. Failed
+    refreshes back off, so a failing key fetch is not retried on every request.
+    """
+
+    def __init__(self, service_client, lifetime=DELEGATION_KEY_LIFETIME, refresh_margin=DELEGATION_KEY_REFRESH_MARGIN):
+        self._service_client = service_client
+        self._lifetime = lifetime
+        self._refresh_margin = refresh_margin
+        self._key = None
+        self._expiry = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+        self._timer = None
+        self._failures = 0
+        self._retry_after = datetime.datetime.min
+
+    def _fetch(self):
+        now = datetime.datetime.utcnow()
+        expiry = now + self._lifetime
+        key = self._service_client.get_user_delegation_key(
+            key_start_time=now - CLOCK_SKEW,
+            key_expiry_time=expiry
+        )
+        with self._lock:
+            self._key, self._expiry = key, expiry
+            self._failures, self._retry_after = 0, datetime.datetime.min
+        logging.info(f"Fetched user delegation key valid until {expiry.isoformat()}Z")
+        self._schedule_refresh(expiry)
+        return key, expiry
+
+    def _schedule_refresh(self, expiry):
+        delay = (expiry - self._refresh_margin - datetime.datetime.utcnow()).total_seconds()
+        timer = threading.Timer(max(delay, 0), self._refresh_in_background)
+        timer.daemon = True
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = timer
+        timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        self._refresh()
+
+    def _refresh(self):
+        # Callers set _refreshing first, so only one refresh runs at a time
+        try:
+            with self._fetch_lock:
+                self._fetch()
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                backoff = min(DELEGATION_KEY_RETRY_BACKOFF * 2 ** (self._failures - 1), DELEGATION_KEY_MAX_RETRY_BACKOFF)
+                self._retry_after = datetime.datetime.utcnow() + backoff
+            logging.error(f"Background delegation key refresh failed, retrying in {backoff}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def prefetch(self):
+        """Start fetching a key in the background so the first request does not wait.
+
+        No-op while a refresh is running or backing off after a failure.
+        """
+        with self._lock:
+            if self._refreshing or datetime.datetime.utcnow() < self._retry_after:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _cached(self, now):
+        with self._lock:
+            key, expiry = self._key, self._expiry
+        if key is not None and expiry - now > datetime.timedelta(minutes=1):
+            return key, expiry
+        return None
+
+    def get_key(self):
+        """Return (key, expiry), fetching synchronously only if no valid key exists."""
+        now = datetime.datetime.utcnow()
+        cached = self._cached(now)
+        if cached:
+            if cached[1] - now <= self._refresh_margin:
+                # The timer should already have refreshed it; make sure one is running
+                self.prefetch()
+            return cached
+
+        # Only one request fetches; the others wait for and reuse its key
+        with self._fetch_lock:
+            cached = self._cached(datetime.datetime.utcnow())
+            if cached:
+                return cached
+            return self._fetch()
+
+
+_service_client = None
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_delegation_key_provider():
+    """Return the process-wide provider shared by every endpoint that signs URLs.
+
+    None with STORAGE_CONNECTION_STRING: emulators such as Azurite do not
+    issue delegation keys, so URLs are signed with the account key instead.
+    """
+    global _service_client, _provider
+    if STORAGE_CONNECTION_STRING:
+        return None
+    with _provider_lock:
+        if _provider is None:
+            _service_client = BlobServiceClient(ACCOUNT_URL, credential=DefaultAzureCredential())
+            _provider = DelegationKeyProvider(_service_client)
+            _provider.prefetch()
+        return _provider
+
+def generate_blob_sas_url(container_name, blob_name, permission, expiry_minutes=60, expiry=None, **kwargs):
+    """Sign a blob URL with the cached user delegation key.
+
+    expiry, when given, is used instead of expiry_minutes from now, so a batch
+    of URLs can share one. The SAS expiry is clamped to the key expiry, since
+    storage rejects tokens that outlive the key that signed them.
+    """
+    expiry = expiry or datetime.datetime.utcnow() + datetime.timedelta(minutes=expiry_minutes)
+    if STORAGE_CONNECTION_STRING:
+        return _generate_account_key_sas_url(container_name, blob_name, permission, expiry, **kwargs)
+    key, key_expiry = get_delegation_key_provider().get_key()
+    expiry = min(expiry, key_expiry)
+    sas_token = generate_blob_sas(
+        account_name=STORAGE_ACCOUNT_NAME,
+        container_name=container_name,
+        blob_name=blob_name,
+        user_delegation_key=key,
+        permission=permission,
+        expiry=expiry,
+        **kwargs
+    )
+    return f"{ACCOUNT_URL}/{container_name}/{quote(blob_name)}?{sas_token}", expiry
+
+def _generate_account_key_sas_url(container_name, blob_name, permission, expiry, **kwargs):
+    """Sign with the connection string's account key (local/emulator runs only)."""
+    global _service_client
+    with _provider_lock:
+        if _service_client is None:
+            _service_client = BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING)
+    sas_token = generate_blob_sas(
+        account_name=_service_client.account_name,
+        container_name=container_name,
+        blob_name=blob_name,
+        account_key=_service_client.credential.account_key,
+        permission=permission,
+        expiry=expiry,
+        **kwargs
+    )
+    account_url = _service_client.primary_endpoint.rstrip("/")
+    return f"{account_url}/{container_name}/{quote(blob_name)}?{sas_token}", expiry
@@ -0,0 +1,30 @@
+import os
+from azure.identity import DefaultAzureCredential
+from azure.storage.blob import BlobServiceClient
+from azure.storage.queue import QueueClient, TextBase64EncodePolicy
+
+STORAGE_ACCOUNT_NAME = os.getenv("AzureWebJobsStorage__accountName")
+# Local runs (Azurite, scripts/loadtest_functions.py) connect with a connection
+# string instead of managed identity; leave unset in Azure.
+STORAGE_CONNECTION_STRING = os.getenv("STORAGE_CONNECTION_STRING")
+
+
+def create_blob_service_client(credential=None):
+    """BlobServiceClient for the connection string when set, otherwise the account via managed identity."""
+    if STORAGE_CONNECTION_STRING:
+        return BlobServiceClient.from_connection_string(STORAGE_CONNECTION_STRING)
+    return BlobServiceClient(
+        f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net", credential=credential or DefaultAzureCredential()
+    )
+
+
+def create_queue_client(queue_name, credential=None):
+    """QueueClient for the storage account's queue; messages are base64 encoded as queue triggers expect."""
+    if STORAGE_CONNECTION_STRING:
+        return QueueClient.from_connection_string(
+            STORAGE_CONNECTION_STRING, queue_name, message_encode_policy=TextBase64EncodePolicy()
+        )
+    return QueueClient(
+        f"https://{STORAGE_ACCOUNT_NAME}.queue.core.windows.net", queue_name,
+        credential=credential or DefaultAzureCredential(), message_encode_policy=TextBase64EncodePolicy()
+    )
@@ -0,0 +1,254 @@
+import io
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+import pandas as pd
+from utils.blob_functions import MANIFEST_CONTAINER, get_blob_content, get_json_blob, list_blobs, write_to_blob
+from utils.presentation_index import PresentationIndex
+
+TAXONOMY_CONTAINER = "taxanomy"
+TAXONOMY_REGISTRY_PATH = os.getenv("TAXONOMY_REGISTRY_PATH", "taxonomy-registry.json")
+# Workers re-read the registry blob this often, so a rebuild on one instance reaches the others
+TAXONOMY_REGISTRY_TTL_SECONDS = int(os.getenv("TAXONOMY_REGISTRY_TTL_SECONDS", "300"))
+# Per-version presentation indexes, precomputed from each workbook's Presentation sheet at rebuild time
+TAXONOMY_INDEX_PREFIX = "taxonomy-index/"
+# Bump when the stored index layout changes so the next rebuild re-parses every workbook
+TAXONOMY_INDEX_VERSION = 2
+
+TYPE_PATTERNS = (("frs-101", re.compile(r"frs[-_ ]?101")), ("frs-102", re.compile(r"frs[-_ ]?102")),
+                 ("ifrs", re.compile(r"ifrs")))
+JURISDICTION_TOKENS = (("ireland", {"ireland", "irish"}), ("uk", {"frc", "uk"}))
+YEAR_PATTERN = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+
+def parse_taxonomy_blob_name(blob_name):
+    """Return (taxonomy_type, jurisdiction, year) for a taxonomy workbook name, or None if it is not one.
+
+    Recognises names such as "ireland-frs-2023-frs-101.xlsx" and
+    "FRC-2023-v1.0.1-FRS-101.xlsx"; year is None when the name has none.
+    """
+    name = os.path.splitext(os.path.basename(blob_name))[0].lower()
+    tokens = set(re.split(r"[-_ .()]+", name))
+    taxonomy_type = next((t for t, pattern in TYPE_PATTERNS if pattern.search(name)), None)
+    jurisdiction = next((j for j, keywords in JURISDICTION_TOKENS if tokens & keywords), None)
+    if not taxonomy_type or not jurisdiction:
+        return None
+    year = YEAR_PATTERN.search(name)
+    return taxonomy_type, jurisdiction, int(year.group(1)) if year else None
+
+
+def taxonomy_year(taxonomy_name):
+    """The year in a Filing Information taxonomy name such as "FRS 101 (Irish Extension 2023)", or None."""
+    match = YEAR_PATTERN.search(taxonomy_name or "")
+    return int(match.group(1)) if match else None
+
+
+def filing_period_year(input_dates=None, filing_information=None, periods=None):
+    """The filing's reporting year: the selected current period end, else the year in the
+    Filing Information "Filing Name" (e.g. "ASDF - Accounts, 2023 - FRS 101(Ireland) - 1"),
+    else the latest year among the extracted periods. None if none of them has one.
+    """
+    if isinstance(input_dates, dict):
+        current = input_dates.get("end_date_current") or (input_dates.get("duration_current") or {}).get("end")
+        match = YEAR_PATTERN.search(str(current or ""))
+        if match:
+            return int(match.group(1))
+    for row in filing_information or []:
+        if isinstance(row, dict) and row.get("Filer Name") == "Filing Name":
+            match = YEAR_PATTERN.search(" ".join(str(v) for k, v in row.items() if k != "Filer Name"))
+            if match:
+                return int(match.group(1))
+    years = [int(year) for period in periods or [] for year in YEAR_PATTERN.findall(str(period))]
+    return max(years) if years else None
+
+
+def read_presentation_index(taxonomy_bytes, blob_name):
+    """Build the PresentationIndex of a taxonomy workbook, or None if it has no usable sheet."""
+    xls = pd.ExcelFile(io.BytesIO(taxonomy_bytes))
+
+    if "Presentation" not in xls.sheet_names:
+        logging.warning(f"'Presentation' sheet not found in {blob_name}")
+        return None
+
+    index = PresentationIndex.from_dataframe(pd.read_excel(xls, sheet_name="Presentation"))
+    if index is None:
+        logging.warning(f"No label column found in Presentation sheet of {blob_name}")
+    return index
+
+
+def taxonomy_index_path(blob_name):
+    return f"{TAXONOMY_INDEX_PREFIX}{blob_name}.json"
+
+
+def build_taxonomy_index(blob_name, etag):
+    """Parse a taxonomy workbook once into the JSON index workers load instead of the workbook."""
+    index = read_presentation_index(get_blob_content(TAXONOMY_CONTAINER, blob_name), blob_name)
+    return {
+        "blob": blob_name,
+        "etag": etag,
+        "indexVersion": TAXONOMY_INDEX_VERSION,
+        "presentation": index.to_dict() if index is not None else None,
+    }
+
+
+class TaxonomyRegistry:
+    """(taxonomy type, jurisdiction, year) -> taxonomy blob, built from the container listing ahead of time."""
+
+    def __init__(self, taxonomies, built_at=None):
+        self.taxonomies = taxonomies
+        self.built_at = built_at
+        self._entries = {entry["blob"]: entry for entry in taxonomies}
+        self._exact = {}
+        self._by_family = {}
+        # Sorted by name so, of several versions for one key (v1.0.1, v1.0.2), the last wins
+        for entry in sorted(taxonomies, key=lambda entry: entry["blob"]):
+            key = (entry["type"], entry["jurisdiction"])
+            self._exact[key + (entry["year"],)] = entry["blob"]
+            self._by_family.setdefault(key, {})[entry["year"]] = entry["blob"]
+        self._by_family = {
+            key: sorted(years.items(), key=lambda item: item[0] or 0, reverse=True)
+            for key, years in self._by_family.items()
+        }
+
+    @classmethod
+    def from_blobs(cls, blobs):
+        """Build from listed blobs (anything with .name and .etag)."""
+        taxonomies = []
+        for blob in blobs:
+            parsed = parse_taxonomy_blob_name(blob.name)
+            if parsed:
+                taxonomy_type, jurisdiction, year = parsed
+                taxonomies.append({"blob": blob.name, "etag": blob.etag, "type": taxonomy_type,
+                                   "jurisdiction": jurisdiction, "year": year})
+            else:
+                logging.info(f"Taxonomy registry: skipping unrecognised file {blob.name}")
+        return cls(taxonomies, datetime.now(timezone.utc).isoformat())
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("taxonomies", []), data.get("builtAt"))
+
+    def to_dict(self):
+        return {"taxonomies": self.taxonomies, "builtAt": self.built_at}
+
+    def entry(self, blob_name):
+        return self._entries.get(blob_name)
+
+    def resolve(self, taxonomy_type, jurisdiction, year=None):
+        """Return the taxonomy blob for a filing, or None.
+
+        Fallback order: the exact (type, jurisdiction, year); the latest year
+        before `year` for that type and jurisdiction; the earliest year after
+        it. Without a year, the latest year available.
+        """
+        if year is not None and (taxonomy_type, jurisdiction, year) in self._exact:
+            return self._exact[(taxonomy_type, jurisdiction, year)]
+        family = self._by_family.get((taxonomy_type, jurisdiction))
+        if not family:
+            return None
+        if year is not None:
+            earlier = next((blob for entry_year, blob in family if entry_year and entry_year < year), None)
+            if earlier:
+                return earlier
+            later = [blob for entry_year, blob in family if entry_year and entry_year > year]
+            if later:
+                return later[-1]
+        return family[0][1]
+
+
+def rebuild_registry():
+    """List the taxonomy container once and store the registry in MANIFEST_CONTAINER.
+
+    Each version's presentation index is rebuilt only when its workbook changed; a
+    workbook whose index fails to build is still registered, and its index is
+    then built from the workbook itself at validation time.
+    """
+    previous = {entry["blob"]: entry for entry in (get_json_blob(MANIFEST_CONTAINER, TAXONOMY_REGISTRY_PATH) or {})
+                .get("taxonomies", [])}
+    registry = TaxonomyRegistry.from_blobs(list_blobs(TAXONOMY_CONTAINER))
+    for entry in registry.taxonomies:
+        old = previous.get(entry["blob"], {})
+        if old.get("indexPath") and old.get("etag") == entry["etag"] and old.get("indexVersion") == TAXONOMY_INDEX_VERSION:
+            entry.update(indexPath=old["indexPath"], indexVersion=TAXONOMY_INDEX_VERSION)
+            continue
+        try:
+            index = build_taxonomy_index(entry["blob"], entry["etag"])
+            write_to_blob(MANIFEST_CONTAINER, taxonomy_index_path(entry["blob"]), json.dumps(index).encode("utf-8"))
+            entry.update(indexPath=taxonomy_index_path(entry["blob"]), indexVersion=TAXONOMY_INDEX_VERSION)
+        except Exception as e:
+            logging.error(f"Failed to index taxonomy {entry['blob']}: {str(e)}")
+    write_to_blob(MANIFEST_CONTAINER, TAXONOMY_REGISTRY_PATH, json.dumps(registry.to_dict()).encode("utf-8"))
+    logging.info(f"Taxonomy registry rebuilt with {len(registry.taxonomies)} taxonomies")
+    _cache_registry(registry)
+    return registry
+
+
+_registry = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _cache_registry(registry):
+    global _registry, _loaded_at
+    with _lock:
+        _registry, _loaded_at = registry, time.monotonic()
+
+
+def get_registry():
+    """Return the registry, cached in-process for TAXONOMY_REGISTRY_TTL_SECONDS.
+
+    One small blob read per TTL; the container is only listed when no registry
+    has been written yet.
+    """
+    with _lock:
+        if _registry is not None and time.monotonic() - _loaded_at < TAXONOMY_REGISTRY_TTL_SECONDS:
+            return _registry
+    data = get_json_blob(MANIFEST_CONTAINER, TAXONOMY_REGISTRY_PATH)
+    if data is None:
+        return rebuild_registry()
+    registry = TaxonomyRegistry.from_dict(data)
+    _cache_registry(registry)
+    return registry
+
+
+_indexes = {}
+# Guards _indexes and _index_locks; each blob's load runs under its own lock
+_indexes_lock = threading.Lock()
+_index_locks = {}
+
+
+def get_taxonomy_index(registry, blob_name):
+    """PresentationIndex of one taxonomy version, cached per process by blob and etag.
+
+    Loads the precomputed index when the registry has a current one, so a
+    batch mixing taxonomy years pays one JSON read per version; falls back to
+    parsing the workbook. None if the workbook has no usable Presentation sheet.
+    Concurrent callers for the same blob wait for one load; other blobs are not
+    held up by it.
+    """
+    entry = (registry.entry(blob_name) if registry else None) or {}
+    etag = entry.get("etag")
+    with _indexes_lock:
+        cached = _indexes.get(blob_name)
+        if cached and cached[0] == etag:
+            return cached[1]
+        blob_lock = _index_locks.setdefault(blob_name, threading.Lock())
+
+    with blob_lock:
+        with _indexes_lock:
+            cached = _indexes.get(blob_name)
+        if cached and cached[0] == etag:
+            return cached[1]
+
+        stored = get_json_blob(MANIFEST_CONTAINER, entry["indexPath"]) if entry.get("indexPath") else None
+        if stored and stored.get("etag") == etag and stored.get("indexVersion") == TAXONOMY_INDEX_VERSION:
+            index = PresentationIndex.from_dict(stored["presentation"]) if stored["presentation"] else None
+        else:
+            index = read_presentation_index(get_blob_content(TAXONOMY_CONTAINER, blob_name), blob_name)
+        with _indexes_lock:
+            _indexes[blob_name] = (etag, index)
+        return index
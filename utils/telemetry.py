@@ -0,0 +1,157 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Optional: spans are still timed and summarised without it
+    trace = None
+
+# Spans go to whatever OpenTelemetry tracer provider the host configured (for
+# example azure-monitor-opentelemetry); with none configured they are no-ops.
+_tracer = trace.get_tracer("pipeline_callAoai") if trace else None
+
+# Counters that are meaningful summed across stages; the rest are only totalled per stage
+RUN_TOTAL_COUNTERS = ("prompt_tokens", "completion_tokens", "llm_retries", "index_retries", "cache_hits",
+                      "llm_errors")
+
+_current_run = contextvars.ContextVar("telemetry_run", default=None)
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+
+
+class RunTelemetry:
+    """Collects the spans of one validation request and summarises them per stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.spans = []
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """Return per-stage count/total/max milliseconds and summed counters, plus run-wide totals."""
+        stages, totals = {}, dict.fromkeys(RUN_TOTAL_COUNTERS, 0)
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            stage = stages.setdefault(span.name, {"count": 0, "totalMs": 0.0, "maxMs": 0.0, "errors": 0})
+            stage["count"] += 1
+            stage["totalMs"] += span.duration_ms
+            stage["maxMs"] = max(stage["maxMs"], span.duration_ms)
+            stage["errors"] += 1 if span.error else 0
+            for key, value in span.counters.items():
+                stage[key] = stage.get(key, 0) + value
+                if key in totals:
+                    totals[key] += value
+        for stage in stages.values():
+            stage["totalMs"] = round(stage["totalMs"], 1)
+            stage["maxMs"] = round(stage["maxMs"], 1)
+        return {
+            "durationMs": round((time.perf_counter() - self._started) * 1000, 1),
+            "stages": stages,
+            "totals": totals,
+        }
+
+
+class Span:
+    """A timed stage. add() counters are summed into the run summary; set() attributes only go to OpenTelemetry."""
+
+    __slots__ = ("name", "counters", "attributes", "duration_ms", "error")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.counters = {}
+        self.attributes = dict(attributes)
+        self.duration_ms = 0.0
+        self.error = None
+
+    def add(self, key, value=1):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+
+@contextmanager
+def start_run():
+    """Collect every span started in this context (and in propagate()d workers) into one RunTelemetry."""
+    run = RunTelemetry()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+def run_summary():
+    """Summary of the current run, or None outside start_run()."""
+    run = _current_run.get()
+    return run.summary() if run else None
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a stage, as an OpenTelemetry span when available, and record it on the current run."""
+    otel_context = _tracer.start_as_current_span(name) if _tracer else None
+    otel_span = otel_context.__enter__() if otel_context else None
+    current = Span(name, attributes)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    exc_info = (None, None, None)
+    try:
+        yield current
+    except Exception as e:
+        current.error = type(e).__name__
+        exc_info = (type(e), e, e.__traceback__)
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        _current_span.reset(token)
+        run = _current_run.get()
+        if run:
+            run.record(current)
+        if otel_span:
+            for key, value in {**current.attributes, **current.counters}.items():
+                if value is not None:
+                    otel_span.set_attribute(key, value)
+        if otel_context:
+            # Records the exception and error status on the span
+            otel_context.__exit__(*exc_info)
+
+
+def add_to_current_span(key, value=1):
+    """Add to a counter on the innermost active span, if there is one."""
+    current = _current_span.get()
+    if current:
+        current.add(key, value)
+
+
+def record_token_usage(usage):
+    """Add an OpenAI response's token usage to the innermost active span."""
+    if usage is None:
+        return
+    add_to_current_span("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+    add_to_current_span("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+
+
+def record_sdk_retry(request):
+    """httpx request hook: count the OpenAI SDK's own retries of a call on the innermost active span.
+
+    The SDK numbers each attempt in the x-stainless-retry-count header, so any
+    request with a non-zero count is a retry the caller never sees.
+    """
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        add_to_current_span("llm_retries")
+
+
+def propagate(fn):
+    """Wrap fn so it runs in a copy of the caller's context, keeping the run and span when handed to a thread pool."""
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run_in_context
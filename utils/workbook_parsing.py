@@ -0,0 +1,160 @@
+import io
+import os
+import pandas as pd
+from bs4 import BeautifulSoup
+from utils.row_store import RowStore
+
+# Parsing helpers for pipeline_callAoai. They run in the shared process pool
+# (utils.process_pool), so this module must stay free of import-time side
+# effects and of Azure clients. Log records are returned under "log" as
+# (level, message) pairs for the caller to emit in the host process.
+
+# Stable per-row identifier in "Filing Details"; carried alongside the rows for
+# incremental re-validation but never sent to the LLM
+ROW_ID_COLUMN = "ID"
+# Carried only for the taxonomy lookup; concept_label_filter drops it before rows reach the LLM
+CONCEPT_NAME_COLUMN = "Concept Name"
+
+def parse_excel_bytes(blob_name, blob_bytes):
+    """Extract Filing Details rows, periods and Filing Information from a review workbook."""
+    result = {"excel_rows": [], "taxonomy_data": [], "unique_periods": [], "log": []}
+    log = result["log"]
+
+    xls = pd.ExcelFile(io.BytesIO(blob_bytes))
+    # df = pd.read_excel(xls, sheet_name='Filing Details')
+
+    # # Extract required columns
+    # df = df[['Line Item Description', 'Concept Label', 'Comment Text']].dropna(how='all')
+    df_filing_details = pd.read_excel(xls, sheet_name='Filing Details')
+
+    # Extract relevant columns for LLM validation
+    df = df_filing_details[['Line Item Description', 'Concept Label', 'Comment Text','Dimensions','Tag Value']].dropna(how='all')
+    if ROW_ID_COLUMN in df_filing_details.columns:
+        df.insert(0, ROW_ID_COLUMN, df_filing_details.loc[df.index, ROW_ID_COLUMN])
+    if CONCEPT_NAME_COLUMN in df_filing_details.columns:
+        df[CONCEPT_NAME_COLUMN] = df_filing_details.loc[df.index, CONCEPT_NAME_COLUMN]
+
+    # Extract unique 'Period' values
+    if 'Period' in df_filing_details.columns:
+        unique_periods = df_filing_details['Period'].dropna().unique().tolist()
+        log.append(("info", f"[{blob_name}] Extracted Periods from Excel: {unique_periods}"))
+
+    else:
+        unique_periods = []
+        log.append(("info", f"[{blob_name}] Extracted Periods from Excel: {unique_periods}"))
+
+    # Columnar rows pickle back from the pool compactly; dicts are built at the prompt boundary
+    result["excel_rows"] = RowStore.from_dataframe(df)
+    result["unique_periods"] = unique_periods
+
+    # taxonomy_df = pd.read_excel(xls, sheet_name='Filing Information')
+    # result["taxonomy_data"] = taxonomy_df.to_dict(orient='records')
+    if 'Filing Information' in xls.sheet_names:
+        taxonomy_df = pd.read_excel(xls, sheet_name='Filing Information')
+        if not taxonomy_df.empty:
+            result["taxonomy_data"] = taxonomy_df.to_dict(orient='records')
+        else:
+            log.append(("warning", f"'Filing Information' sheet is empty in blob {blob_name}"))
+    else:
+        log.append(("warning", f"'Filing Information' sheet missing in blob {blob_name}"))
+
+    return result
+
+def parse_html_bytes(blob_name, blob_bytes):
+    """Extract the statement of compliance, notes and tax sections from iXBRL HTML."""
+    result = {"statement_of_compliance_text": None, "log": []}
+
+    try:
+        soup = BeautifulSoup(blob_bytes.decode('utf-8', errors='ignore'), 'html.parser')
+
+        full_text = []
+
+        # --------------------------
+        # Statement of Compliance
+        # --------------------------
+        start_tag = None
+        for p in soup.find_all("p"):
+            if "STATEMENT OF COMPLIANCE" in p.get_text(strip=True).upper():
+                start_tag = p
+                break
+
+        content = []
+        if start_tag:
+            current = start_tag
+            while current:
+                text = current.get_text(strip=True)
+                if text.startswith("2.") and "ACCOUNTING POLICIES" in text.upper():
+                    break
+                if text:
+                    content.append(text)
+                current = current.find_next_sibling("p")
+
+        if content:
+            full_text.append("=== STATEMENT OF COMPLIANCE ===")
+            full_text.extend(content)
+
+        # --------------------------
+        # NOTES TO THE FINANCIAL STATEMENTS (all occurrences)
+        # --------------------------
+        notes_occurrences = []
+        for p in soup.find_all("p"):
+            if "NOTES TO THE FINANCIAL STATEMENTS" in p.get_text(strip=True).upper():
+                notes_occurrences.append(p)
+
+        for idx, start_tag in enumerate(notes_occurrences, start=1):
+            notes_content = []
+            current = start_tag
+            while current:
+                text = current.get_text(strip=True)
+                if any(stop in text.upper() for stop in ["ACCOUNTING POLICIES", "DIRECTORS", "INDEPENDENT AUDITOR"]):
+                    break
+                if text:
+                    notes_content.append(text)
+                current = current.find_next_sibling("p")
+            if notes_content:
+                full_text.append(f"=== NOTES TO FS occurrence {idx} ===")
+                full_text.extend(notes_content)
+
+        # --------------------------
+        # Factors affecting tax charge for the year
+        # --------------------------
+        tax_section = []
+        start_tag = None
+        for p in soup.find_all("p"):
+            if "FACTORS AFFECTING TAX" in p.get_text(strip=True).upper():
+                start_tag = p
+                break
+
+        if start_tag:
+            current = start_tag
+            while current:
+                text = current.get_text(strip=True)
+                if any(stop in text.upper() for stop in ["NOTES TO THE", "DIRECTORS", "INDEPENDENT AUDITOR"]):
+                    break
+                if text:
+                    tax_section.append(text)
+                current = current.find_next_sibling("p")
+
+        if tax_section:
+            full_text.append("=== FACTORS AFFECTING TAX ===")
+            full_text.extend(tax_section)
+
+        # --------------------------
+        # Save everything in one field
+        # --------------------------
+        result["statement_of_compliance_text"] = "\n".join(full_text)
+
+    except Exception as e:
+        result["error"] = f"Error extracting HTML content from {blob_name}: {str(e)}"
+
+    return result
+
+def parse_blob_bytes(blob_name, blob_bytes):
+    """Dispatch on extension; returns only the fields the pipeline needs."""
+    ext = os.path.splitext(blob_name)[1].lower()
+
+    if ext in ['.xlsx', '.xls']:
+        return parse_excel_bytes(blob_name, blob_bytes)
+    elif ext == '.html':
+        return parse_html_bytes(blob_name, blob_bytes)
+    return {}